@@ -0,0 +1,190 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2 as cv
+
+from exercise_tracker import ManualClock
+from fitness_data import BODY_GOALS, EXERCISES
+from joint_angles import landmarks_to_array
+from landmark_recording import LandmarkRecorder
+from multi_session import WorkoutSession, find_program
+from pose_session import PoseSession
+
+# A single-exercise run should count every rep in the file, so its set never fills
+UNLIMITED_REPS = 10 ** 9
+
+TRACE_FIELDS = ["frame", "time", "exercise", "set", "angle", "stage", "reps", "rep_event"]
+
+
+def single_exercise_program(exercise_key):
+    return {"name": EXERCISES[exercise_key]["name"], "exercises": [exercise_key], "sets": 1, "reps": UNLIMITED_REPS}
+
+
+# --- Per-File Analysis ---
+# Runs in a worker process. Frames are decoded and processed back to back,
+# and the tracker's clock follows the video timeline rather than wall time,
+# so time-based logic (plank holds, rests) matches the recording.
+def analyze_video(path, program, pose_config, mirror=True, record_path=None):
+    cap = cv.VideoCapture(path)
+    if not cap.isOpened():
+        return {"file": path, "error": "Could not open video"}
+
+    video_fps = cap.get(cv.CAP_PROP_FPS) or 30.0
+    clock = ManualClock(0.0)
+    session = WorkoutSession(path, path, program, clock=clock)
+    tracker = session.tracker
+    trace = []
+    frame_index = 0
+    recorder = LandmarkRecorder(record_path, {"source": path, "program": program["name"]}) if record_path else None
+    start = time.perf_counter()
+
+    with PoseSession(**pose_config) as pose_session:
+        while not session.finished:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            clock.now = frame_index / video_fps
+            if mirror:
+                frame = cv.flip(frame, 1)
+            image = cv.cvtColor(frame, cv.COLOR_BGR2RGB)
+            image.flags.writeable = False
+            results = pose_session.process(image)
+
+            exercise, current_set = tracker.current_exercise, tracker.current_set
+            points = landmarks_to_array(results.pose_landmarks.landmark) if results.pose_landmarks else None
+            event = session.handle_landmarks(clock.now, points)
+            trace.append({
+                "frame": frame_index,
+                "time": round(clock.now, 4),
+                "exercise": exercise,
+                "set": current_set,
+                "angle": None if session.last_angle is None else round(session.last_angle, 2),
+                "stage": tracker.stage,
+                "reps": event["rep"] if event else tracker.counter,
+                "rep_event": 1 if event else 0
+            })
+            if recorder is not None:
+                recorder.append(clock.now, points, session.last_angle, exercise, tracker.stage,
+                                current_set, trace[-1]["reps"], event is not None)
+            frame_index += 1
+        inference = pose_session.latency_stats()
+
+    cap.release()
+    if recorder is not None:
+        recorder.close()
+    elapsed = time.perf_counter() - start
+    return {
+        "file": path,
+        "program": program["name"],
+        "frames": frame_index,
+        "frames_with_pose": session.frames_with_pose,
+        "video_duration_s": round(frame_index / video_fps, 3),
+        "processing_s": round(elapsed, 3),
+        "fps": round(frame_index / elapsed, 2) if elapsed > 0 else 0.0,
+        "inference_mean_ms": round(inference["mean_ms"], 2),
+        "completed": session.finished,
+        "reps": session.events,
+        "angle_trace": trace
+    }
+
+
+def output_stems(paths):
+    # Output name per input: its path below the inputs' common folder, so
+    # "a.avi" and "d/a.avi" become "a" and "d__a". Inputs that still clash
+    # ("a.avi", "a.mp4") keep their extension too.
+    paths = [os.path.abspath(path) for path in paths]
+    root = os.path.commonpath([os.path.dirname(path) for path in paths])
+    relative = [os.path.relpath(path, root).replace(os.sep, "__") for path in paths]
+    stems = [os.path.splitext(name)[0] for name in relative]
+    return [name.replace(".", "_") if stems.count(stem) > 1 else stem for name, stem in zip(relative, stems)]
+
+
+def write_outputs(result, out_dir, stem, formats):
+    written = []
+    if "json" in formats:
+        path = os.path.join(out_dir, f"{stem}.json")
+        with open(path, "w") as f:
+            json.dump(result, f, indent=2)
+        written.append(path)
+    if "csv" in formats:
+        path = os.path.join(out_dir, f"{stem}.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=TRACE_FIELDS)
+            writer.writeheader()
+            writer.writerows(result["angle_trace"])
+        written.append(path)
+    return written
+
+
+def analyze_and_write(path, stem, program, pose_config, mirror, out_dir, formats, record):
+    # Outputs are written in the worker so full traces never cross processes
+    record_path = os.path.join(out_dir, f"{stem}.fitrec") if record else None
+    result = analyze_video(path, program, pose_config, mirror, record_path)
+    if "error" in result:
+        return result
+    result["outputs"] = write_outputs(result, out_dir, stem, formats)
+    summary = {k: v for k, v in result.items() if k not in ("reps", "angle_trace")}
+    summary["rep_count"] = len(result["reps"])
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count reps in recorded workout videos without the GUI.")
+    parser.add_argument("files", nargs="+", help="Video files to analyse")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--exercise", choices=sorted(EXERCISES), help="Count a single exercise for the whole file")
+    target.add_argument("--goal", choices=sorted(BODY_GOALS), help="Follow a program from this goal")
+    parser.add_argument("--program", help="Program name within --goal (defaults to the first)")
+    parser.add_argument("--format", choices=["json", "csv", "both"], default="json")
+    parser.add_argument("--out-dir", default="analysis")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (defaults to one per core)")
+    parser.add_argument("--model-complexity", type=int, choices=[0, 1, 2], default=1)
+    parser.add_argument("--roi", action="store_true", help="Run inference on a landmark-guided crop instead of the full frame")
+    parser.add_argument("--record", action="store_true", help="Also save a landmark recording for landmark_replay")
+    parser.add_argument("--no-mirror", action="store_true", help="Don't flip frames like the live camera view")
+    args = parser.parse_args()
+
+    program = single_exercise_program(args.exercise) if args.exercise else find_program(args.goal, args.program)
+    pose_config = {"min_detection_confidence": 0.8, "min_tracking_confidence": 0.65, "model_complexity": args.model_complexity,
+                   "roi_cropping": args.roi}
+    formats = ["json", "csv"] if args.format == "both" else [args.format]
+    os.makedirs(args.out_dir, exist_ok=True)
+    # The same file named twice is analysed once
+    files = list(dict.fromkeys(os.path.normpath(path) for path in args.files))
+    stems = output_stems(files)
+
+    workers = min(args.workers or os.cpu_count() or 1, len(files))
+    summaries = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {
+            pool.submit(analyze_and_write, path, stem, program, pose_config, not args.no_mirror, args.out_dir, formats, args.record): path
+            for path, stem in zip(files, stems)
+        }
+        for future in as_completed(futures):
+            try:
+                summary = future.result()
+            except Exception as e:
+                # One bad file (or a crashed worker) shouldn't cost the rest of the batch
+                summary = {"file": futures[future], "error": f"{type(e).__name__}: {e}"}
+            summaries.append(summary)
+            if "error" in summary:
+                print(f"{summary['file']}: {summary['error']}")
+            else:
+                print(f"{summary['file']}: {summary['rep_count']} reps, {summary['frames']} frames at {summary['fps']} fps")
+
+    total_frames = sum(s.get("frames", 0) for s in summaries)
+    elapsed = time.perf_counter() - start
+    print(f"Processed {len(summaries)} files, {total_frames} frames in {elapsed:.1f} s ({total_frames / elapsed:.1f} fps overall)")
+
+    with open(os.path.join(args.out_dir, "summary.json"), "w") as f:
+        json.dump(sorted(summaries, key=lambda s: s["file"]), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1120 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import cv2 as cv
+import numpy as np
+
+RESOLUTIONS = {"480p": (640, 480), "720p": (1280, 720), "1080p": (1920, 1080)}
+
+# name -> (run(args) -> results, configure(subparser), help text)
+BENCHMARKS = {}
+
+
+def benchmark(name, help_text, configure=None):
+    def register(run):
+        BENCHMARKS[name] = (run, configure, help_text)
+        return run
+    return register
+
+
+# --- Measurement Helpers ---
+def summarize(samples_ns):
+    samples = np.asarray(samples_ns, dtype=np.float64) / 1e6
+    mean = float(samples.mean())
+    return {
+        "samples": int(samples.size),
+        "mean_ms": mean,
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "p99_ms": float(np.percentile(samples, 99)),
+        "throughput_per_s": 1000.0 / mean if mean > 0 else float("inf")
+    }
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def time(self, name, fn, *args, **kwargs):
+        start = time.perf_counter_ns()
+        result = fn(*args, **kwargs)
+        self.samples[name].append(time.perf_counter_ns() - start)
+        return result
+
+    def summary(self):
+        return {name: summarize(samples) for name, samples in self.samples.items()}
+
+
+def make_synthetic_video(path, size, frames, fps=30):
+    # Moving gradient plus noise, so the encoder and decoder do real work
+    width, height = size
+    writer = cv.VideoWriter(path, cv.VideoWriter_fourcc(*"MJPG"), fps, size)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    rng = np.random.default_rng(0)
+    for i in range(frames):
+        base = (x + y + i * 4) % 256
+        frame = np.dstack([base, np.roll(base, i, axis=1), 255 - base]).astype(np.uint8)
+        frame += rng.integers(0, 16, frame.shape, dtype=np.uint8)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def synthetic_pose_landmarks():
+    # A standing figure for draw_landmarks, which needs the protobuf type
+    from mediapipe.framework.formats import landmark_pb2
+    rng = np.random.default_rng(1)
+    landmarks = landmark_pb2.NormalizedLandmarkList()
+    for x, y in zip(rng.uniform(0.3, 0.7, 33), np.linspace(0.1, 0.9, 33)):
+        landmarks.landmark.add(x=float(x), y=float(y), z=0.0, visibility=0.99)
+    return landmarks
+
+
+def print_table(title, stages):
+    print(f"\n{title}")
+    print(f"  {'stage':<22}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'per s':>12}")
+    for name, stats in stages.items():
+        print(f"  {name:<22}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['throughput_per_s']:>12.1f}")
+
+
+# --- Baselines ---
+def find_regressions(results, baseline, tolerance, path=()):
+    # Any p50/p95 that grew by more than `tolerance` (a fraction) is flagged
+    regressions = []
+    for key, value in results.items():
+        if key not in baseline:
+            continue
+        if isinstance(value, dict) and "p50_ms" in value:
+            for metric in ("p50_ms", "p95_ms"):
+                old, new = baseline[key].get(metric), value.get(metric)
+                if old and new and new > old * (1 + tolerance):
+                    regressions.append(f"{'/'.join(path + (key,))} {metric}: {old:.3f} -> {new:.3f} ms (+{(new / old - 1) * 100:.0f}%)")
+        elif isinstance(value, dict):
+            regressions.extend(find_regressions(value, baseline[key], tolerance, path + (key,)))
+    return regressions
+
+
+# --- Frame Pipeline Stages ---
+def configure_pipeline(parser):
+    parser.add_argument("--resolutions", nargs="+", choices=sorted(RESOLUTIONS), default=["480p", "720p", "1080p"])
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--model-complexity", type=int, choices=[0, 1, 2], default=1)
+
+
+@benchmark("pipeline", "Time each stage of update_camera/process_frame on synthetic video", configure_pipeline)
+def bench_pipeline(args):
+    import mediapipe as mp
+    from PIL import Image
+
+    from pose_session import PoseSession
+
+    mp_drawing = mp.solutions.drawing_utils
+    mp_pose = mp.solutions.pose
+    landmark_spec = mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2)
+    connection_spec = mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2)
+    pose_landmarks = synthetic_pose_landmarks()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.resolutions:
+            size = RESOLUTIONS[name]
+            path = make_synthetic_video(os.path.join(tmp, f"{name}.avi"), size, args.frames)
+            cap = cv.VideoCapture(path)
+            timer = StageTimer()
+            display_buffer = np.zeros((480, 640, 3), dtype=np.uint8)
+            display_image = Image.new("RGB", (640, 480))
+            with PoseSession(model_complexity=args.model_complexity) as pose_session:
+                pose_session.warm_up(*size)
+                while True:
+                    ret, frame = timer.time("cap.read", cap.read)
+                    if not ret:
+                        break
+                    frame = timer.time("cv.flip", cv.flip, frame, 1)
+                    image = timer.time("cvtColor BGR2RGB", cv.cvtColor, frame, cv.COLOR_BGR2RGB)
+                    image.flags.writeable = False
+                    timer.time("pose.process", pose_session.process, image)
+                    image.flags.writeable = True
+                    # Synthetic frames contain no person, so draw a fixed skeleton
+                    timer.time("draw_landmarks", mp_drawing.draw_landmarks, image, pose_landmarks,
+                               mp_pose.POSE_CONNECTIONS, landmark_spec, connection_spec)
+                    start = time.perf_counter_ns()
+                    cv.putText(image, "Exercise: Squat", (10, 30), cv.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                    cv.putText(image, "Set: 1/3", (10, 60), cv.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                    cv.putText(image, "Angle: 123", (10, 90), cv.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+                    cv.putText(image, "KEEP GOING! YOU'VE GOT THIS!", (100, 300), cv.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+                    timer.samples["putText overlays"].append(time.perf_counter_ns() - start)
+                    # FrameDisplay.show without the Tk paste, which needs a display
+                    small = timer.time("display resize", cv.resize, image, (640, 480), dst=display_buffer, interpolation=cv.INTER_AREA)
+                    timer.time("PIL frombytes", display_image.frombytes, small)
+            cap.release()
+            results[name] = timer.summary()
+            print_table(f"{name} {size[0]}x{size[1]}", results[name])
+    return results
+
+
+# --- Buffer Pool ---
+def configure_buffers(parser):
+    parser.add_argument("--resolutions", nargs="+", choices=sorted(RESOLUTIONS), default=["480p", "720p", "1080p"])
+    parser.add_argument("--frames", type=int, default=600)
+
+
+@benchmark("buffers", "Compare per-frame allocation with the buffer pool for flip/cvtColor/resize", configure_buffers)
+def bench_buffers(args):
+    import gc
+
+    from buffer_pool import BufferPool, read_only
+
+    def allocating(frame, display):
+        flipped = cv.flip(frame, 1)
+        rgb = cv.cvtColor(flipped, cv.COLOR_BGR2RGB)
+        rgb.flags.writeable = False
+        rgb.flags.writeable = True
+        cv.resize(rgb, (640, 480), dst=display, interpolation=cv.INTER_AREA)
+
+    def pooled(frame, display):
+        flipped = cv.flip(frame, 1, dst=pool.acquire_like(frame))
+        rgb = cv.cvtColor(flipped, cv.COLOR_BGR2RGB, dst=pool.acquire_like(flipped))
+        pool.release(flipped)
+        read_only(rgb)
+        cv.resize(rgb, (640, 480), dst=display, interpolation=cv.INTER_AREA)
+        pool.release(rgb)
+
+    # Keep some Python garbage around, as the app has, so collections cost something
+    garbage = [{"i": i} for i in range(200000)]
+    pauses = []
+    gc_start = [0.0]
+
+    def on_gc(phase, info):
+        if phase == "start":
+            gc_start[0] = time.perf_counter()
+        else:
+            pauses.append(time.perf_counter() - gc_start[0])
+
+    results = {}
+    gc.callbacks.append(on_gc)
+    try:
+        for name in args.resolutions:
+            width, height = RESOLUTIONS[name]
+            frame = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+            display = np.empty((480, 640, 3), dtype=np.uint8)
+            pool = BufferPool()
+            results[name] = {}
+            timer = StageTimer()
+            for label, step in (("allocating", allocating), ("pooled", pooled)):
+                gc.collect()
+                pauses.clear()
+                for _ in range(args.frames):
+                    timer.time(label, step, frame, display)
+                results[name][label] = dict(summarize(timer.samples[label]), gc_collections=len(pauses),
+                                            gc_pause_ms=sum(pauses) * 1000)
+            results[name]["pool"] = pool.stats()
+            print_table(f"{name} {width}x{height}", {label: results[name][label] for label in ("allocating", "pooled")})
+            for label in ("allocating", "pooled"):
+                r = results[name][label]
+                print(f"  {label:<22}{r['gc_collections']:>4} collections, {r['gc_pause_ms']:.1f} ms paused")
+    finally:
+        gc.callbacks.remove(on_gc)
+    del garbage
+    return results
+
+
+# --- Display Pacing ---
+def configure_pacing(parser):
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--camera-fps", type=float, default=30.0)
+    parser.add_argument("--inference-ms", type=float, default=20.0, help="Mean processing time per frame")
+    parser.add_argument("--display-fps", type=float, default=30.0)
+
+
+@benchmark("pacing", "Compare the fixed 10 ms display poll with the frame pacer", configure_pacing)
+def bench_pacing(args):
+    # A producer thread stands in for capture + inference and time.sleep
+    # stands in for root.after, so this runs without a display
+    import threading
+
+    from frame_pacer import FramePacer
+    from frame_pipeline import DropOldestQueue
+
+    def run(pacer):
+        queue = DropOldestQueue(2)
+        stop = threading.Event()
+        rng = np.random.default_rng(0)
+
+        def produce():
+            next_frame = time.perf_counter()
+            while not stop.is_set():
+                next_frame += 1.0 / args.camera_fps
+                time.sleep(max(0.0, next_frame - time.perf_counter()))
+                captured_at = time.perf_counter()
+                time.sleep(max(0.0, rng.normal(args.inference_ms, args.inference_ms * 0.2)) / 1000)
+                queue.put((None, captured_at))
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        intervals, latencies = [], []
+        wakeups, last_shown = 0, None
+        cpu_start, end = time.process_time(), time.perf_counter() + args.seconds
+        while time.perf_counter() < end:
+            wakeups += 1
+            now = pacer.begin() if pacer else time.perf_counter()
+            item = queue.get_latest()
+            shown = item is not None and not (pacer and pacer.is_stale(item[1]))
+            if shown:
+                latencies.append(now - item[1])
+                if last_shown is not None:
+                    intervals.append(now - last_shown)
+                last_shown = now
+                if pacer:
+                    pacer.shown()
+            time.sleep((pacer.next_delay_ms(shown) if pacer else 10) / 1000)
+        cpu = time.process_time() - cpu_start
+        stop.set()
+        producer.join()
+
+        intervals = np.asarray(intervals) * 1000
+        return {
+            "wakeups_per_s": wakeups / args.seconds,
+            "display_fps": len(latencies) / args.seconds,
+            "frame_time_mean_ms": float(intervals.mean()),
+            "frame_time_jitter_ms": float(intervals.std()),
+            "frame_time_p95_ms": float(np.percentile(intervals, 95)),
+            "frame_age_mean_ms": float(np.mean(latencies) * 1000),
+            "cpu_s": cpu
+        }
+
+    results = {"fixed_10ms": run(None), "paced": run(FramePacer(args.display_fps))}
+    print(f"\n  {'loop':<14}{'wakeups/s':>11}{'fps':>8}{'jitter ms':>11}{'p95 ms':>9}{'age ms':>9}{'cpu s':>8}")
+    for name, r in results.items():
+        print(f"  {name:<14}{r['wakeups_per_s']:>11.1f}{r['display_fps']:>8.1f}{r['frame_time_jitter_ms']:>11.2f}"
+              f"{r['frame_time_p95_ms']:>9.2f}{r['frame_age_mean_ms']:>9.2f}{r['cpu_s']:>8.3f}")
+    return results
+
+
+# --- Coaching Server Load Test ---
+def synthetic_squat_landmarks(frames, fps, period_s=2.0):
+    # Standing figure whose knees bend between ~80 and ~170 degrees
+    from joint_angles import LANDMARK_INDEX
+    t = np.arange(frames) / fps
+    theta = np.radians(125 + 45 * np.cos(2 * np.pi * t / period_s))
+    points = np.zeros((frames, 33, 4), dtype=np.float32)
+    points[..., 0] = 0.5
+    points[..., 1] = np.linspace(0.1, 0.9, 33)
+    points[..., 3] = 0.95
+    for side in ("LEFT", "RIGHT"):
+        points[:, LANDMARK_INDEX[side + "_HIP"], :2] = (0.5, 0.4)
+        points[:, LANDMARK_INDEX[side + "_KNEE"], :2] = (0.5, 0.6)
+        points[:, LANDMARK_INDEX[side + "_ANKLE"], 0] = 0.5 + 0.2 * np.sin(theta)
+        points[:, LANDMARK_INDEX[side + "_ANKLE"], 1] = 0.6 - 0.2 * np.cos(theta)
+    return points
+
+
+def run_coach_server(ready):
+    # Server process for the load test; reports its port through `ready`
+    import asyncio
+
+    from coach_server import CoachServer
+
+    async def serve():
+        server = await CoachServer(port=0, max_sessions=100000).start()
+        ready.put(server.port)
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+def configure_server(parser):
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 50, 100, 200, 400])
+    parser.add_argument("--fps", type=float, default=30.0, help="Landmark frames per second per session")
+    parser.add_argument("--seconds", type=float, default=6.0)
+    parser.add_argument("--max-p95-ms", type=float, default=100.0, help="Event latency above this counts as not sustained")
+
+
+@benchmark("server", "Load test the coaching server with concurrent landmark-pushing sessions", configure_server)
+def bench_server(args):
+    import asyncio
+    import multiprocessing
+
+    from coach_server import OP_TEXT, CoachClient, encode_frame, http_request
+    from joint_angles import joint_angles
+    from rep_machine import count_reps
+
+    period_s = 2.0
+    cycle = synthetic_squat_landmarks(int(period_s * args.fps), args.fps, period_s).round(4)
+    encoded = [json.dumps(frame.tolist()) for frame in cycle]
+    # The frames the server should count a rep on, found by running the same
+    # rep logic over the exact landmarks an athlete sends
+    frames_max = int(args.seconds * args.fps) + 1
+    rep_frames = count_reps("squat", joint_angles(cycle[np.arange(frames_max) % len(cycle)]))
+    rep_frame_set = set(rep_frames.tolist())
+
+    async def athlete(port, session_id, stats):
+        client = await CoachClient.connect("127.0.0.1", port, session_id)
+        sent_at = {}
+
+        async def receive():
+            while True:
+                event = await client.receive()
+                if event is None:
+                    return
+                if event["type"] == "rep":
+                    stats["reps"] += 1
+                    if event.get("frame") in sent_at:
+                        stats["latencies"].append(time.perf_counter() - sent_at.pop(event["frame"]))
+
+        receiver = asyncio.create_task(receive())
+        start = time.perf_counter()
+        frame = 0
+        while time.perf_counter() - start < args.seconds:
+            # Only frames that trigger a rep get an event back to time
+            if frame in rep_frame_set:
+                sent_at[frame] = time.perf_counter()
+            message = f'{{"type":"landmarks","frame":{frame},"landmarks":{encoded[frame % len(encoded)]}}}'
+            client.writer.write(encode_frame(OP_TEXT, message.encode("utf-8"), mask=True))
+            await client.writer.drain()
+            stats["sent"] += 1
+            frame += 1
+            await asyncio.sleep(max(0.0, start + frame / args.fps - time.perf_counter()))
+        stats["reps_expected"] += int(np.searchsorted(rep_frames, frame))
+        await asyncio.sleep(0.5)
+        receiver.cancel()
+        await client.close()
+
+    async def load(port, count):
+        ids = []
+        for _ in range(count):
+            status, session = await http_request("127.0.0.1", port, "POST", "/sessions",
+                                                 {"exercise": "squat", "sets": 1, "reps": 100000})
+            ids.append(session["session"])
+        stats = {"sent": 0, "reps": 0, "reps_expected": 0, "latencies": []}
+        wall = time.perf_counter()
+        await asyncio.gather(*(athlete(port, session_id, stats) for session_id in ids))
+        wall = time.perf_counter() - wall
+        _, statuses = await http_request("127.0.0.1", port, "GET", "/sessions")
+        processed = sum(s["messages"] for s in statuses if s["session"] in ids)
+        for session_id in ids:
+            await http_request("127.0.0.1", port, "DELETE", f"/sessions/{session_id}")
+        latencies = np.asarray(stats["latencies"]) * 1000
+        return {
+            "sessions": count,
+            "offered_msgs_per_s": count * args.fps,
+            "processed_msgs_per_s": processed / wall,
+            "processed_fraction": processed / max(1, stats["sent"]),
+            "event_latency_p50_ms": float(np.percentile(latencies, 50)) if latencies.size else None,
+            "event_latency_p95_ms": float(np.percentile(latencies, 95)) if latencies.size else None,
+            "reps_received": stats["reps"],
+            "reps_expected": stats["reps_expected"]
+        }
+
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Queue()
+    server = ctx.Process(target=run_coach_server, args=(ready,), daemon=True)
+    server.start()
+    results = {}
+    try:
+        port = ready.get(timeout=30)
+        print(f"\n  {'sessions':>9}{'offered/s':>11}{'processed/s':>13}{'p50 ms':>9}{'p95 ms':>9}{'reps':>12}  sustained")
+        for count in args.sessions:
+            r = asyncio.run(load(port, count))
+            p95 = r["event_latency_p95_ms"]
+            r["sustained"] = r["processed_fraction"] >= 0.95 and p95 is not None and p95 <= args.max_p95_ms
+            results[str(count)] = r
+            print(f"  {count:>9}{r['offered_msgs_per_s']:>11.0f}{r['processed_msgs_per_s']:>13.0f}"
+                  f"{p95 and r['event_latency_p50_ms'] or 0:>9.1f}{p95 or 0:>9.1f}"
+                  f"{r['reps_received']:>6}/{r['reps_expected']:<5}  {'yes' if r['sustained'] else 'no'}")
+            if not r["sustained"]:
+                break
+    finally:
+        server.terminate()
+        server.join()
+    sustained = [int(n) for n, r in results.items() if r["sustained"]]
+    print(f"\n  Sustained up to {max(sustained) if sustained else 0} sessions at {args.fps:.0f} fps")
+    return results
+
+
+# --- ROI Cropping ---
+def configure_roi(parser):
+    parser.add_argument("video", help="A recorded workout with one athlete in view")
+    parser.add_argument("--exercise", default="squat", help="Exercise whose reps are counted in both runs")
+    parser.add_argument("--model-complexity", type=int, choices=[0, 1, 2], default=1)
+    parser.add_argument("--max-frames", type=int, default=None, help="Stop each pass after this many frames")
+    parser.add_argument("--no-mirror", action="store_true")
+
+
+def roi_frames(args):
+    # Decodes the video again for each pass, one frame at a time: high
+    # resolution clips are what ROI cropping is for, and held all at once
+    # they would need gigabytes
+    cap = cv.VideoCapture(args.video)
+    try:
+        for _ in itertools.count() if args.max_frames is None else range(args.max_frames):
+            ret, frame = cap.read()
+            if not ret:
+                return
+            frame = frame if args.no_mirror else cv.flip(frame, 1)
+            image = cv.cvtColor(frame, cv.COLOR_BGR2RGB)
+            image.flags.writeable = False
+            yield image
+    finally:
+        cap.release()
+
+
+@benchmark("roi", "Compare full-frame and ROI-cropped inference latency and rep counts on a video", configure_roi)
+def bench_roi(args):
+    from joint_angles import joint_angles, landmarks_to_array
+    from pose_session import PoseSession
+    from rep_machine import count_reps
+
+    cap = cv.VideoCapture(args.video)
+    fps = cap.get(cv.CAP_PROP_FPS) or 30.0
+    ret, first = cap.read()
+    cap.release()
+    if not ret:
+        raise SystemExit(f"Could not read frames from {args.video}")
+    height, width = first.shape[:2]
+
+    results = {}
+    for name, roi_cropping in (("full_frame", False), ("roi", True)):
+        frame_points = []
+        samples = []
+        with PoseSession(model_complexity=args.model_complexity, roi_cropping=roi_cropping) as pose_session:
+            pose_session.warm_up(width, height)
+            for image in roi_frames(args):
+                start = time.perf_counter_ns()
+                pose_results = pose_session.process(image)
+                samples.append(time.perf_counter_ns() - start)
+                points = np.full((33, 4), np.nan, dtype=np.float32)
+                if pose_results.pose_landmarks:
+                    landmarks_to_array(pose_results.pose_landmarks.landmark, points)
+                frame_points.append(points)
+            roi = pose_session.roi
+        points = np.stack(frame_points)
+        timestamps = np.arange(len(points)) / fps
+        results[name] = {
+            "pose.process": summarize(samples),
+            "reps": int(count_reps(args.exercise, joint_angles(points), timestamps).size),
+            "pose_frames": int(np.count_nonzero(~np.isnan(points[:, 0, 0])))
+        }
+        if roi is not None:
+            results[name]["roi_frames"] = roi.roi_frames
+            results[name]["tracking_lost"] = roi.lost
+
+    print_table(f"{args.video} {width}x{height}, {len(samples)} frames", {name: r["pose.process"] for name, r in results.items()})
+    for name, r in results.items():
+        print(f"  {name:<22}{r['reps']:>4} reps, pose found in {r['pose_frames']} frames")
+    if results["roi"]["reps"] != results["full_frame"]["reps"]:
+        print("  ROI cropping changed the rep count")
+    return results
+
+
+# --- Workout History ---
+def configure_history(parser):
+    parser.add_argument("--events", type=int, default=200000, help="Events for the sustained ingest run")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--samples", type=int, default=2000, help="Events timed one by one for the per-call cost")
+
+
+@benchmark("history", "Measure history recording cost per event, sustained ingest rate and query times", configure_history)
+def bench_history(args):
+    from workout_history import INSERT_EVENT, WorkoutHistory, open_database
+
+    exercises = ["squat", "pushup", "bicep_curl", "lunge"]
+    rng = np.random.default_rng(0)
+
+    def rep_event(i):
+        return {"type": "rep", "time": 1.7e9 + i * 2.0, "exercise": exercises[i // args.users % len(exercises)], "set": 1,
+                "rep": i % 12 + 1, "angle": float(rng.uniform(60, 170))}
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # What the frame loop pays per event: queued vs. a committed insert
+        history = WorkoutHistory(os.path.join(tmp, "queued.db")).start()
+        session = history.begin_session("user-0")
+        queued = []
+        for i in range(args.samples):
+            event = rep_event(i)
+            start = time.perf_counter_ns()
+            history.record(session, "user-0", event)
+            queued.append(time.perf_counter_ns() - start)
+        history.close()
+        results["record_queued"] = summarize(queued)
+
+        conn = open_database(os.path.join(tmp, "direct.db"))
+        direct = []
+        for i in range(args.samples):
+            event = rep_event(i)
+            start = time.perf_counter_ns()
+            with conn:
+                conn.execute(INSERT_EVENT, (session, "user-0", event["time"], "rep", event["exercise"], 1,
+                                            event["rep"], event["angle"], None, None))
+            direct.append(time.perf_counter_ns() - start)
+        conn.close()
+        results["insert_and_commit"] = summarize(direct)
+
+        # Sustained ingest: record as fast as possible, then wait for the
+        # writer. The queue is unbounded here so nothing is dropped.
+        history = WorkoutHistory(os.path.join(tmp, "ingest.db"), max_pending=args.events).start()
+        sessions = [history.begin_session(f"user-{u}") for u in range(args.users)]
+        events = [rep_event(i) for i in range(args.events)]
+        start = time.perf_counter()
+        for i, event in enumerate(events):
+            history.record(sessions[i % args.users], f"user-{i % args.users}", event)
+        queued_s = time.perf_counter() - start
+        history.flush()
+        total_s = time.perf_counter() - start
+        stats = history.stats()
+        results["ingest"] = {
+            "events": args.events,
+            "queue_s": queued_s,
+            "commit_s": total_s,
+            "events_per_s": args.events / total_s,
+            "batches": stats["history_batches"],
+            "dropped": stats["history_dropped"]
+        }
+
+        # Indexed queries over the ingested data
+        queries = {
+            "reps_by_user_exercise_range": lambda: history.reps("user-3", "squat", 1.7e9, 1.7e9 + args.events),
+            "reps_by_user_range": lambda: history.reps("user-3", None, 1.7e9, 1.7e9 + args.events / 2),
+            "exercise_summary": lambda: history.exercise_summary("user-3"),
+            "sessions_by_user": lambda: history.sessions("user-3")
+        }
+        for name, query in queries.items():
+            timer = StageTimer()
+            for _ in range(20):
+                timer.time(name, query)
+            results[name] = timer.summary()[name]
+        history.close()
+
+    print_table("Recording one event (what the frame loop pays)",
+                {name: results[name] for name in ("record_queued", "insert_and_commit")})
+    ingest = results["ingest"]
+    print(f"\n  Ingest: {ingest['events']} events in {ingest['commit_s']:.2f} s ({ingest['events_per_s']:,.0f} events/s), "
+          f"{ingest['batches']} transactions, {ingest['dropped']} dropped")
+    print_table(f"Queries over {args.events} events, {args.users} users", {name: results[name] for name in queries})
+    return results
+
+
+# --- Training Analytics ---
+def record_synthetic_history(history, sessions, users, years, rng):
+    # Sessions spread evenly over `years`, each a random program done with
+    # some missed reps and sets, through the same queue the app uses
+    from fitness_data import BODY_GOALS
+    programs = [(goal, program) for goal, data in BODY_GOALS.items() for program in data["programs"]]
+    start = time.time() - years * 365 * 86400
+    spacing = years * 365 * 86400 / sessions
+    for s in range(sessions):
+        user = f"user-{s % users}"
+        goal, program = programs[rng.integers(len(programs))]
+        now = start + s * spacing
+        session = history.begin_session(user, goal, program["name"], now)
+        for set_number in range(1, program["sets"] + 1):
+            for exercise in program["exercises"]:
+                history.record(session, user, {"type": "exercise", "time": now, "exercise": exercise, "set": set_number})
+                reps = int(rng.integers(program["reps"] // 2, program["reps"] + 3))
+                for rep in range(1, reps + 1):
+                    now += float(rng.uniform(1.5, 3.5))
+                    history.record(session, user, {"type": "rep", "time": now, "exercise": exercise, "set": set_number,
+                                                   "rep": rep, "angle": float(rng.uniform(60, 170))})
+                    if rep == program["reps"]:
+                        history.record(session, user, {"type": "set_complete", "time": now, "exercise": exercise,
+                                                       "set": set_number})
+                now += 60.0
+        history.end_session(session, completed=True, ended_at=now)
+
+
+def configure_analytics(parser):
+    parser.add_argument("--years", type=float, nargs="+", default=[1.0, 8.0], help="History lengths to compare")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--per-week", type=float, default=3.0, help="Workouts per user per week")
+
+
+@benchmark("analytics", "Compare rollup dashboards with raw history scans as the history grows", configure_analytics)
+def bench_analytics(args):
+    from workout_analytics import WorkoutAnalytics
+    from workout_history import WorkoutHistory
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for years in args.years:
+            # Same training density, longer history
+            count = int(years * 52 * args.per_week * args.users)
+            history = WorkoutHistory(os.path.join(tmp, f"history-{years:g}.db"), max_pending=10 ** 9)
+            analytics = WorkoutAnalytics(history)
+            # Time the incremental update the writer runs per finished session
+            apply_times = []
+
+            def timed_apply(conn, session_id):
+                start = time.perf_counter_ns()
+                analytics.apply_session(conn, session_id)
+                apply_times.append(time.perf_counter_ns() - start)
+
+            history.session_hooks[:] = [timed_apply]
+            history.start()
+            record_synthetic_history(history, count, args.users, years, np.random.default_rng(0))
+            history.flush()
+            events = history.stats()["history_events_written"]
+
+            user = "user-1"
+            incremental = analytics.dashboard(user, weeks=10 ** 4)
+            start = time.perf_counter()
+            analytics.rebuild()
+            rebuild_s = time.perf_counter() - start
+            consistent = analytics.dashboard(user, weeks=10 ** 4) == incremental
+
+            timer = StageTimer()
+            for _ in range(20):
+                timer.time("dashboard", analytics.dashboard, user)
+                # The same weekly volume straight from the events table
+                timer.time("raw_weekly_volume", history.query, """
+                    SELECT strftime('%Y-%W', time, 'unixepoch') AS week, exercise,
+                           SUM(type = 'rep') AS reps, SUM(type = 'set_complete') AS sets
+                    FROM events WHERE user = ? AND type IN ('rep', 'set_complete')
+                    GROUP BY week, exercise""", (user,))
+            results[f"years_{years:g}"] = {
+                "sessions": count,
+                "events": events,
+                "apply_session": summarize(apply_times),
+                "rebuild_s": rebuild_s,
+                "rollups_match_rebuild": consistent,
+                **timer.summary()
+            }
+            history.close()
+
+    for name, r in results.items():
+        print_table(f"{name}: {r['sessions']} sessions, {r['events']} events, rebuild {r['rebuild_s']:.2f} s, "
+                    f"incremental {'matches' if r['rollups_match_rebuild'] else 'DIFFERS FROM'} rebuild",
+                    {stage: r[stage] for stage in ("apply_session", "dashboard", "raw_weekly_volume")})
+    return results
+
+
+# --- App Startup ---
+# Run in a fresh interpreter per launch so import costs are measured. The
+# script drives the real FitnessApp: launch -> main menu -> goal selection,
+# `browse` seconds of "reading the cards", then straight to Start Workout,
+# and reports wall-clock marks as JSON on its last line.
+STARTUP_SCRIPT = """
+import json, sys, time
+launched, browse = float(sys.argv[1]), float(sys.argv[2])
+import prototype12
+imported = time.time()
+app = prototype12.FitnessApp()
+app.root.update()
+menu = time.time()
+heavy = [name for name in ("cv2", "mediapipe") if name in sys.modules]
+
+app.setup_goal_selection()
+warmup = app.warmup
+end = time.time() + browse
+while time.time() < end:
+    app.root.update()
+    time.sleep(0.005)
+goal = next(iter(prototype12.BODY_GOALS))
+app.select_goal(goal)
+app.select_program(prototype12.BODY_GOALS[goal]["programs"][0])
+clicked = time.time()
+app.start_workout()
+returned = time.time()
+while app.pipeline is None or app.pipeline.frames_displayed == 0:
+    if time.time() - clicked > 60:
+        sys.exit("no frame within 60 s")
+    app.root.update()
+    time.sleep(0.001)
+first_frame = time.time()
+app.finish_workout()
+app.root.destroy()
+print(json.dumps({
+    "import_s": imported - launched,
+    "time_to_menu_s": menu - launched,
+    "start_click_blocked_s": returned - clicked,
+    "time_to_first_frame_s": first_frame - clicked,
+    "heavy_modules_at_menu": heavy,
+    "warmup_marks_s": warmup.marks
+}))
+"""
+
+
+def configure_startup(parser):
+    parser.add_argument("--runs", type=int, default=3, help="Launches per scenario (median is reported)")
+    parser.add_argument("--browse", type=float, nargs="+", default=[0.0, 3.0],
+                        help="Seconds spent on goal/program selection before Start Workout")
+    parser.add_argument("--source", help="Camera index or video file (default: a synthetic clip)")
+
+
+@benchmark("startup", "Measure time-to-menu and time-to-first-processed-frame of the app", configure_startup)
+def bench_startup(args):
+    # Needs a display, like the app itself
+    import subprocess
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.source or make_synthetic_video(os.path.join(tmp, "startup.avi"), RESOLUTIONS["480p"], 90)
+        env = dict(os.environ, FITNESS_VIDEO_SOURCE=str(source), FITNESS_VIDEO_LOOP="1")
+        results = {}
+        for browse in args.browse:
+            runs = []
+            for _ in range(args.runs):
+                launched = time.time()
+                done = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, str(launched), str(browse)],
+                                      env=env, capture_output=True, text=True)
+                if done.returncode != 0:
+                    raise RuntimeError(f"startup run failed:\n{done.stderr[-2000:]}")
+                runs.append(json.loads(done.stdout.strip().splitlines()[-1]))
+            summary = {key: float(np.median([run[key] for run in runs])) for key in runs[0] if key.endswith("_s") and key != "warmup_marks_s"}
+            summary["warmup_marks_s"] = {step: float(np.median([run["warmup_marks_s"][step] for run in runs]))
+                                         for step in runs[-1]["warmup_marks_s"]}
+            summary["heavy_modules_at_menu"] = runs[-1]["heavy_modules_at_menu"]
+            results[f"browse_{browse:g}s"] = summary
+
+    print(f"\n  {'scenario':<14}{'import s':>10}{'menu s':>9}{'click s':>9}{'first frame s':>15}  loaded at menu")
+    for name, r in results.items():
+        print(f"  {name:<14}{r['import_s']:>10.3f}{r['time_to_menu_s']:>9.3f}{r['start_click_blocked_s']:>9.3f}"
+              f"{r['time_to_first_frame_s']:>15.3f}  {', '.join(r['heavy_modules_at_menu']) or 'none'}")
+    return results
+
+
+# --- Screen Transitions ---
+def configure_screens(parser):
+    parser.add_argument("--transitions", type=int, default=200, help="Exercise transitions to time per mode")
+    parser.add_argument("--workouts", type=int, default=50, help="Full navigation cycles for the leak check")
+
+
+@benchmark("screens", "Time exercise transitions and check widget/font counts across workouts", configure_screens)
+def bench_screens(args):
+    # Drives the real UI, so it needs a display; the camera is never opened
+    from fitness_data import BODY_GOALS
+    from prototype12 import FitnessApp
+
+    app = FitnessApp()
+    app.start_warmup = lambda: None
+    app.root.update()
+    goal = next(iter(BODY_GOALS))
+    program = BODY_GOALS[goal]["programs"][0]
+
+    def count_widgets():
+        count, pending = 0, [app.root]
+        while pending:
+            children = pending.pop().winfo_children()
+            count += len(children)
+            pending.extend(children)
+        return count
+
+    def transitions(rebuild):
+        # "rebuild" is what every exercise change used to cost: destroy the
+        # workout screen and build it again
+        app.start_program(program)
+        app.show_workout_ui()
+        app.root.update()
+        samples = []
+        for _ in range(args.transitions):
+            if not app.advance():
+                app.start_program(program)
+            start = time.perf_counter_ns()
+            if rebuild:
+                app.screens.discard("workout")
+                app.show_workout_ui()
+            else:
+                app.refresh_workout_ui()
+            app.root.update()
+            samples.append(time.perf_counter_ns() - start)
+        return summarize(samples)
+
+    results = {"transition_rebuild": transitions(True), "transition_in_place": transitions(False)}
+
+    # The whole flow, over and over; counts must not grow after the first lap
+    counts = []
+    builds = app.screens.builds
+    for _ in range(args.workouts):
+        app.setup_main_menu()
+        app.setup_calorie_tracker()
+        app.setup_goal_selection()
+        app.select_goal(goal)
+        app.select_program(program)
+        app.workout_in_progress = True
+        app.start_program(program)
+        app.show_workout_ui()
+        while app.workout_in_progress:
+            app.next_exercise()
+            app.root.update()
+        app.root.update()
+        counts.append((count_widgets(), len(app.root.tk.call("font", "names"))))
+    results["widgets"] = {"first_workout": counts[0][0], "last_workout": counts[-1][0]}
+    results["fonts"] = {"first_workout": counts[0][1], "last_workout": counts[-1][1]}
+    results["screens_built"] = app.screens.builds - builds
+    app.root.destroy()
+
+    print_table("Exercise transition (update + redraw)",
+                {name: results[name] for name in ("transition_rebuild", "transition_in_place")})
+    print(f"\n  After {args.workouts} workouts: widgets {counts[0][0]} -> {counts[-1][0]}, "
+          f"named fonts {counts[0][1]} -> {counts[-1][1]}, {results['screens_built']} screens built")
+    return results
+
+
+# --- Program Catalog ---
+def make_synthetic_catalog(path, programs, goals=20, seed=0):
+    # A valid catalog with `programs` programs spread over `goals` goals
+    from fitness_data import EXERCISES
+    from program_catalog import DIFFICULTIES
+
+    rng = np.random.default_rng(seed)
+    exercises = list(EXERCISES)
+    catalog = {f"goal_{g}": {"name": f"Goal {g}", "description": f"Synthetic goal {g}.",
+                             "calorie_adjustment": int(rng.integers(-5, 6)) * 100, "programs": []}
+               for g in range(goals)}
+    for i in range(programs):
+        difficulty = DIFFICULTIES[i % len(DIFFICULTIES)]
+        picked = rng.choice(exercises, int(rng.integers(1, 4)), replace=False).tolist()
+        catalog[f"goal_{i % goals}"]["programs"].append({
+            "name": f"{difficulty.title()} Program {i}", "difficulty": difficulty, "exercises": picked,
+            "sets": int(rng.integers(2, 6)), "reps": int(rng.integers(6, 25))})
+    with open(path, "w") as f:
+        json.dump({"goals": catalog}, f)
+
+
+def configure_catalog(parser):
+    parser.add_argument("--programs", type=int, nargs="+", default=[1000, 10000], help="Catalog sizes to load")
+    parser.add_argument("--loads", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=15.0, help="Largest acceptable p95 load time per 1000 programs")
+
+
+@benchmark("catalog", "Time program catalog loads and compare indexed lookups with linear scans", configure_catalog)
+def bench_catalog(args):
+    from fitness_data import EXERCISES
+    from program_catalog import ProgramCatalog
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.programs:
+            path = os.path.join(tmp, f"catalog-{size}.json")
+            make_synthetic_catalog(path, size)
+            # Parse + validate + index, as at startup and on every hot reload
+            timer = StageTimer()
+            catalog = timer.time("load", ProgramCatalog, path, EXERCISES)
+            for _ in range(args.loads - 1):
+                timer.time("load", catalog.reload)
+            programs = [program for goal in catalog.goals.values() for program in goal["programs"]]
+            rng = np.random.default_rng(1)
+            for _ in range(200):
+                program = programs[rng.integers(len(programs))]
+                timer.time("find_program", catalog.find_program, program["goal"], program["name"])
+                # What the lookups used to be: a scan of the goal's programs
+                timer.time("find_scan", next, (p for p in catalog.goals[program["goal"]]["programs"]
+                                                       if p["name"] == program["name"]), None)
+                timer.time("by_exercise", catalog.programs_with_exercise, "squat")
+                timer.time("by_exercise_scan", lambda: [p for p in programs if "squat" in p["exercises"]])
+                # The hot reload poll when nothing has changed
+                timer.time("reload_check", catalog.check)
+            stats = timer.summary()
+            budget = args.budget_ms * max(size, 1000) / 1000
+            results[f"programs_{size}"] = dict(stats, budget_ms=budget, within_budget=stats["load"]["p95_ms"] <= budget)
+
+    for name, r in results.items():
+        verdict = "within" if r["within_budget"] else "OVER"
+        print_table(f"{name}: load p95 {r['load']['p95_ms']:.1f} ms, {verdict} its {r['budget_ms']:g} ms budget",
+                    {stage: stats for stage, stats in r.items() if isinstance(stats, dict)})
+    return results
+
+
+# --- Cohort Calorie Planner ---
+def configure_calories(parser):
+    parser.add_argument("--rows", type=int, default=1000000, help="People in the synthetic cohort")
+    parser.add_argument("--scalar-rows", type=int, default=100000, help="Rows run through the one-person path")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    parser.add_argument("--repeats", type=int, default=5)
+
+
+@benchmark("calories", "Compare per-person and batch calorie planning and time CSV streaming in rows/s", configure_calories)
+def bench_calories(args):
+    import csv
+    import tracemalloc
+
+    from calorie_planner import ACTIVITY_MULTIPLIERS, INPUT_COLUMNS, calorie_plan, calorie_plan_batch, plan_file
+    from fitness_data import BODY_GOALS
+
+    rng = np.random.default_rng(0)
+    cohort = [
+        rng.integers(16, 80, args.rows),
+        rng.uniform(140, 210, args.rows).round(1),
+        rng.uniform(40, 150, args.rows).round(1),
+        rng.choice(["Male", "Female"], args.rows),
+        rng.choice(list(ACTIVITY_MULTIPLIERS), args.rows),
+        rng.choice([goal["name"] for goal in BODY_GOALS.values()], args.rows)
+    ]
+
+    def rates(samples_ns, rows):
+        stats = summarize(samples_ns)
+        stats["rows_per_s"] = rows / (stats["p50_ms"] / 1000)
+        return stats
+
+    results = {}
+    scalar_rows = list(zip(*(column[:args.scalar_rows].tolist() for column in cohort)))
+    samples = []
+    for _ in range(args.repeats):
+        start = time.perf_counter_ns()
+        scalar = [calorie_plan(*row) for row in scalar_rows]
+        samples.append(time.perf_counter_ns() - start)
+    results["per_person"] = rates(samples, len(scalar_rows))
+
+    samples = []
+    for _ in range(args.repeats):
+        start = time.perf_counter_ns()
+        maintenance, goal_calories, valid = calorie_plan_batch(*cohort)
+        samples.append(time.perf_counter_ns() - start)
+    results["batch"] = rates(samples, args.rows)
+
+    # The batch path must give exactly what the app shows for each person
+    mismatches = sum(1 for i, plan in enumerate(scalar)
+                     if (plan["maintenance_calories"], plan["goal_calories"]) != (maintenance[i], goal_calories[i]))
+    results["mismatches"] = mismatches
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path, output_path = os.path.join(tmp, "cohort.csv"), os.path.join(tmp, "planned.csv")
+        with open(input_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(INPUT_COLUMNS)
+            writer.writerows(zip(*(column.tolist() for column in cohort)))
+        samples = []
+        for _ in range(args.repeats):
+            start = time.perf_counter_ns()
+            plan_file(input_path, output_path, args.chunk_size)
+            samples.append(time.perf_counter_ns() - start)
+        results["csv_stream"] = rates(samples, args.rows)
+
+        # Peak Python allocations stay near one chunk's worth whatever the file size
+        tracemalloc.start()
+        plan_file(input_path, output_path, args.chunk_size)
+        results["csv_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    print_table("Calorie planning (one call = whole cohort)", {name: results[name] for name in ("per_person", "batch", "csv_stream")})
+    print()
+    for name in ("per_person", "batch", "csv_stream"):
+        print(f"  {name:<22}{results[name]['rows_per_s']:>14,.0f} rows/s")
+    print(f"\n  {mismatches} mismatches between per-person and batch results over {len(scalar_rows)} rows")
+    print(f"  CSV streaming peak traced memory: {results['csv_peak_mb']:.1f} MB (chunk size {args.chunk_size})")
+    return results
+
+
+# --- Goal and Program Lists ---
+def configure_lists(parser):
+    parser.add_argument("--entries", type=int, nargs="+", default=[1000, 10000], help="List sizes to test")
+    parser.add_argument("--opens", type=int, default=5, help="Screen opens timed per size")
+    parser.add_argument("--scroll-steps", type=int, default=300, help="Wheel steps timed per size")
+    parser.add_argument("--eager-limit", type=int, default=1000, help="Largest list also built with one card per entry")
+
+
+@benchmark("lists", "Time opening, scrolling and filtering the goal and program lists at 1k and 10k entries", configure_lists)
+def bench_lists(args):
+    # Drives the real UI, so it needs a display; the camera is never opened
+    import customtkinter as ctk
+
+    from fitness_data import CATALOG
+    from prototype12 import FitnessApp
+
+    app = FitnessApp()
+    app.start_warmup = lambda: None
+    app.root.update()
+    frame_budget_ms = 1000 / 60
+    rng = np.random.default_rng(0)
+
+    def step(view, *args):
+        view.yview(*args)
+        app.root.update()
+
+    def type_query(view, text):
+        view.filter(text)
+        app.root.update()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.entries:
+            # `size` goals for the goal screen, one goal with `size` programs for the program screen
+            for screen, goals in (("goals", size), ("programs", 1)):
+                path = os.path.join(tmp, f"{screen}-{size}.json")
+                make_synthetic_catalog(path, size, goals=goals)
+                CATALOG.path = path
+                CATALOG.reload()
+                open_screen = app.setup_goal_selection if screen == "goals" else lambda: app.select_goal("goal_0")
+
+                timer = StageTimer()
+                for _ in range(args.opens):
+                    # A fresh screen each time: build, fill from the catalog, draw
+                    app.setup_main_menu()
+                    app.screens.discard(screen)
+                    timer.time("open", lambda: (open_screen(), app.root.update()))
+                view = app.goal_list if screen == "goals" else app.program_list
+                for _ in range(args.scroll_steps):
+                    timer.time("scroll_step", step, view, "scroll", 1, "units")
+                # Jumps, as when dragging the scrollbar
+                for fraction in rng.uniform(0, 1, 50):
+                    timer.time("scroll_jump", step, view, "moveto", fraction)
+                query = "advanced program 1"
+                for length in range(1, len(query) + 1):
+                    timer.time("filter_keystroke", type_query, view, query[:length])
+                type_query(view, "")
+
+                stats = timer.summary()
+                janky = sum(1 for sample in timer.samples["scroll_step"] if sample / 1e6 > frame_budget_ms)
+                results[f"{screen}_{size}"] = dict(stats, cards=view.stats()["cards"], janky_scroll_steps=janky)
+
+            if size <= args.eager_limit:
+                # The old program screen: one full card per entry in a CTkScrollableFrame
+                app.setup_main_menu()
+                start = time.perf_counter_ns()
+                frame = ctk.CTkScrollableFrame(app.main_container, fg_color="transparent")
+                frame.grid(row=0, column=0, sticky="nsew")
+                for i, program in enumerate(CATALOG.programs_for_goal("goal_0")):
+                    card = app.make_program_card(frame)
+                    app.fill_program_card(card, program)
+                    card.grid(row=i, column=0, padx=10, pady=10, sticky="ew")
+                app.root.update()
+                results[f"programs_{size}"]["eager_open"] = summarize([time.perf_counter_ns() - start])
+                frame.destroy()
+    app.root.destroy()
+
+    for name, r in results.items():
+        print_table(f"{name}: {r['cards']} cards, {r['janky_scroll_steps']}/{args.scroll_steps} scroll steps over "
+                    f"{frame_budget_ms:.1f} ms", {stage: stats for stage, stats in r.items() if isinstance(stats, dict)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Performance benchmarks for the fitness coach.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    for name, (run, configure, help_text) in BENCHMARKS.items():
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--output", help="Write results as JSON")
+        sub.add_argument("--save-baseline", metavar="FILE", help="Save results as the baseline for later runs")
+        sub.add_argument("--compare", metavar="FILE", help="Flag regressions against a saved baseline")
+        sub.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%)")
+        if configure:
+            configure(sub)
+    args = parser.parse_args()
+
+    run = BENCHMARKS[args.benchmark][0]
+    results = {"benchmark": args.benchmark, "created": time.time(), "results": run(args)}
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results["results"], baseline["results"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
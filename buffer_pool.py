@@ -0,0 +1,56 @@
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+
+# --- Frame Buffer Pool ---
+# Reusable arrays keyed by (shape, dtype), handed to OpenCV as `dst=` so the
+# frame loop stops allocating a new image per call. A buffer has exactly one
+# owner at a time: whoever acquired it (or received it through a queue)
+# releases it once nothing reads it any more. Buffers that are never
+# released are simply garbage collected, so a missed release costs an
+# allocation, never a corrupted frame.
+class BufferPool:
+    def __init__(self, max_per_key=8):
+        self.max_per_key = max_per_key
+        self.free = defaultdict(list)
+        self.lock = threading.Lock()
+        self.allocated = 0
+        self.reused = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self.lock:
+            bucket = self.free.get(key)
+            if bucket:
+                self.reused += 1
+                return bucket.pop()
+            self.allocated += 1
+        return np.empty(shape, dtype=dtype)
+
+    def acquire_like(self, array):
+        return self.acquire(array.shape, array.dtype)
+
+    def release(self, buffer):
+        # Views and read-only arrays never go back into the pool
+        if buffer is None or buffer.base is not None or not buffer.flags.writeable:
+            return
+        key = (buffer.shape, buffer.dtype.str)
+        with self.lock:
+            bucket = self.free[key]
+            if len(bucket) < self.max_per_key and not any(b is buffer for b in bucket):
+                bucket.append(buffer)
+
+    def stats(self):
+        with self.lock:
+            pooled = sum(len(bucket) for bucket in self.free.values())
+        return {"buffers_allocated": self.allocated, "buffers_reused": self.reused, "buffers_pooled": pooled}
+
+
+def read_only(buffer):
+    # A non-writeable view for inference; the pooled buffer itself stays
+    # writeable, so it can be reused as a dst without toggling flags
+    view = buffer.view()
+    view.flags.writeable = False
+    return view
@@ -0,0 +1,219 @@
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+from fitness_data import CATALOG
+
+# Harris-Benedict coefficients: constant, per kg, per cm, per year of age
+BMR_COEFFICIENTS = {
+    "Male": (88.362, 13.397, 4.799, 5.677),
+    "Female": (447.593, 9.247, 3.098, 4.330)
+}
+
+ACTIVITY_MULTIPLIERS = {
+    "Sedentary": 1.2,
+    "Lightly active": 1.375,
+    "Moderately active": 1.55,
+    "Very active": 1.725,
+    "Extra active": 1.9
+}
+
+# Case-insensitive lookups built once; goals are looked up in the catalog
+ACTIVITY_INDEX = {name.lower(): multiplier for name, multiplier in ACTIVITY_MULTIPLIERS.items()}
+GENDER_INDEX = {"male": "Male", "m": "Male", "female": "Female", "f": "Female"}
+
+INPUT_COLUMNS = ["age", "height_cm", "weight_kg", "gender", "activity_level", "goal"]
+OUTPUT_COLUMNS = ["maintenance_calories", "goal_calories"]
+
+
+def resolve_goal(goal):
+    # Goal key or display name -> key
+    goal_key = CATALOG.goal_key(goal) if isinstance(goal, str) else None
+    if goal_key is None:
+        raise ValueError(f"Unknown goal {goal!r}")
+    return goal_key
+
+
+def resolve_gender(gender):
+    try:
+        return GENDER_INDEX[gender.strip().lower()]
+    except (KeyError, AttributeError):
+        raise ValueError(f"Unknown gender {gender!r}") from None
+
+
+def activity_multiplier(activity_level):
+    try:
+        return ACTIVITY_INDEX[activity_level.strip().lower()]
+    except (KeyError, AttributeError):
+        raise ValueError(f"Unknown activity level {activity_level!r}") from None
+
+
+# --- Single Person ---
+def bmr(age, height, weight, gender):
+    constant, per_kg, per_cm, per_year = BMR_COEFFICIENTS[resolve_gender(gender)]
+    return constant + (per_kg * weight) + (per_cm * height) - (per_year * age)
+
+
+def maintenance_calories(age, height, weight, gender, activity_level):
+    return int(bmr(age, height, weight, gender) * activity_multiplier(activity_level))
+
+
+def calorie_plan(age, height, weight, gender, activity_level, goal):
+    # height in cm, weight in kg; raises ValueError on anything it can't use
+    goal_key = resolve_goal(goal)
+    maintenance = maintenance_calories(age, height, weight, gender, activity_level)
+    adjustment = CATALOG.goal(goal_key)["calorie_adjustment"]
+    return {
+        "goal": goal_key,
+        "maintenance_calories": maintenance,
+        "goal_calories": maintenance + adjustment,
+        "adjustment": adjustment
+    }
+
+
+# --- Batch ---
+def lookup(values, resolve, labels):
+    # -> (resolved value per code, code per row); unknown values resolve to
+    # None. The usual spellings (`labels`) are matched with one vectorized
+    # comparison each, so only odd ones (other case, spaces) need np.unique.
+    values = np.asarray(values, dtype=str)
+    codes = np.full(values.shape, -1, dtype=np.intp)
+    mapped = []
+    for label in labels:
+        matches = values == label
+        if matches.any():
+            codes[matches] = len(mapped)
+            mapped.append(resolve(label))
+    rest = codes < 0
+    if rest.any():
+        distinct, inverse = np.unique(values[rest], return_inverse=True)
+        codes[rest] = inverse + len(mapped)
+        for value in distinct:
+            try:
+                mapped.append(resolve(value))
+            except ValueError:
+                mapped.append(None)
+    return mapped, codes
+
+
+def calorie_plan_batch(age, height, weight, gender, activity_level, goal):
+    # Column arrays in, (maintenance, goal calories, valid mask) out. Same
+    # arithmetic in the same order as calorie_plan, so results are identical;
+    # rows with a missing number or an unknown category are invalid (0 out).
+    age = np.asarray(age, dtype=np.float64)
+    height = np.asarray(height, dtype=np.float64)
+    weight = np.asarray(weight, dtype=np.float64)
+    valid = np.isfinite(age) & np.isfinite(height) & np.isfinite(weight)
+
+    genders, gender_rows = lookup(gender, resolve_gender, BMR_COEFFICIENTS)
+    coefficients = np.array([BMR_COEFFICIENTS[g] if g else (np.nan,) * 4 for g in genders])[gender_rows]
+    constant, per_kg, per_cm, per_year = coefficients.T
+    multipliers, activity_rows = lookup(activity_level, activity_multiplier, ACTIVITY_MULTIPLIERS)
+    multiplier = np.array([np.nan if m is None else m for m in multipliers])[activity_rows]
+    goals, goal_rows = lookup(goal, resolve_goal, CATALOG.goal_labels())
+    adjustment = np.array([0 if g is None else CATALOG.goal(g)["calorie_adjustment"] for g in goals], dtype=np.int64)[goal_rows]
+    valid &= np.isfinite(constant) & np.isfinite(multiplier) & np.array([g is not None for g in goals])[goal_rows]
+
+    with np.errstate(invalid="ignore"):
+        daily = (constant + (per_kg * weight) + (per_cm * height) - (per_year * age)) * multiplier
+    # int() truncates toward zero
+    maintenance = np.where(valid, np.trunc(daily), 0).astype(np.int64)
+    return maintenance, np.where(valid, maintenance + adjustment, 0), valid
+
+
+def parse_numbers(values):
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except ValueError:
+        # A bad cell somewhere in the chunk: parse row by row, NaN for the bad ones
+        numbers = np.empty(len(values))
+        for i, value in enumerate(values):
+            try:
+                numbers[i] = float(value)
+            except ValueError:
+                numbers[i] = np.nan
+        return numbers
+
+
+# --- Streaming Files ---
+def read_csv_chunks(path, chunk_size):
+    # -> (header, chunk of rows as lists) one chunk at a time
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        while True:
+            rows = list(itertools.islice(reader, chunk_size))
+            if not rows:
+                return
+            yield header, rows
+
+
+def read_parquet_chunks(path, chunk_size):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Reading Parquet needs pyarrow (pip install pyarrow)")
+    parquet = pq.ParquetFile(path)
+    header = parquet.schema_arrow.names
+    for batch in parquet.iter_batches(batch_size=chunk_size):
+        columns = [batch.column(i).to_pylist() for i in range(batch.num_columns)]
+        yield header, [list(row) for row in zip(*columns)]
+
+
+def plan_file(input_path, output_path, chunk_size=50000, columns=None):
+    # Streams input -> output (CSV) with at most one chunk in memory.
+    # columns maps INPUT_COLUMNS names to the file's own header names.
+    columns = {name: (columns or {}).get(name, name) for name in INPUT_COLUMNS}
+    chunks = read_parquet_chunks if input_path.endswith(".parquet") else read_csv_chunks
+    rows_total = invalid_total = 0
+    with open(output_path, "w", newline="") as out:
+        writer = csv.writer(out)
+        for i, (header, rows) in enumerate(chunks(input_path, chunk_size)):
+            if i == 0:
+                missing = [column for column in columns.values() if column not in header]
+                if missing:
+                    raise SystemExit(f"{input_path} has no column(s) {', '.join(missing)}")
+                index = {name: header.index(column) for name, column in columns.items()}
+                writer.writerow(list(header) + OUTPUT_COLUMNS)
+            file_columns = list(zip(*rows))
+            cells = {name: file_columns[position] for name, position in index.items()}
+            maintenance, goal_calories, valid = calorie_plan_batch(
+                parse_numbers(cells["age"]), parse_numbers(cells["height_cm"]), parse_numbers(cells["weight_kg"]),
+                cells["gender"], cells["activity_level"], cells["goal"])
+            for row, m, g, ok in zip(rows, maintenance.tolist(), goal_calories.tolist(), valid.tolist()):
+                row.extend((m, g) if ok else ("", ""))
+            writer.writerows(rows)
+            rows_total += len(rows)
+            invalid_total += len(rows) - int(valid.sum())
+    return rows_total, invalid_total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintenance and goal calories for every row of a CSV or Parquet file.")
+    parser.add_argument("input", help=f"CSV or .parquet with columns {', '.join(INPUT_COLUMNS)}")
+    parser.add_argument("-o", "--output", help="Output CSV (default: <input>_calories.csv)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Rows held in memory at once")
+    parser.add_argument("--column", dest="columns", action="append", default=[], metavar="NAME=HEADER",
+                        help="Read NAME from a differently named column, e.g. weight_kg=weight")
+    args = parser.parse_args()
+
+    columns = dict(column.split("=", 1) for column in args.columns)
+    unknown = set(columns) - set(INPUT_COLUMNS)
+    if unknown:
+        parser.error(f"unknown column name(s): {', '.join(sorted(unknown))}")
+    output = args.output or os.path.splitext(args.input)[0] + "_calories.csv"
+
+    start = time.perf_counter()
+    rows, invalid = plan_file(args.input, output, args.chunk_size, columns)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {output}: {rows} rows in {elapsed:.2f} s ({rows / max(elapsed, 1e-9):,.0f} rows/s), "
+          f"{invalid} invalid", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
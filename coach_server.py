@@ -0,0 +1,550 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import itertools
+import json
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2 as cv
+import numpy as np
+
+from fitness_data import CATALOG, EXERCISES
+from joint_angles import NUM_LANDMARKS, landmarks_to_array
+from video_source import VideoSource
+from warmup import LazyModule
+from workout_engine import WorkoutEngine
+
+# Loaded on the first server-side inference; sessions fed landmarks never need MediaPipe
+pose_module = LazyModule("pose_session")
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_MESSAGE_BYTES = 8 * 1024 * 1024
+OP_CONTINUATION, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+HTTP_STATUS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               409: "Conflict", 503: "Service Unavailable"}
+
+
+# --- WebSocket Framing (RFC 6455) ---
+# Just enough of the protocol for this service and its load test: text and
+# binary messages, fragmentation, ping/pong and close. Clients mask what
+# they send, servers don't.
+def unmask(payload, mask):
+    # XOR as one big integer: far quicker than NumPy for message-sized payloads
+    length = len(payload)
+    key = (mask * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, "little") ^ int.from_bytes(key, "little")).to_bytes(length, "little")
+
+
+def encode_frame(opcode, payload, mask=False):
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 65536:
+        header.append(mask_bit | 126)
+        header += struct.pack(">H", length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack(">Q", length)
+    if mask:
+        key = os.urandom(4)
+        return bytes(header) + key + unmask(payload, key)
+    return bytes(header) + payload
+
+
+async def read_message(reader, writer=None):
+    # -> (opcode, payload) of the next complete message; answers pings
+    message, message_opcode = b"", None
+    while True:
+        first, second = await reader.readexactly(2)
+        opcode, length = first & 0x0F, second & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", await reader.readexactly(8))[0]
+        if len(message) + length > MAX_MESSAGE_BYTES:
+            raise ValueError("WebSocket message too large")
+        key = await reader.readexactly(4) if second & 0x80 else None
+        payload = await reader.readexactly(length)
+        if key is not None:
+            payload = unmask(payload, key)
+
+        if opcode == OP_PING:
+            if writer is not None:
+                writer.write(encode_frame(OP_PONG, payload))
+            continue
+        if opcode == OP_PONG:
+            continue
+        if opcode == OP_CLOSE:
+            return OP_CLOSE, payload
+        if opcode != OP_CONTINUATION:
+            message_opcode = opcode
+        message += payload
+        if first & 0x80:
+            return message_opcode, message
+
+
+def accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode("ascii")).digest()).decode("ascii")
+
+
+# --- HTTP ---
+async def read_request(reader):
+    # -> (method, path, headers, body), or None when the client went away.
+    # body is None when Content-Length isn't a valid length: the rest of the
+    # stream can't be framed, so the caller answers and hangs up
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+        return None
+    lines = head.decode("latin-1").split("\r\n")
+    method, path, _ = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    length = headers.get("content-length", "0")
+    if not length.isdecimal():
+        return method, path, headers, None
+    body = await reader.readexactly(int(length)) if int(length) else b""
+    return method, path, headers, body
+
+
+def json_response(writer, status, payload):
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(f"HTTP/1.1 {status} {HTTP_STATUS[status]}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n".encode("latin-1") + body)
+
+
+JSON_TYPE_NAMES = {str: "a string", int: "an integer", bool: "true or false"}
+
+
+def spec_field(spec, field, kinds, default=None):
+    # A field of a request body, checked against the JSON types it may have
+    value = spec.get(field, default)
+    if value is not None and type(value) not in kinds:
+        raise ValueError(f"{field!r} must be {' or '.join(JSON_TYPE_NAMES[kind] for kind in kinds)}, got {value!r}")
+    return value
+
+
+def positive_int(spec, field, default):
+    value = spec_field(spec, field, (int,), default)
+    if value is None or value < 1:
+        raise ValueError(f"{field!r} must be a positive integer, got {value!r}")
+    return value
+
+
+def build_program(spec):
+    # {"exercise": "squat", "sets": 2, "reps": 10} or {"goal": "...", "program": "..."}
+    if "exercise" in spec:
+        exercise = spec_field(spec, "exercise", (str,))
+        if exercise not in EXERCISES:
+            raise ValueError(f"Unknown exercise {exercise!r}")
+        return {"name": EXERCISES[exercise]["name"], "exercises": [exercise],
+                "sets": positive_int(spec, "sets", 1), "reps": positive_int(spec, "reps", 10)}
+    goal_key = spec_field(spec, "goal", (str,), "weight_loss")
+    if CATALOG.goal(goal_key) is None:
+        raise ValueError(f"Unknown goal {goal_key!r}")
+    name = spec_field(spec, "program", (str,))
+    program = CATALOG.programs_for_goal(goal_key)[0] if name is None else CATALOG.find_program(goal_key, name)
+    if program is None:
+        raise ValueError(f"No program named {name!r}")
+    return program
+
+
+# --- Coaching Session ---
+# One athlete: a WorkoutEngine, the WebSocket clients watching it, and where
+# its landmarks come from. Clients may push landmarks (pose estimated on the
+# device), push encoded images (pose estimated here), or the session may
+# pull from a server-side camera/video source. The engine is only touched
+# on the event loop thread; pose inference runs in the server's executor.
+class CoachSession:
+    def __init__(self, server, session_id, program, auto_advance=True, source=None):
+        self.server = server
+        self.session_id = session_id
+        self.engine = WorkoutEngine(program, auto_advance=auto_advance)
+        self.subscribers = set()
+        self.source = source
+        self.pose_session = None
+        self.pose_lock = threading.Lock()
+        self.source_thread = None
+        self.stop_event = threading.Event()
+        self.created = time.time()
+        self.messages = 0
+
+    def handle_landmarks(self, points, frame=None):
+        events = self.engine.handle_landmarks(points)
+        for event in events:
+            event["session"] = self.session_id
+            if frame is not None:
+                event["frame"] = frame
+            self.publish(event)
+        return events
+
+    def publish(self, event):
+        for queue in list(self.subscribers):
+            if queue.full():
+                # A slow viewer loses its oldest events rather than stalling the session
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def infer(self, image_bytes, mirror):
+        # Executor thread: decode an encoded image and run pose on it
+        frame = cv.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError("Could not decode image")
+        if mirror:
+            frame = cv.flip(frame, 1)
+        image = cv.cvtColor(frame, cv.COLOR_BGR2RGB)
+        image.flags.writeable = False
+        with self.pose_lock:
+            if self.pose_session is None:
+                self.pose_session = pose_module.PoseSession(**self.server.pose_config).warm_up()
+            results = self.pose_session.process(image)
+        return landmarks_to_array(results.pose_landmarks.landmark) if results.pose_landmarks else None
+
+    def start_source(self, loop):
+        self.source_thread = threading.Thread(target=self.run_source, args=(loop,), name=f"source-{self.session_id}", daemon=True)
+        self.source_thread.start()
+
+    def run_source(self, loop):
+        # Server-side capture: read, infer, and hand landmarks to the loop
+        cap = VideoSource(self.source).open()
+        if cap is None:
+            loop.call_soon_threadsafe(self.publish, {"type": "error", "session": self.session_id,
+                                                     "error": f"Could not open {self.source}"})
+            return
+        with pose_module.PoseSession(**self.server.pose_config).warm_up() as pose_session:
+            while not self.stop_event.is_set() and not self.engine.finished:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if self.server.mirror:
+                    frame = cv.flip(frame, 1)
+                image = cv.cvtColor(frame, cv.COLOR_BGR2RGB)
+                image.flags.writeable = False
+                results = pose_session.process(image)
+                points = landmarks_to_array(results.pose_landmarks.landmark) if results.pose_landmarks else None
+                loop.call_soon_threadsafe(self.handle_landmarks, points)
+        cap.release()
+        loop.call_soon_threadsafe(self.publish, {"type": "source_done", "session": self.session_id})
+
+    def close(self):
+        # Viewers are sent a close frame rather than left waiting for events
+        for queue in list(self.subscribers):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
+        self.stop_event.set()
+        if self.source_thread is not None:
+            self.source_thread.join(2.0)
+        if self.pose_session is not None:
+            self.pose_session.close()
+
+    def status(self):
+        return dict(self.engine.status(), session=self.session_id, source=self.source,
+                    viewers=len(self.subscribers), messages=self.messages)
+
+
+# --- Coaching Server ---
+# REST for session management, one WebSocket per viewer/producer:
+#   GET    /health
+#   GET    /sessions                list sessions
+#   POST   /sessions                {"exercise"|"goal"/"program", "sets", "reps",
+#                                    "auto_advance", "source"} -> session
+#   GET    /sessions/<id>           status, or a WebSocket when upgraded
+#   POST   /sessions/<id>/next      move to the next exercise
+#   DELETE /sessions/<id>
+# WebSocket messages from the client:
+#   text   {"type": "landmarks", "landmarks": [[x, y, z, visibility] * 33] | null, "frame": n}
+#   text   {"type": "next"} / {"type": "status"}
+#   binary an encoded image (JPEG/PNG); pose runs on the server
+# and the server sends every engine event as a JSON text message.
+class CoachServer:
+    def __init__(self, host="127.0.0.1", port=8765, pose_config=None, mirror=True, max_sessions=1000,
+                 inference_workers=None):
+        self.host = host
+        self.port = port
+        self.pose_config = pose_config or {"min_detection_confidence": 0.8, "min_tracking_confidence": 0.65, "model_complexity": 1}
+        self.mirror = mirror
+        self.max_sessions = max_sessions
+        self.executor = ThreadPoolExecutor(inference_workers or os.cpu_count() or 1, thread_name_prefix="pose")
+        self.sessions = {}
+        self.ids = itertools.count(1)
+        self.server = None
+        self.connections = set()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port, limit=MAX_MESSAGE_BYTES)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            # Let open connections finish on their own instead of being cancelled
+            for task in list(self.connections):
+                task.writer.close()
+            await asyncio.gather(*self.connections, return_exceptions=True)
+            await self.server.wait_closed()
+        for session in list(self.sessions.values()):
+            session.close()
+        self.sessions.clear()
+        self.executor.shutdown(wait=False)
+
+    def create_session(self, spec):
+        if type(spec) is not dict:
+            raise ValueError("The request body must be a JSON object")
+        if len(self.sessions) >= self.max_sessions:
+            raise OverflowError("Session limit reached")
+        session_id = spec_field(spec, "id", (str,)) or f"session-{next(self.ids)}"
+        if session_id in self.sessions:
+            raise KeyError(session_id)
+        auto_advance = spec_field(spec, "auto_advance", (bool,), True)
+        # A camera index or a video file/stream
+        source = spec_field(spec, "source", (str, int))
+        session = CoachSession(self, session_id, build_program(spec), auto_advance, source)
+        self.sessions[session_id] = session
+        if session.source is not None:
+            session.start_source(asyncio.get_running_loop())
+        return session
+
+    async def handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        task.writer = writer
+        self.connections.add(task)
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                if body is None:
+                    json_response(writer, 400, {"error": "Content-Length must be a non-negative integer"})
+                    await writer.drain()
+                    break
+                if headers.get("upgrade", "").lower() == "websocket":
+                    await self.handle_websocket(reader, writer, path, headers)
+                    break
+                self.route(writer, method, path.split("?", 1)[0].rstrip("/"), body)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.connections.discard(task)
+            writer.close()
+
+    def route(self, writer, method, path, body):
+        parts = path.strip("/").split("/")
+        if path == "/health":
+            return json_response(writer, 200, {"status": "ok", "sessions": len(self.sessions)})
+        if parts[0] != "sessions":
+            return json_response(writer, 404, {"error": "Not found"})
+        if len(parts) == 1:
+            if method == "GET":
+                return json_response(writer, 200, [s.status() for s in self.sessions.values()])
+            if method == "POST":
+                try:
+                    spec = json.loads(body or b"{}")
+                except ValueError as e:
+                    return json_response(writer, 400, {"error": f"The request body is not valid JSON: {e}"})
+                try:
+                    session = self.create_session(spec)
+                except ValueError as e:
+                    return json_response(writer, 400, {"error": str(e)})
+                except KeyError as e:
+                    return json_response(writer, 409, {"error": f"Session {e} already exists"})
+                except OverflowError as e:
+                    return json_response(writer, 503, {"error": str(e)})
+                return json_response(writer, 201, session.status())
+            return json_response(writer, 405, {"error": "Method not allowed"})
+
+        session = self.sessions.get(parts[1])
+        if session is None:
+            return json_response(writer, 404, {"error": "No such session"})
+        if len(parts) == 3 and parts[2] == "next" and method == "POST":
+            self.advance(session)
+            return json_response(writer, 200, session.status())
+        if len(parts) == 2 and method == "GET":
+            return json_response(writer, 200, session.status())
+        if len(parts) == 2 and method == "DELETE":
+            del self.sessions[session.session_id]
+            session.close()
+            return json_response(writer, 200, {"deleted": session.session_id})
+        return json_response(writer, 405, {"error": "Method not allowed"})
+
+    def advance(self, session):
+        if not session.engine.finished:
+            session.engine.advance()
+            for event in session.engine.flush():
+                event["session"] = session.session_id
+                session.publish(event)
+
+    async def handle_websocket(self, reader, writer, path, headers):
+        parts = path.split("?", 1)[0].strip("/").split("/")
+        session = self.sessions.get(parts[1]) if len(parts) >= 2 and parts[0] == "sessions" else None
+        if session is None or "sec-websocket-key" not in headers:
+            json_response(writer, 404, {"error": "No such session"})
+            await writer.drain()
+            return
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept_key(headers['sec-websocket-key'])}\r\n\r\n").encode("latin-1"))
+
+        events = asyncio.Queue(maxsize=256)
+        session.subscribers.add(events)
+        sender = asyncio.create_task(self.send_events(writer, events))
+        events.put_nowait(dict(session.status(), type="status"))
+        try:
+            while True:
+                opcode, payload = await read_message(reader, writer)
+                if opcode == OP_CLOSE:
+                    writer.write(encode_frame(OP_CLOSE, payload[:2]))
+                    break
+                session.messages += 1
+                if opcode == OP_BINARY:
+                    try:
+                        points = await asyncio.get_running_loop().run_in_executor(self.executor, session.infer, payload, self.mirror)
+                    except ValueError as e:
+                        session.publish({"type": "error", "session": session.session_id, "error": str(e)})
+                        continue
+                    session.handle_landmarks(points)
+                else:
+                    self.handle_text(session, events, payload)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            session.subscribers.discard(events)
+            sender.cancel()
+
+    def handle_text(self, session, events, payload):
+        try:
+            message = json.loads(payload)
+            kind = message.get("type", "landmarks")
+            if kind == "landmarks":
+                landmarks = message.get("landmarks")
+                points = None if landmarks is None else np.asarray(landmarks, dtype=np.float32).reshape(NUM_LANDMARKS, 4)
+                session.handle_landmarks(points, message.get("frame"))
+            elif kind == "next":
+                self.advance(session)
+            elif kind == "status":
+                events.put_nowait(dict(session.status(), type="status"))
+            else:
+                raise ValueError(f"Unknown message type {kind!r}")
+        except (ValueError, TypeError, AttributeError) as e:
+            events.put_nowait({"type": "error", "session": session.session_id, "error": str(e)})
+
+    async def send_events(self, writer, events):
+        # None in the queue means the session was closed
+        try:
+            while True:
+                # Send everything queued so far, then wait for the socket once
+                batch = [await events.get()]
+                while not events.empty():
+                    batch.append(events.get_nowait())
+                for event in batch:
+                    if event is None:
+                        writer.write(encode_frame(OP_CLOSE, struct.pack(">H", 1001) + b"Session deleted"))
+                        await writer.drain()
+                        writer.close()
+                        return
+                    writer.write(encode_frame(OP_TEXT, json.dumps(event).encode("utf-8")))
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+
+# --- Minimal Client ---
+# Used by the load test; any WebSocket library works against the server.
+class CoachClient:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host, port, session_id):
+        reader, writer = await asyncio.open_connection(host, port, limit=MAX_MESSAGE_BYTES)
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        writer.write((f"GET /sessions/{session_id} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode("latin-1"))
+        response = await reader.readuntil(b"\r\n\r\n")
+        if not response.startswith(b"HTTP/1.1 101") or accept_key(key).encode("ascii") not in response:
+            writer.close()
+            raise ConnectionError(f"WebSocket upgrade failed: {response.splitlines()[0]!r}")
+        return cls(reader, writer)
+
+    async def send_json(self, message):
+        self.writer.write(encode_frame(OP_TEXT, json.dumps(message).encode("utf-8"), mask=True))
+        await self.writer.drain()
+
+    async def send_image(self, encoded):
+        self.writer.write(encode_frame(OP_BINARY, encoded, mask=True))
+        await self.writer.drain()
+
+    async def receive(self):
+        opcode, payload = await read_message(self.reader)
+        return None if opcode == OP_CLOSE else json.loads(payload)
+
+    async def close(self):
+        try:
+            self.writer.write(encode_frame(OP_CLOSE, struct.pack(">H", 1000), mask=True))
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+        self.writer.close()
+
+
+async def http_request(host, port, method, path, payload=None):
+    # One-shot JSON request, for scripts and the load test
+    reader, writer = await asyncio.open_connection(host, port)
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: {host}:{port}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = int(next(line.split(b":", 1)[1] for line in head.split(b"\r\n") if line.lower().startswith(b"content-length")))
+    data = json.loads(await reader.readexactly(length))
+    writer.close()
+    return status, data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless coaching server: rep/set/quote events over WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model-complexity", type=int, choices=[0, 1, 2], default=1)
+    parser.add_argument("--inference-workers", type=int, default=None, help="Threads for server-side pose inference")
+    parser.add_argument("--max-sessions", type=int, default=1000)
+    parser.add_argument("--no-mirror", action="store_true")
+    args = parser.parse_args()
+
+    pose_config = {"min_detection_confidence": 0.8, "min_tracking_confidence": 0.65, "model_complexity": args.model_complexity}
+
+    async def serve():
+        server = await CoachServer(args.host, args.port, pose_config, not args.no_mirror, args.max_sessions,
+                                   args.inference_workers).start()
+        print(f"Coaching server listening on ws://{args.host}:{server.port}/sessions/<id>")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
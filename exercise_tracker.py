@@ -0,0 +1,105 @@
+import random
+import time
+
+from fitness_data import MOTIVATIONAL_QUOTES
+from rep_machine import REP_MACHINES
+
+
+# A clock that only moves when told to, for driving the tracker from video or
+# recording timestamps instead of wall time.
+class ManualClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+# --- Exercise State and Rep Logic ---
+# Everything needed to count reps and walk through a program, without any UI.
+# FitnessApp builds on this, and headless sessions use it directly.
+class ExerciseTracker:
+    def __init__(self, program=None, clock=time.time):
+        self.clock = clock
+        self.rep_machines = REP_MACHINES
+        self.counter = 0
+        self.stage = None
+        self.stage_since = self.clock()
+        self.last_rep_time = self.clock()
+        self.LONG_REST_THRESHOLD = 5
+        self.motivation_played = False
+        self.current_exercise = None
+        self.current_quote = "SELECT YOUR FITNESS GOAL TO BEGIN"
+        self.quote_display_time = self.clock()
+        self.selected_program = program
+        self.current_set = 1
+        self.exercise_index = 0
+        if program is not None:
+            self.start_program(program)
+
+    def start_program(self, program):
+        self.selected_program = program
+        self.current_set = 1
+        self.exercise_index = 0
+        self.begin_exercise(program['exercises'][self.exercise_index])
+
+    def begin_exercise(self, exercise, current_set=None):
+        self.counter = 0
+        self.last_rep_time = self.clock()
+        self.motivation_played = False
+        self.current_exercise = exercise
+        if current_set is not None:
+            self.current_set = current_set
+
+    def advance_exercise(self):
+        # Returns False once the last set of the program is finished
+        self.exercise_index += 1
+        self.counter = 0
+        self.last_rep_time = self.clock()
+        self.motivation_played = False
+
+        if self.exercise_index >= len(self.selected_program['exercises']):
+            # After the last set, stay on the last exercise of it: that's the
+            # set a finished workout reports
+            if self.current_set >= self.selected_program['sets']:
+                self.exercise_index -= 1
+                return False
+            self.exercise_index = 0
+            self.current_set += 1
+
+        self.current_exercise = self.selected_program['exercises'][self.exercise_index]
+        return True
+
+    def set_complete(self):
+        return self.selected_program is not None and self.counter >= self.selected_program['reps']
+
+    def count_rep(self, angles):
+        # `angles` is one frame of joint_angles() output; the exercise's
+        # compiled rep machine is a single dict lookup
+        angle_index, machine = self.rep_machines[self.current_exercise]
+        exercise_angle = angles[angle_index]
+        now = self.clock()
+        rep_detected = machine.step(self, exercise_angle, now)
+
+        if rep_detected:
+            self.counter += 1
+            self.last_rep_time = now
+            self.motivation_played = False
+
+            if self.set_complete():
+                self.current_quote = "SET COMPLETE! TIME FOR A QUICK BREAK."
+                self.quote_display_time = now
+
+        return rep_detected, exercise_angle
+
+    def check_rest(self):
+        # Pick a new motivational quote once per long rest
+        current_time = self.clock()
+        rest_duration = current_time - self.last_rep_time
+
+        if rest_duration > self.LONG_REST_THRESHOLD and not self.motivation_played:
+            self.current_quote = random.choice(MOTIVATIONAL_QUOTES)
+            self.quote_display_time = self.clock()
+            self.motivation_played = True
+
+        return current_time - self.quote_display_time < 3
@@ -0,0 +1,71 @@
+import os
+
+from program_catalog import ProgramCatalog
+
+# --- Exercise and Motivational Data ---
+# Exercise definitions. "logic" picks the rep counter (see rep_machine):
+#   threshold - a rep is moving from past enter_angle (first stage) to past
+#               exit_angle (second stage); the direction follows from which
+#               angle is larger. hysteresis widens both thresholds and
+#               min_dwell is the shortest time (s) the first stage must be held.
+#   hold      - a rep is every hold_seconds held in position.
+EXERCISES = {
+    "bicep_curl": {
+        "name": "Bicep Curl",
+        "logic": "threshold",
+        "enter_angle": 160, "exit_angle": 50, "stages": ["down", "up"], "hysteresis": 0, "min_dwell": 0.0,
+        "landmarks": ["LEFT_SHOULDER", "LEFT_ELBOW", "LEFT_WRIST"],
+        "instructions": "1. Stand straight with arms by your side\n2. Curl your forearm up towards your shoulder\n3. Slowly lower back to starting position"
+    },
+    "shoulder_press": {
+        "name": "Shoulder Press",
+        "logic": "threshold",
+        "enter_angle": 60, "exit_angle": 150, "stages": ["down", "up"], "hysteresis": 0, "min_dwell": 0.0,
+        "landmarks": ["LEFT_SHOULDER", "LEFT_ELBOW", "LEFT_WRIST"],
+        "instructions": "1. Start with elbows bent at 90 degrees\n2. Press upward until arms are fully extended\n3. Slowly return to starting position"
+    },
+    "squat": {
+        "name": "Squat",
+        "logic": "threshold",
+        "enter_angle": 160, "exit_angle": 100, "stages": ["up", "down"], "hysteresis": 0, "min_dwell": 0.0,
+        "landmarks": ["LEFT_HIP", "LEFT_KNEE", "LEFT_ANKLE"],
+        "instructions": "1. Stand with feet shoulder-width apart\n2. Lower your hips as if sitting in a chair\n3. Keep your chest up and knees behind toes\n4. Return to standing position"
+    },
+    "push_up": {
+        "name": "Push Up",
+        "logic": "threshold",
+        "enter_angle": 160, "exit_angle": 90, "stages": ["up", "down"], "hysteresis": 0, "min_dwell": 0.0,
+        "landmarks": ["LEFT_SHOULDER", "LEFT_ELBOW", "LEFT_WRIST"],
+        "instructions": "1. Start in a plank position with hands shoulder-width apart\n2. Lower your body until chest nearly touches the floor\n3. Push back up to the starting position"
+    },
+    "plank": {
+        "name": "Plank",
+        "logic": "hold",
+        "hold_seconds": 3,
+        "landmarks": ["LEFT_SHOULDER", "LEFT_HIP", "LEFT_ANKLE"],
+        "instructions": "1. Start in a push-up position with weight on forearms\n2. Keep your body in a straight line from head to heels\n3. Hold this position for the required time"
+    },
+    "stretch": {
+        "name": "Full Body Stretch",
+        "logic": "threshold",
+        "enter_angle": 170, "exit_angle": 140, "stages": ["extended", "bent"], "hysteresis": 0, "min_dwell": 0.0,
+        "landmarks": ["LEFT_SHOULDER", "LEFT_HIP", "LEFT_ANKLE"],
+        "instructions": "1. Stand with feet shoulder-width apart\n2. Reach arms overhead and stretch upward\n3. Bend at the waist and reach toward your toes\n4. Return to standing position"
+    }
+}
+
+MOTIVATIONAL_QUOTES = [
+    "KEEP GOING! YOU'VE GOT THIS!",
+    "DON'T GIVE UP! YOU'RE STRONGER THAN YOU THINK!",
+    "PUSH THROUGH THE PAIN! GROWTH IS ON THE OTHER SIDE!",
+    "ONE MORE REP! YOU CAN DO IT!",
+    "YOUR FUTURE SELF WILL THANK YOU!",
+    "STRENGTH DOESN'T COME FROM WHAT YOU CAN DO, IT COMES FROM OVERCOMING WHAT YOU ONCE THOUGHT YOU COULDN'T!",
+    "THE ONLY BAD WORKOUT IS THE ONE THAT DIDN'T HAPPEN!"
+]
+
+# Body goals and their programs are data, validated against EXERCISES when
+# loaded (see program_catalog). FITNESS_CATALOG points at another file.
+CATALOG_PATH = os.environ.get("FITNESS_CATALOG") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "programs.json")
+CATALOG = ProgramCatalog(CATALOG_PATH, EXERCISES)
+BODY_GOALS = CATALOG.goals
@@ -0,0 +1,50 @@
+import tkinter as tk
+
+import cv2 as cv
+import numpy as np
+from PIL import Image, ImageTk
+
+
+# --- Persistent Frame Display ---
+# One Tk photo image for the lifetime of the widget. Each frame is resized
+# straight into a preallocated RGB buffer, decoded into a PIL image that is
+# also reused, and pasted into the photo in place, so showing a frame
+# allocates no pixel memory and never reconfigures the label.
+class FrameDisplay:
+    def __init__(self, parent, size=(640, 480), text="", **label_options):
+        self.size = size
+        width, height = size
+        self.buffer = np.zeros((height, width, 3), dtype=np.uint8)
+        self.image = Image.new("RGB", size)
+        self.photo = ImageTk.PhotoImage("RGB", size)
+        self.text = text
+        # A plain tk.Label: CTkLabel only takes CTkImage, which is rebuilt per frame
+        self.label = tk.Label(parent, image=self.photo, text=text, compound="center", borderwidth=0,
+                              highlightthickness=0, **label_options)
+
+    def show(self, rgb_frame):
+        # rgb_frame: HxWx3 uint8 in RGB order, any size
+        if rgb_frame.shape[:2] == self.buffer.shape[:2] and rgb_frame.flags.c_contiguous:
+            source = rgb_frame
+        else:
+            source = cv.resize(rgb_frame, self.size, dst=self.buffer, interpolation=cv.INTER_AREA)
+        self.image.frombytes(source)
+        self.photo.paste(self.image)
+        if self.text:
+            self.set_text("")
+
+    def clear(self, text=""):
+        # Blank the picture, e.g. so a new workout doesn't open on the last one's frame
+        self.buffer[:] = 0
+        self.image.frombytes(self.buffer)
+        self.photo.paste(self.image)
+        self.set_text(text)
+
+    def set_text(self, text):
+        # Message drawn over the last frame (e.g. "Camera not available")
+        if text != self.text:
+            self.text = text
+            self.label.configure(text=text)
+
+    def grid(self, **options):
+        self.label.grid(**options)
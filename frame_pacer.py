@@ -0,0 +1,82 @@
+import time
+from collections import deque
+
+import numpy as np
+
+
+# --- Display Frame Pacer ---
+# Schedules the Tk display loop against absolute deadlines one frame apart,
+# so the time spent showing a frame comes out of the wait before the next
+# one instead of adding to it. When no new frame is ready the loop checks
+# again after a quarter frame rather than polling on a fixed short timer.
+# If the loop falls behind (slow work, a blocked UI thread) it resyncs to
+# "now" instead of firing a burst of catch-up ticks.
+class FramePacer:
+    def __init__(self, target_fps=30, max_frame_age=0.5, window=300):
+        self.interval = 1.0 / target_fps
+        self.max_frame_age = max_frame_age
+        self.deadline = None
+        self.tick_start = None
+        self.last_shown = None
+        self.frame_intervals = deque(maxlen=window)
+        self.work_times = deque(maxlen=window)
+        self.ticks = 0
+        self.empty_ticks = 0
+        self.late_ticks = 0
+        self.stale_frames = 0
+
+    def begin(self):
+        self.ticks += 1
+        self.tick_start = time.perf_counter()
+        return self.tick_start
+
+    def is_stale(self, captured_at):
+        # Frames that spent too long in the pipeline aren't worth showing
+        if captured_at is not None and self.tick_start - captured_at > self.max_frame_age:
+            self.stale_frames += 1
+            return True
+        return False
+
+    def shown(self):
+        if self.last_shown is not None:
+            self.frame_intervals.append(self.tick_start - self.last_shown)
+        self.last_shown = self.tick_start
+
+    def next_delay_ms(self, shown):
+        # Milliseconds to pass to root.after for the next tick
+        now = time.perf_counter()
+        self.work_times.append(now - self.tick_start)
+        if self.deadline is None:
+            self.deadline = now
+        if shown:
+            self.deadline += self.interval
+            if self.deadline <= now:
+                self.late_ticks += 1
+                self.deadline = now + self.interval
+            delay = self.deadline - now
+        else:
+            self.empty_ticks += 1
+            delay = max(self.deadline - now, self.interval / 4)
+        return max(1, int(round(delay * 1000)))
+
+    def stats(self):
+        intervals = np.asarray(self.frame_intervals) * 1000
+        work = np.asarray(self.work_times) * 1000
+        stats = {
+            "display_ticks": self.ticks,
+            "display_empty_ticks": self.empty_ticks,
+            "display_late_ticks": self.late_ticks,
+            "display_stale_frames": self.stale_frames
+        }
+        if intervals.size:
+            stats.update({
+                "display_fps": 1000.0 / intervals.mean(),
+                "frame_time_mean_ms": float(intervals.mean()),
+                "frame_time_p95_ms": float(np.percentile(intervals, 95)),
+                "frame_time_max_ms": float(intervals.max()),
+                # Jitter: spread of the frame-to-frame interval
+                "frame_time_jitter_ms": float(intervals.std())
+            })
+        if work.size:
+            stats["display_work_mean_ms"] = float(work.mean())
+        return stats
@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import deque
+
+import cv2 as cv
+
+from buffer_pool import BufferPool
+from perf_monitor import PerfMonitor
+
+
+# --- Bounded Drop-Oldest Queue ---
+# When the consumer falls behind, the oldest item is discarded so the queue
+# never holds more than `maxsize` frames and latency stays bounded. Dropped
+# items go to `on_drop` (e.g. back to a buffer pool).
+class DropOldestQueue:
+    def __init__(self, maxsize=2, on_drop=None):
+        self.items = deque()
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.on_drop = on_drop
+        self.cond = threading.Condition()
+
+    def put(self, item):
+        with self.cond:
+            if len(self.items) >= self.maxsize:
+                self.discard(self.items.popleft())
+            self.items.append(item)
+            self.cond.notify()
+
+    def get(self, timeout=None):
+        with self.cond:
+            if not self.items:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def get_latest(self):
+        # Non-blocking: return the newest item and count the older ones as dropped
+        with self.cond:
+            if not self.items:
+                return None
+            item = self.items.pop()
+            while self.items:
+                self.discard(self.items.popleft())
+            return item
+
+    def discard(self, item):
+        self.dropped += 1
+        if self.on_drop is not None:
+            self.on_drop(item)
+
+    def __len__(self):
+        with self.cond:
+            return len(self.items)
+
+
+# --- Capture -> Inference -> Render Pipeline ---
+# The capture thread only reads and flips frames, the inference worker runs
+# `process_fn` (pose + rep logic + overlays) and the Tk thread only ever
+# displays the newest finished frame via latest().
+# Frames live in pooled buffers. Ownership moves with the frame: capture ->
+# capture_queue -> inference (which releases its input once process_fn has
+# returned a new buffer) -> display_queue -> the caller of latest(), which
+# hands the frame back with release() after showing it. Queue items are
+# (frame, capture time) pairs so the display can tell how old a frame is.
+class FramePipeline:
+    def __init__(self, cap, process_fn, queue_size=2, perf=None, pool=None):
+        self.cap = cap
+        self.process_fn = process_fn
+        self.perf = perf or PerfMonitor()
+        self.pool = pool or BufferPool()
+        self.capture_queue = DropOldestQueue(queue_size, on_drop=self.release_item)
+        self.display_queue = DropOldestQueue(queue_size, on_drop=self.release_item)
+        self.running = False
+        self.threads = []
+        self.last_read_ok = True
+        self.frames_captured = 0
+        self.frames_processed = 0
+        self.frames_displayed = 0
+
+    def start(self):
+        if self.running:
+            return self
+        self.running = True
+        self.threads = [
+            threading.Thread(target=self.capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self.inference_loop, name="inference", daemon=True)
+        ]
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self.running = False
+        # Wake the inference worker if it is waiting on an empty queue
+        with self.capture_queue.cond:
+            self.capture_queue.cond.notify_all()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def capture_loop(self):
+        perf = self.perf
+        raw = None
+        while self.running:
+            start = perf.start()
+            # read() decodes into `raw` when the size matches, so it is reused
+            ret, raw = self.cap.read(raw)
+            perf.stop("capture", start)
+            self.last_read_ok = ret
+            if not ret:
+                time.sleep(0.01)
+                continue
+            self.frames_captured += 1
+            perf.tick("capture")
+            self.capture_queue.put((cv.flip(raw, 1, dst=self.pool.acquire_like(raw)), time.perf_counter()))
+
+    def inference_loop(self):
+        while self.running:
+            item = self.capture_queue.get(timeout=0.1)
+            if item is None:
+                continue
+            frame, captured_at = item
+            result = self.process_fn(frame)
+            if result is not frame:
+                self.pool.release(frame)
+            self.display_queue.put((result, captured_at))
+            self.frames_processed += 1
+            self.perf.tick("inference")
+
+    def latest(self):
+        return self.latest_with_time()[0]
+
+    def latest_with_time(self):
+        # (newest processed frame, its perf_counter capture time) or (None, None)
+        item = self.display_queue.get_latest()
+        if item is None:
+            return None, None
+        self.frames_displayed += 1
+        return item
+
+    def release(self, frame):
+        self.pool.release(frame)
+
+    def release_item(self, item):
+        self.pool.release(item[0])
+
+    def stats(self):
+        return {
+            "capture_queue_depth": len(self.capture_queue),
+            "display_queue_depth": len(self.display_queue),
+            "frames_captured": self.frames_captured,
+            "frames_processed": self.frames_processed,
+            "frames_displayed": self.frames_displayed,
+            "dropped_before_inference": self.capture_queue.dropped,
+            "dropped_before_display": self.display_queue.dropped,
+            **self.pool.stats()
+        }
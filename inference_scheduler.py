@@ -0,0 +1,160 @@
+import numpy as np
+
+from joint_angles import joint_angles
+
+
+# --- Landmark Predictor ---
+# Constant-velocity extrapolation from the last inferred frame. The velocity
+# is low-pass filtered (the derivative stage of a One-Euro filter) so a
+# single jittery detection doesn't throw the prediction off.
+class LandmarkPredictor:
+    def __init__(self, velocity_smoothing=0.5):
+        self.velocity_smoothing = velocity_smoothing
+        self.reset()
+
+    def reset(self):
+        self.time = None
+        self.points = None
+        self.velocity = None
+        self.angles = None
+        self.angle_velocity = None
+
+    def observe(self, now, points):
+        angles = joint_angles(points)
+        if self.time is not None and now > self.time:
+            dt = now - self.time
+            alpha = self.velocity_smoothing
+            velocity = (points - self.points) / dt
+            angle_velocity = (angles - self.angles) / dt
+            if self.velocity is None:
+                self.velocity, self.angle_velocity = velocity, angle_velocity
+            else:
+                self.velocity = alpha * velocity + (1 - alpha) * self.velocity
+                self.angle_velocity = alpha * angle_velocity + (1 - alpha) * self.angle_velocity
+        self.time = now
+        self.points = points.copy()
+        self.angles = angles
+
+    def predict(self, now):
+        if self.velocity is None:
+            return self.points.copy()
+        points = self.points + self.velocity * (now - self.time)
+        # Visibility isn't a motion; keep the last measured value
+        points[:, 3] = self.points[:, 3]
+        return points
+
+    def predict_angle(self, now, angle_index):
+        if self.angle_velocity is None:
+            return self.angles[angle_index]
+        return self.angles[angle_index] + self.angle_velocity[angle_index] * (now - self.time)
+
+
+# --- Inference Scheduler ---
+# Decides per frame whether to run the pose model or predict. The interval N
+# shrinks from max_skip to 1 as the fastest joint angle speeds up between
+# slow_speed and fast_speed (degrees/s). Whatever N is, the model always
+# runs when the predicted rep angle could be within guard_band degrees of a
+# rep threshold before the next inference, so stage changes are decided on
+# measured landmarks. guard_band trades skipped frames near the turn of a rep
+# for fewer miscounted reps; max_skip=1 turns skipping off.
+# max_rep_error caps the reps skipping may miscount over the scheduler's life
+# (one workout in the app). Each inference after skipped frames checks what
+# the rep logic was shown: if the last predicted angle crossed a rep
+# threshold that the measured angles on both sides of it never crossed, the
+# prediction overshot into a stage change that didn't happen, which counts
+# as one possible rep error. Once the estimate reaches the cap every frame
+# is inferred; None means no cap.
+class InferenceScheduler:
+    def __init__(self, max_skip=3, guard_band=12.0, slow_speed=40.0, fast_speed=200.0, max_rep_error=None):
+        self.max_skip = max_skip
+        self.guard_band = guard_band
+        self.max_rep_error = max_rep_error
+        self.estimated_rep_error = 0
+        # Rep angle and machine from the last should_infer() call
+        self.rep_check = None
+        self.predicted_at = None
+        self.slow_speed = slow_speed
+        self.fast_speed = fast_speed
+        self.predictor = LandmarkPredictor()
+        self.interval = 1
+        self.skipped = 0
+        self.frame_period = 1 / 30.0
+        self.last_call = None
+        self.inferred = 0
+        self.predicted = 0
+
+    def should_infer(self, now, angle_index, machine):
+        if self.last_call is not None and now > self.last_call:
+            self.frame_period = 0.9 * self.frame_period + 0.1 * (now - self.last_call)
+        self.last_call = now
+        self.rep_check = (angle_index, machine)
+
+        if self.max_skip <= 1 or self.error_budget_spent() or self.predictor.time is None or self.skipped + 1 >= self.interval:
+            return True
+        angle = self.predictor.predict_angle(now, angle_index)
+        speed = 0.0 if self.predictor.angle_velocity is None else abs(self.predictor.angle_velocity[angle_index])
+        reach = self.guard_band + speed * (self.interval - self.skipped) * self.frame_period
+        return any(abs(angle - limit) < reach for limit in machine.thresholds())
+
+    def observe(self, now, points):
+        # Result of an inference; None means no pose, which drops the track
+        self.inferred += 1
+        skipped, self.skipped = self.skipped, 0
+        if points is None:
+            self.predictor.reset()
+            self.interval = 1
+            return
+        predicted = None
+        if skipped and self.rep_check is not None:
+            angle_index, machine = self.rep_check
+            before = self.predictor.angles[angle_index]
+            predicted = self.predictor.predict_angle(self.predicted_at, angle_index)
+        self.predictor.observe(now, points)
+        if predicted is not None:
+            after = self.predictor.angles[angle_index]
+            if any((before < limit) == (after < limit) != (predicted < limit) for limit in machine.thresholds()):
+                self.estimated_rep_error += 1
+        self.interval = self.pick_interval()
+
+    def error_budget_spent(self):
+        return self.max_rep_error is not None and self.estimated_rep_error >= self.max_rep_error
+
+    def predict(self, now):
+        self.predicted += 1
+        self.skipped += 1
+        self.predicted_at = now
+        return self.predictor.predict(now)
+
+    def pick_interval(self):
+        if self.predictor.angle_velocity is None:
+            return 1
+        speed = float(np.nanmax(np.abs(self.predictor.angle_velocity), initial=0.0))
+        if speed <= self.slow_speed:
+            return self.max_skip
+        if speed >= self.fast_speed:
+            return 1
+        fraction = (self.fast_speed - speed) / (self.fast_speed - self.slow_speed)
+        return max(1, int(round(1 + fraction * (self.max_skip - 1))))
+
+    def stats(self):
+        total = self.inferred + self.predicted
+        return {"inferred": self.inferred, "predicted": self.predicted,
+                "skip_ratio": self.predicted / total if total else 0.0, "interval": self.interval,
+                "estimated_rep_error": self.estimated_rep_error}
+
+
+def schedule_trajectory(times, points, exercises, machines, **settings):
+    # Offline check of a scheduler setting: replays recorded landmarks as if
+    # only the scheduled frames had been inferred. Returns the landmarks the
+    # rep logic would have seen and a mask of the inferred frames.
+    scheduler = InferenceScheduler(**settings)
+    seen = np.array(points, dtype=np.float32, copy=True)
+    inferred = np.zeros(len(times), dtype=bool)
+    for i, now in enumerate(times):
+        angle_index, machine = machines[exercises[i]]
+        if scheduler.should_infer(now, angle_index, machine):
+            inferred[i] = True
+            scheduler.observe(now, None if np.isnan(points[i, 0, 0]) else points[i])
+        else:
+            seen[i] = scheduler.predict(now)
+    return seen, inferred
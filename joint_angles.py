@@ -0,0 +1,63 @@
+import numpy as np
+
+from fitness_data import EXERCISES
+
+# MediaPipe Pose landmark order (mp_pose.PoseLandmark values 0-32)
+LANDMARK_NAMES = [
+    "NOSE", "LEFT_EYE_INNER", "LEFT_EYE", "LEFT_EYE_OUTER", "RIGHT_EYE_INNER", "RIGHT_EYE", "RIGHT_EYE_OUTER",
+    "LEFT_EAR", "RIGHT_EAR", "MOUTH_LEFT", "MOUTH_RIGHT", "LEFT_SHOULDER", "RIGHT_SHOULDER", "LEFT_ELBOW",
+    "RIGHT_ELBOW", "LEFT_WRIST", "RIGHT_WRIST", "LEFT_PINKY", "RIGHT_PINKY", "LEFT_INDEX", "RIGHT_INDEX",
+    "LEFT_THUMB", "RIGHT_THUMB", "LEFT_HIP", "RIGHT_HIP", "LEFT_KNEE", "RIGHT_KNEE", "LEFT_ANKLE",
+    "RIGHT_ANKLE", "LEFT_HEEL", "RIGHT_HEEL", "LEFT_FOOT_INDEX", "RIGHT_FOOT_INDEX"
+]
+LANDMARK_INDEX = {name: i for i, name in enumerate(LANDMARK_NAMES)}
+NUM_LANDMARKS = len(LANDMARK_NAMES)
+
+# Columns of a landmark array
+X, Y, Z, VISIBILITY = range(4)
+
+
+def landmarks_to_array(landmarks, out=None):
+    # One (33, 4) float32 array of x, y, z, visibility per frame
+    if out is None:
+        out = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+    out[:] = [(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks]
+    return out
+
+
+def mirror_triplet(triplet):
+    swap = {"LEFT_": "RIGHT_", "RIGHT_": "LEFT_"}
+    return tuple(swap[name[:name.index("_") + 1]] + name[name.index("_") + 1:] for name in triplet)
+
+
+def build_joint_table(exercises):
+    # Every joint triplet used by an exercise, for both body sides, in a
+    # fixed order so each angle has a stable column
+    triplets = []
+    for exercise in exercises.values():
+        triplet = tuple(exercise["landmarks"])
+        for side in (triplet, mirror_triplet(triplet)):
+            if side not in triplets:
+                triplets.append(side)
+    return triplets
+
+
+JOINT_TRIPLETS = build_joint_table(EXERCISES)
+JOINT_INDEX = {triplet: i for i, triplet in enumerate(JOINT_TRIPLETS)}
+TRIPLET_LANDMARKS = np.array([[LANDMARK_INDEX[name] for name in triplet] for triplet in JOINT_TRIPLETS], dtype=np.intp)
+
+# Column of the angle each exercise counts reps on
+EXERCISE_ANGLE_INDEX = {key: JOINT_INDEX[tuple(exercise["landmarks"])] for key, exercise in EXERCISES.items()}
+
+
+def joint_angles(points):
+    # points: (33, 4) for one frame or (T, 33, 4) for a whole trajectory.
+    # Returns (J,) or (T, J) angles in degrees (0-180) at the middle landmark
+    # of each triplet, measured in the image plane.
+    points = np.asarray(points, dtype=np.float32)
+    a = points[..., TRIPLET_LANDMARKS[:, 0], :2]
+    b = points[..., TRIPLET_LANDMARKS[:, 1], :2]
+    c = points[..., TRIPLET_LANDMARKS[:, 2], :2]
+    radians = np.arctan2(c[..., 1] - b[..., 1], c[..., 0] - b[..., 0]) - np.arctan2(a[..., 1] - b[..., 1], a[..., 0] - b[..., 0])
+    angles = np.abs(np.degrees(radians))
+    return np.where(angles > 180.0, 360.0 - angles, angles)
@@ -0,0 +1,155 @@
+import json
+import os
+import time
+
+import numpy as np
+
+from fitness_data import EXERCISES
+from joint_angles import NUM_LANDMARKS
+
+# --- Recording Format ---
+# [8-byte magic][4-byte little-endian header length][JSON header, space padded
+# to a 64-byte boundary][fixed-size records ...]
+# The record count isn't stored: it follows from the file size, so a recording
+# stays readable even if the app stops mid-write.
+MAGIC = b"FITREC01"
+HEADER_ALIGN = 64
+
+RECORD_DTYPE = np.dtype([
+    ("time", "<f8"),
+    ("landmarks", "<f4", (NUM_LANDMARKS, 4)),
+    ("has_pose", "u1"),
+    ("rep_event", "u1"),
+    ("exercise", "u1"),
+    ("stage", "u1"),
+    ("set", "<u2"),
+    ("reps", "<u2"),
+    ("angle", "<f4")
+])
+
+EXERCISE_CODES = list(EXERCISES)
+STAGE_CODES = [None] + sorted({stage for ex in EXERCISES.values() for stage in ex.get("stages", [])})
+
+
+def encode_header(meta):
+    header = {
+        "version": 1,
+        "dtype": RECORD_DTYPE.descr,
+        "exercises": EXERCISE_CODES,
+        "stages": STAGE_CODES,
+        "created": time.time(),
+        "meta": meta or {}
+    }
+    body = json.dumps(header).encode("utf-8")
+    prefix = len(MAGIC) + 4
+    padded = -(-(prefix + len(body)) // HEADER_ALIGN) * HEADER_ALIGN
+    body += b" " * (padded - prefix - len(body))
+    return MAGIC + len(body).to_bytes(4, "little") + body
+
+
+def read_header(f):
+    magic = f.read(len(MAGIC))
+    if magic != MAGIC:
+        raise ValueError("Not a landmark recording")
+    length = int.from_bytes(f.read(4), "little")
+    header = json.loads(f.read(length).decode("utf-8"))
+    header["data_offset"] = len(MAGIC) + 4 + length
+    return header
+
+
+# --- Writer ---
+# Append-only and buffered: records fill a preallocated block that is written
+# out in one call once full, so recording costs one row copy per frame.
+class LandmarkRecorder:
+    def __init__(self, path, meta=None, buffer_frames=256):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(encode_header(meta))
+        self.buffer = np.zeros(buffer_frames, dtype=RECORD_DTYPE)
+        self.pending = 0
+        self.frames_written = 0
+        self.exercise_codes = {key: i for i, key in enumerate(EXERCISE_CODES)}
+        self.stage_codes = {stage: i for i, stage in enumerate(STAGE_CODES)}
+
+    def append(self, timestamp, points, angle, exercise, stage, current_set, reps, rep_event):
+        record = self.buffer[self.pending]
+        record["time"] = timestamp
+        if points is None:
+            record["landmarks"] = np.nan
+            record["has_pose"] = 0
+            record["angle"] = np.nan
+        else:
+            record["landmarks"] = points
+            record["has_pose"] = 1
+            record["angle"] = angle
+        record["exercise"] = self.exercise_codes[exercise]
+        record["stage"] = self.stage_codes[stage]
+        record["set"] = current_set
+        record["reps"] = reps
+        record["rep_event"] = 1 if rep_event else 0
+        self.pending += 1
+        if self.pending == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.file.write(self.buffer[:self.pending].tobytes())
+            self.frames_written += self.pending
+            self.pending = 0
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# --- Reader ---
+# Records are exposed through np.memmap, so slicing a multi-hour recording
+# only touches the pages that are actually read.
+class LandmarkRecording:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.header = read_header(f)
+        dtype = np.dtype([tuple(field) if len(field) == 2 else (field[0], field[1], tuple(field[2])) for field in self.header["dtype"]])
+        offset = self.header["data_offset"]
+        count = (os.path.getsize(path) - offset) // dtype.itemsize
+        if count:
+            self.records = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=dtype)
+        self.exercises = self.header["exercises"]
+        self.stages = self.header["stages"]
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    @property
+    def meta(self):
+        return self.header["meta"]
+
+    def time_slice(self, start, end):
+        # Records with start <= time < end, as a view into the file
+        times = self.records["time"]
+        lo, hi = np.searchsorted(times, [start, end], side="left")
+        return self.records[lo:hi]
+
+    def exercise_name(self, code):
+        return self.exercises[code]
+
+    def stage_name(self, code):
+        return self.stages[code]
+
+    def rep_times(self):
+        return self.records["time"][self.records["rep_event"] == 1]
@@ -0,0 +1,234 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from exercise_tracker import ExerciseTracker, ManualClock
+from fitness_data import CATALOG, EXERCISES
+from inference_scheduler import schedule_trajectory
+from joint_angles import joint_angles
+from landmark_recording import LandmarkRecording
+from rep_machine import REP_MACHINES, ThresholdMachine, compile_exercises
+
+
+def recorded_program(meta):
+    # The program a recording was made with, if it still exists
+    if not meta.get("goal") or not meta.get("program"):
+        return None
+    return CATALOG.find_program(meta["goal"], meta["program"])
+
+
+def override_machines(overrides):
+    # overrides: {"squat": {"exit_angle": 95}, ...} applied on top of EXERCISES
+    if not overrides:
+        return REP_MACHINES
+    exercises = {key: dict(spec, **overrides.get(key, {})) for key, spec in EXERCISES.items()}
+    return compile_exercises(exercises)
+
+
+# --- Replay ---
+# Feeds a recording straight into ExerciseTracker: no camera, no decoding, no
+# MediaPipe. Angles for the whole recording come from one vectorized
+# joint_angles() call, and the tracker's clock is set from each record's
+# timestamp, so plank holds and LONG_REST_THRESHOLD behave exactly as they
+# did live however fast the replay runs.
+def replay_recording(recording, machines=None, landmarks=None):
+    if not isinstance(recording, LandmarkRecording):
+        recording = LandmarkRecording(recording)
+    records = recording.records
+    count = len(records)
+    times = np.asarray(records["time"], dtype=np.float64)
+    angles = joint_angles(records["landmarks"] if landmarks is None else landmarks)
+    has_pose = np.asarray(records["has_pose"], dtype=bool)
+    exercise_codes = np.asarray(records["exercise"])
+    sets = np.asarray(records["set"])
+
+    clock = ManualClock(times[0] if count else 0.0)
+    tracker = ExerciseTracker(clock=clock)
+    tracker.selected_program = recorded_program(recording.meta)
+    if machines is not None:
+        tracker.rep_machines = machines
+
+    events = []
+    segment = None
+    for i in range(count):
+        clock.now = times[i]
+        # The recording says when the athlete moved on; follow it
+        if (exercise_codes[i], sets[i]) != segment:
+            segment = (exercise_codes[i], sets[i])
+            tracker.begin_exercise(recording.exercise_name(segment[0]), int(segment[1]))
+
+        if has_pose[i]:
+            rep_detected, angle = tracker.count_rep(angles[i])
+            if rep_detected:
+                events.append({"type": "rep", "frame": i, "time": times[i], "exercise": tracker.current_exercise,
+                               "set": tracker.current_set, "rep": tracker.counter, "angle": float(angle)})
+
+        motivation_played = tracker.motivation_played
+        tracker.check_rest()
+        if tracker.motivation_played and not motivation_played:
+            events.append({"type": "quote", "frame": i, "time": times[i], "quote": tracker.current_quote})
+
+    return {
+        "file": recording.path,
+        "frames": count,
+        "duration_s": float(times[-1] - times[0]) if count else 0.0,
+        "recorded_reps": int(np.count_nonzero(records["rep_event"])),
+        "replayed_reps": sum(1 for e in events if e["type"] == "rep"),
+        "events": events
+    }
+
+
+def replay_counts(recording, machines=None, landmarks=None):
+    # Rep frame indices only, without rest/quote events: each exercise segment
+    # is counted with the rep machine's array path instead of a frame loop
+    if not isinstance(recording, LandmarkRecording):
+        recording = LandmarkRecording(recording)
+    machines = machines or REP_MACHINES
+    records = recording.records
+    if not len(records):
+        return np.zeros(0, dtype=np.intp)
+
+    times = np.asarray(records["time"], dtype=np.float64)
+    angles = joint_angles(records["landmarks"] if landmarks is None else landmarks)
+    segment_keys = np.asarray(records["exercise"], dtype=np.int64) * 65536 + np.asarray(records["set"])
+    bounds = np.flatnonzero(np.diff(segment_keys)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(records)]))
+
+    reps = []
+    stage, stage_since = None, times[0]
+    for start, end in zip(starts, ends):
+        exercise = recording.exercise_name(records["exercise"][start])
+        angle_index, machine = machines[exercise]
+        segment_angles, segment_times = angles[start:end, angle_index], times[start:end]
+        segment = machine.count_series(segment_angles, segment_times, stage=stage,
+                                       stage_since=stage_since, last_rep_time=times[start])
+        reps.append(segment + start)
+        # The stage carries over between exercises, as it does live
+        stage, stage_since = stage_after(machine, segment_angles, segment_times, stage, stage_since)
+    return np.concatenate(reps)
+
+
+def stage_after(machine, angles, times, stage, stage_since):
+    # Tracker stage (and when it was entered) after stepping through `angles`
+    if not isinstance(machine, ThresholdMachine):
+        return stage, stage_since
+    values = machine.sign * angles
+    ready = values > machine.ready_limit
+    fire = values < machine.rep_limit
+    events = np.flatnonzero(ready | fire)
+    if events.size == 0:
+        return stage, stage_since
+    fires = np.flatnonzero(fire[events])
+    if not fire[events[-1]]:
+        if fires.size:
+            return machine.ready_stage, times[events[fires[-1] + 1]]
+        return machine.ready_stage, stage_since if stage == machine.ready_stage else times[events[0]]
+    if ready[events].any() or stage == machine.ready_stage:
+        return machine.rep_stage, stage_since
+    return stage, stage_since
+
+
+def scheduled_landmarks(recording, machines, frame_skip):
+    # What the rep logic would have seen with frame skipping on
+    records = recording.records
+    exercises = [recording.exercise_name(code) for code in records["exercise"]]
+    landmarks, inferred = schedule_trajectory(np.asarray(records["time"], dtype=np.float64), np.asarray(records["landmarks"]),
+                                              exercises, machines, **frame_skip)
+    return landmarks, int(np.count_nonzero(inferred))
+
+
+def replay_file(path, overrides, fast, frame_skip=None):
+    machines = override_machines(overrides)
+    recording = LandmarkRecording(path)
+    landmarks, inferred = None, len(recording)
+    if frame_skip and len(recording):
+        landmarks, inferred = scheduled_landmarks(recording, machines, frame_skip)
+    if fast:
+        reps = replay_counts(recording, machines, landmarks)
+        result = {"file": path, "frames": len(recording), "recorded_reps": int(np.count_nonzero(recording.records["rep_event"])),
+                  "replayed_reps": int(reps.size)}
+    else:
+        result = replay_recording(recording, machines, landmarks)
+        del result["events"]
+    result["inferred_frames"] = inferred
+    if landmarks is not None:
+        # Rep error from skipping: the same replay with every frame inferred
+        baseline = replay_counts(recording, machines).size if fast else replay_recording(recording, machines)["replayed_reps"]
+        result["rep_error"] = abs(result["replayed_reps"] - int(baseline))
+    return result
+
+
+def parse_overrides(values):
+    # "squat.exit_angle=95" -> {"squat": {"exit_angle": 95.0}}
+    overrides = {}
+    for value in values or []:
+        target, number = value.split("=", 1)
+        exercise, field = target.split(".", 1)
+        if exercise not in EXERCISES:
+            raise SystemExit(f"Unknown exercise in override: {exercise}")
+        overrides.setdefault(exercise, {})[field] = float(number)
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay landmark recordings through the rep logic, faster than real time.")
+    parser.add_argument("paths", nargs="+", help="Recording files or directories of .fitrec files")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="EXERCISE.FIELD=VALUE",
+                        help="Override an EXERCISES threshold for this replay, e.g. squat.exit_angle=95")
+    parser.add_argument("--fast", action="store_true", help="Count reps with array operations only (no rest/quote events)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (defaults to one per core)")
+    parser.add_argument("--max-skip", type=int, default=1, help="Simulate frame skipping: at most this many frames per inference")
+    parser.add_argument("--guard-band", type=float, default=12.0, help="Degrees around rep thresholds where every frame is inferred")
+    parser.add_argument("--max-rep-error", type=int, default=None,
+                        help="Reps per session that skipping may miscount before it turns itself off (default: no cap)")
+    args = parser.parse_args()
+
+    files = []
+    for path in args.paths:
+        files.extend(sorted(glob.glob(os.path.join(path, "*.fitrec"))) if os.path.isdir(path) else [path])
+    overrides = parse_overrides(args.overrides)
+    frame_skip = None
+    if args.max_skip > 1:
+        frame_skip = {"max_skip": args.max_skip, "guard_band": args.guard_band, "max_rep_error": args.max_rep_error}
+
+    start = time.perf_counter()
+    workers = min(args.workers or os.cpu_count() or 1, max(1, len(files)))
+    if workers == 1:
+        results = [replay_file(path, overrides, args.fast, frame_skip) for path in files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(replay_file, files, [overrides] * len(files), [args.fast] * len(files),
+                                    [frame_skip] * len(files), chunksize=max(1, len(files) // (workers * 4))))
+    elapsed = time.perf_counter() - start
+
+    mismatches = over_cap = 0
+    for result in results:
+        flag = "" if result["replayed_reps"] == result["recorded_reps"] else "  <-- differs from recording"
+        mismatches += bool(flag)
+        skipping = ""
+        if "rep_error" in result:
+            skipping = f", rep error from skipping {result['rep_error']}"
+            if args.max_rep_error is not None and result["rep_error"] > args.max_rep_error:
+                skipping += f"  <-- over the cap of {args.max_rep_error}"
+                over_cap += 1
+        print(f"{result['file']}: {result['replayed_reps']} reps (recorded {result['recorded_reps']}){flag}{skipping}")
+    frames = sum(r["frames"] for r in results)
+    print(f"Replayed {len(results)} sessions, {frames} frames in {elapsed:.2f} s "
+          f"({len(results) / elapsed * 60:.0f} sessions/min, {frames / elapsed:.0f} frames/s), {mismatches} differ")
+    if frame_skip:
+        inferred = sum(r["inferred_frames"] for r in results)
+        errors = [r["rep_error"] for r in results if "rep_error" in r]
+        cap = "no cap" if args.max_rep_error is None else f"cap {args.max_rep_error}, {over_cap} sessions over it"
+        print(f"Frame skipping (max {args.max_skip}, guard band {args.guard_band:g} deg): "
+              f"{inferred} of {frames} frames inferred ({(1 - inferred / max(frames, 1)) * 100:.0f}% skipped)")
+        print(f"Rep error from skipping: {sum(errors)} total, at most {max(errors, default=0)} per session ({cap})")
+
+
+if __name__ == "__main__":
+    main()
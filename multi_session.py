@@ -0,0 +1,246 @@
+import argparse
+import itertools
+import multiprocessing
+import os
+import queue
+import time
+
+import cv2 as cv
+
+from exercise_tracker import ManualClock
+from fitness_data import BODY_GOALS, CATALOG, EXERCISES
+from joint_angles import landmarks_to_array
+from video_source import is_device, open_capture, parse_source
+from warmup import LazyModule
+from workout_engine import WorkoutEngine
+
+# Loaded by the workers that use the default pose_factory, so a stub
+# estimator (tests, benchmarks) never needs MediaPipe
+pose_module = LazyModule("pose_session")
+
+
+# --- Worker Process ---
+# Each worker owns a subset of the video sources: it decodes them, keeps one
+# PoseSession per source (so tracking state never mixes between athletes) and
+# sends (33, 4) landmark arrays back tagged with the session id. Frames are
+# stamped with seconds since the start of their source: video time for files,
+# so a file decoded faster than real time still holds planks and rests for as
+# long as it shows them, and time since opening for cameras.
+def source_worker(assignments, pose_config, mirror, result_queue, stop_event, pose_factory=None):
+    pose_factory = pose_factory or pose_module.PoseSession
+    streams = []
+    for session_id, source in assignments:
+        cap = open_capture(source)
+        if cap is None:
+            result_queue.put(("error", session_id, f"Could not open {source}"))
+            continue
+        fps = None if is_device(source) else cap.get(cv.CAP_PROP_FPS) or 30.0
+        pose_session = pose_factory(**pose_config).warm_up()
+        streams.append([session_id, cap, pose_session, 0, fps, time.monotonic()])
+
+    while streams and not stop_event.is_set():
+        for stream in list(streams):
+            session_id, cap, pose_session, frame_index, fps, opened = stream
+            ret, frame = cap.read()
+            if not ret:
+                cap.release()
+                pose_session.close()
+                streams.remove(stream)
+                result_queue.put(("done", session_id, frame_index))
+                continue
+
+            if mirror:
+                frame = cv.flip(frame, 1)
+            image = cv.cvtColor(frame, cv.COLOR_BGR2RGB)
+            image.flags.writeable = False
+            results = pose_session.process(image)
+            points = landmarks_to_array(results.pose_landmarks.landmark) if results.pose_landmarks else None
+            timestamp = time.monotonic() - opened if fps is None else frame_index / fps
+            result_queue.put(("frame", session_id, frame_index, timestamp, points, pose_session.last_latency_ms))
+            stream[3] = frame_index + 1
+
+    for session_id, cap, pose_session, *_ in streams:
+        cap.release()
+        pose_session.close()
+
+
+# --- Per-Athlete Session ---
+# A WorkoutEngine plus the source it reads from. Headless sessions have no
+# "next exercise" button, so the engine moves on as soon as a set is done.
+# Without a clock of its own, the engine runs on the timestamps of the
+# frames it's given (seconds from the start of the source) rather than on
+# the time they arrive.
+class WorkoutSession:
+    def __init__(self, session_id, source, program, clock=None):
+        self.session_id = session_id
+        self.source = source
+        self.frame_clock = ManualClock() if clock is None else None
+        self.tracker = WorkoutEngine(program, clock=clock or self.frame_clock, auto_advance=True)
+        self.error = None
+        self.events = []
+
+    @property
+    def frames(self):
+        return self.tracker.frames
+
+    @property
+    def frames_with_pose(self):
+        return self.tracker.frames_with_pose
+
+    @property
+    def last_angle(self):
+        return self.tracker.last_angle
+
+    @property
+    def finished(self):
+        return self.tracker.finished
+
+    def handle_landmarks(self, timestamp, points):
+        # Returns the rep event for this frame, if any
+        if self.frame_clock is not None:
+            self.frame_clock.now = timestamp
+        rep = None
+        for event in self.tracker.handle_landmarks(points):
+            if event["type"] == "rep":
+                rep = dict(event, session=self.session_id, time=timestamp)
+                self.events.append(rep)
+        return rep
+
+    def status(self):
+        return dict(self.tracker.status(), session=self.session_id, source=str(self.source), error=self.error)
+
+
+# --- Session Manager ---
+# Runs N video sources at once. Sources are spread round-robin over one worker
+# process per core; results are routed back to their session by id.
+# pose_factory(**pose_config) makes each source's pose estimator in the
+# worker (PoseSession by default), so it must be picklable (a module-level
+# class or function).
+class SessionManager:
+    def __init__(self, workers=None, pose_config=None, mirror=True, pose_factory=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pose_config = pose_config or {"min_detection_confidence": 0.8, "min_tracking_confidence": 0.65, "model_complexity": 1}
+        self.mirror = mirror
+        self.pose_factory = pose_factory
+        self.sessions = {}
+        self.processes = []
+        self.result_queue = None
+        self.stop_event = None
+        self.pending = set()
+        self.ids = itertools.count(1)
+
+    def add_session(self, source, program, session_id=None):
+        if session_id is None:
+            session_id = f"station-{next(self.ids)}"
+        self.sessions[session_id] = WorkoutSession(session_id, source, program)
+        return session_id
+
+    def start(self):
+        ctx = multiprocessing.get_context("spawn")
+        self.result_queue = ctx.Queue(maxsize=1024)
+        self.stop_event = ctx.Event()
+        self.pending = set(self.sessions)
+
+        worker_count = max(1, min(self.workers, len(self.sessions)))
+        assignments = [[] for _ in range(worker_count)]
+        for i, session in enumerate(self.sessions.values()):
+            assignments[i % worker_count].append((session.session_id, session.source))
+
+        for worker_sources in assignments:
+            process = ctx.Process(
+                target=source_worker,
+                args=(worker_sources, self.pose_config, self.mirror, self.result_queue, self.stop_event, self.pose_factory),
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+        return self
+
+    def poll(self, timeout=0.1):
+        # Route every queued result to its session; returns new rep events
+        events = []
+        try:
+            message = self.result_queue.get(timeout=timeout)
+        except queue.Empty:
+            return events
+
+        while message is not None:
+            kind, session_id = message[0], message[1]
+            session = self.sessions[session_id]
+            if kind == "frame":
+                event = session.handle_landmarks(message[3], message[4])
+                if event:
+                    events.append(event)
+            elif kind == "done":
+                self.pending.discard(session_id)
+            elif kind == "error":
+                session.error = message[2]
+                self.pending.discard(session_id)
+            try:
+                message = self.result_queue.get_nowait()
+            except queue.Empty:
+                message = None
+        return events
+
+    def is_running(self):
+        return bool(self.pending) and any(p.is_alive() for p in self.processes)
+
+    def run(self, on_event=None):
+        # Drive all sessions until every source is exhausted
+        while self.is_running():
+            for event in self.poll():
+                if on_event:
+                    on_event(event)
+        for event in self.poll(timeout=0):
+            if on_event:
+                on_event(event)
+        self.stop()
+        return [session.status() for session in self.sessions.values()]
+
+    def stop(self, timeout=2.0):
+        if self.stop_event is not None:
+            self.stop_event.set()
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+
+
+def find_program(goal_key, program_name=None):
+    if program_name is None:
+        return CATALOG.programs_for_goal(goal_key)[0]
+    program = CATALOG.find_program(goal_key, program_name)
+    if program is not None:
+        return program
+    raise KeyError(f"No program named {program_name!r} for goal {goal_key!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several camera or video sources as independent workout sessions.")
+    parser.add_argument("sources", nargs="+", help="Camera indices or video file paths, one per station")
+    parser.add_argument("--exercise", choices=sorted(EXERCISES), help="Single exercise to count on every source")
+    parser.add_argument("--goal", choices=sorted(BODY_GOALS), default="weight_loss")
+    parser.add_argument("--program", help="Program name within the goal (defaults to the first)")
+    parser.add_argument("--sets", type=int, default=1)
+    parser.add_argument("--reps", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (defaults to one per core)")
+    args = parser.parse_args()
+
+    if args.exercise:
+        program = {"name": EXERCISES[args.exercise]["name"], "exercises": [args.exercise], "sets": args.sets, "reps": args.reps}
+    else:
+        program = find_program(args.goal, args.program)
+
+    manager = SessionManager(workers=args.workers)
+    for source in args.sources:
+        manager.add_session(parse_source(source), program)
+
+    manager.start()
+    statuses = manager.run(on_event=lambda e: print(f"[{e['session']}] {EXERCISES[e['exercise']]['name']} set {e['set']} rep {e['rep']}"))
+    for status in statuses:
+        print(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import bisect
+import os
+import threading
+import time
+from collections import deque
+
+from warmup import LazyModule
+
+# Only the overlay needs OpenCV; the app creates its monitor before cv2 is loaded
+cv = LazyModule("cv2")
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels)
+LATENCY_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.075, 0.1, 0.25, 0.5, 1.0]
+
+
+# --- Latency Histogram ---
+# Cumulative bucket counts for export plus a ring of recent samples for the
+# rolling percentiles shown on the overlay.
+class LatencyHistogram:
+    def __init__(self, window=300):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.recent = [0.0] * window
+        self.recent_index = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        self.recent[self.recent_index % len(self.recent)] = seconds
+        self.recent_index += 1
+
+    def percentiles(self, *points):
+        samples = sorted(self.recent[:min(self.recent_index, len(self.recent))])
+        if not samples:
+            return [0.0 for _ in points]
+        return [samples[min(len(samples) - 1, int(p / 100.0 * len(samples)))] for p in points]
+
+
+class FpsCounter:
+    def __init__(self, window_s=1.0):
+        self.window_s = window_s
+        self.ticks = deque()
+
+    def tick(self, now=None):
+        now = time.perf_counter() if now is None else now
+        self.ticks.append(now)
+        while self.ticks and now - self.ticks[0] > self.window_s:
+            self.ticks.popleft()
+
+    def fps(self):
+        if len(self.ticks) < 2:
+            return 0.0
+        span = self.ticks[-1] - self.ticks[0]
+        return (len(self.ticks) - 1) / span if span > 0 else 0.0
+
+
+# --- Performance Monitor ---
+# Hot-path usage is `start = perf.start()` ... `perf.stop("stage", start)`.
+# When disabled both calls return immediately, so leaving the calls in the
+# loop costs a couple of attribute lookups per frame.
+class PerfMonitor:
+    def __init__(self, enabled=False, window=300):
+        self.enabled = enabled
+        self.window = window
+        self.histograms = {}
+        self.fps_counters = {}
+        self.counters = {}
+        self.gauge_sources = []
+        self.overlay_text = []
+        self.overlay_updated = 0.0
+
+    def start(self):
+        if not self.enabled:
+            return 0
+        return time.perf_counter()
+
+    def stop(self, stage, start):
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram(self.window)
+        histogram.observe(time.perf_counter() - start)
+
+    def tick(self, loop):
+        if not self.enabled:
+            return
+        counter = self.fps_counters.get(loop)
+        if counter is None:
+            counter = self.fps_counters[loop] = FpsCounter()
+        counter.tick()
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_gauge_source(self, source):
+        # source() -> {name: value}, read at export/overlay time (e.g. queue stats)
+        self.gauge_sources.append(source)
+
+    def remove_gauge_source(self, source):
+        if source in self.gauge_sources:
+            self.gauge_sources.remove(source)
+
+    def gauges(self):
+        values = {}
+        for source in list(self.gauge_sources):
+            values.update(source())
+        return values
+
+    def draw_overlay(self, image, refresh_s=0.5):
+        # Text is rebuilt at most every refresh_s; drawing it is a few putText
+        # calls. `image` is RGB (the display buffer)
+        if not self.enabled:
+            return image
+        now = time.perf_counter()
+        if now - self.overlay_updated > refresh_s:
+            self.overlay_updated = now
+            lines = [f"{loop} {counter.fps():.1f} fps" for loop, counter in list(self.fps_counters.items())]
+            for stage, histogram in list(self.histograms.items()):
+                p50, p95 = histogram.percentiles(50, 95)
+                lines.append(f"{stage} p50 {p50 * 1000:.1f} / p95 {p95 * 1000:.1f} ms")
+            gauges = self.gauges()
+            dropped = sum(v for k, v in gauges.items() if k.startswith("dropped"))
+            if gauges:
+                lines.append(f"dropped {dropped}")
+            self.overlay_text = lines
+
+        x = image.shape[1] - 330
+        for i, line in enumerate(self.overlay_text):
+            cv.putText(image, line, (x, 20 + i * 18), cv.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 255), 1)
+        return image
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP fitness_stage_latency_seconds Per-stage latency of the frame loop",
+            "# TYPE fitness_stage_latency_seconds histogram"
+        ]
+        for stage, histogram in list(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ["+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(f'fitness_stage_latency_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'fitness_stage_latency_seconds_sum{{stage="{stage}"}} {histogram.total:.6f}')
+            lines.append(f'fitness_stage_latency_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        lines += ["# HELP fitness_loop_fps Iterations per second of each loop", "# TYPE fitness_loop_fps gauge"]
+        for loop, counter in list(self.fps_counters.items()):
+            lines.append(f'fitness_loop_fps{{loop="{loop}"}} {counter.fps():.2f}')
+
+        lines += ["# HELP fitness_events_total Event counters", "# TYPE fitness_events_total counter"]
+        for name, value in list(self.counters.items()):
+            lines.append(f'fitness_events_total{{event="{name}"}} {value}')
+
+        lines += ["# HELP fitness_pipeline Frame pipeline counters and queue depths", "# TYPE fitness_pipeline gauge"]
+        for name, value in self.gauges().items():
+            lines.append(f'fitness_pipeline{{metric="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+# --- Prometheus Text File Export ---
+# Writes the metrics to a local file (node_exporter textfile style) on a
+# background thread; the file is replaced atomically so scrapers never see
+# a partial write.
+class PrometheusExporter:
+    def __init__(self, monitor, path, interval_s=5.0):
+        self.monitor = monitor
+        self.path = path
+        self.interval_s = interval_s
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.monitor.enabled and self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="metrics-export", daemon=True)
+            self.thread.start()
+        return self
+
+    def run(self):
+        while not self.stop_event.wait(self.interval_s):
+            self.write()
+
+    def write(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.monitor.prometheus_text())
+        os.replace(tmp_path, self.path)
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+            self.write()
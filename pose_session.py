@@ -0,0 +1,166 @@
+import time
+from collections import deque
+
+import cv2 as cv
+import mediapipe as mp
+import numpy as np
+
+mp_pose = mp.solutions.pose
+
+
+# --- Landmark-Guided ROI ---
+# Keeps a padded box around the athlete from the previous frame's landmarks
+# and runs inference on that crop, downscaled to at most max_side pixels.
+# Landmarks are mapped back to full-frame coordinates in place, so callers
+# never see crop coordinates. The box only moves when the athlete nears its
+# edge, which keeps MediaPipe's own tracker looking at a stable view.
+class RoiTracker:
+    def __init__(self, padding=0.3, max_side=480, min_visibility=0.5, edge_margin=0.08):
+        self.padding = padding
+        self.max_side = max_side
+        self.min_visibility = min_visibility
+        self.edge_margin = edge_margin
+        self.box = None
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.lost = 0
+
+    def process(self, pose, image):
+        height, width = image.shape[:2]
+        if self.box is None:
+            results = pose.process(image)
+            self.full_frames += 1
+        else:
+            x0, y0, x1, y1 = self.box
+            crop = image[y0:y1, x0:x1]
+            scale = self.max_side / max(x1 - x0, y1 - y0)
+            if scale < 1.0:
+                crop = cv.resize(crop, (max(1, round((x1 - x0) * scale)), max(1, round((y1 - y0) * scale))), interpolation=cv.INTER_AREA)
+            else:
+                crop = np.ascontiguousarray(crop)
+            crop.flags.writeable = False
+            results = pose.process(crop)
+            if results.pose_landmarks:
+                self.roi_frames += 1
+                self.to_full_frame(results.pose_landmarks, x0, y0, x1 - x0, y1 - y0, width, height)
+            else:
+                # Lost the athlete: forget the box and detect on the full frame
+                self.lost += 1
+                self.box = None
+                results = pose.process(image)
+                self.full_frames += 1
+
+        if results.pose_landmarks:
+            self.update_box(results.pose_landmarks, width, height)
+        else:
+            self.box = None
+        return results
+
+    def to_full_frame(self, pose_landmarks, x0, y0, crop_width, crop_height, width, height):
+        for lm in pose_landmarks.landmark:
+            lm.x = (lm.x * crop_width + x0) / width
+            lm.y = (lm.y * crop_height + y0) / height
+            lm.z = lm.z * crop_width / width
+
+    def update_box(self, pose_landmarks, width, height):
+        xs = [lm.x for lm in pose_landmarks.landmark if lm.visibility >= self.min_visibility]
+        ys = [lm.y for lm in pose_landmarks.landmark if lm.visibility >= self.min_visibility]
+        if len(xs) < 4:
+            self.box = None
+            return
+        left, right = min(xs) * width, max(xs) * width
+        top, bottom = min(ys) * height, max(ys) * height
+
+        if self.box is not None:
+            # Keep the current box while the athlete stays clear of its edges
+            x0, y0, x1, y1 = self.box
+            margin_x, margin_y = (x1 - x0) * self.edge_margin, (y1 - y0) * self.edge_margin
+            inside = left > x0 + margin_x and right < x1 - margin_x and top > y0 + margin_y and bottom < y1 - margin_y
+            too_loose = (right - left) * (bottom - top) < 0.15 * (x1 - x0) * (y1 - y0)
+            if inside and not too_loose:
+                return
+
+        pad = self.padding * max(right - left, bottom - top)
+        x0, x1 = max(0, int(left - pad)), min(width, int(right + pad) + 1)
+        y0, y1 = max(0, int(top - pad)), min(height, int(bottom + pad) + 1)
+        # A box covering most of the frame saves nothing over full-frame inference
+        if (x1 - x0) * (y1 - y0) > 0.8 * width * height:
+            self.box = None
+        else:
+            self.box = (x0, y0, x1, y1)
+
+    def reset(self):
+        self.box = None
+
+
+# --- Managed Pose Session ---
+# One MediaPipe Pose graph per workout. Keeping it alive between frames avoids
+# reloading the model and lets MediaPipe use its cheaper tracking path instead
+# of running full detection on every frame.
+class PoseSession:
+    def __init__(self, min_detection_confidence=0.8, min_tracking_confidence=0.65, model_complexity=1, latency_window=300,
+                 roi_cropping=False):
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self.model_complexity = model_complexity
+        self.roi = RoiTracker() if roi_cropping else None
+        self.pose = None
+        self.latencies = deque(maxlen=latency_window)
+        self.last_latency_ms = 0.0
+        self.frames_processed = 0
+
+    def open(self):
+        if self.pose is None:
+            self.pose = mp_pose.Pose(
+                model_complexity=self.model_complexity,
+                min_detection_confidence=self.min_detection_confidence,
+                min_tracking_confidence=self.min_tracking_confidence
+            )
+        return self
+
+    def warm_up(self, width=640, height=480):
+        # Push one blank frame through the graph so the first real frame
+        # doesn't pay for model initialisation. Not counted in the stats.
+        self.open()
+        blank = np.zeros((height, width, 3), dtype=np.uint8)
+        blank.flags.writeable = False
+        self.pose.process(blank)
+        return self
+
+    def process(self, rgb_image):
+        if self.pose is None:
+            self.open()
+        start = time.perf_counter()
+        if self.roi is not None:
+            results = self.roi.process(self.pose, rgb_image)
+        else:
+            results = self.pose.process(rgb_image)
+        self.last_latency_ms = (time.perf_counter() - start) * 1000.0
+        self.latencies.append(self.last_latency_ms)
+        self.frames_processed += 1
+        return results
+
+    def latency_stats(self):
+        if not self.latencies:
+            return {"frames": self.frames_processed, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        samples = np.fromiter(self.latencies, dtype=np.float64)
+        return {
+            "frames": self.frames_processed,
+            "mean_ms": float(samples.mean()),
+            "p50_ms": float(np.percentile(samples, 50)),
+            "p95_ms": float(np.percentile(samples, 95)),
+            "max_ms": float(samples.max())
+        }
+
+    def close(self):
+        if self.roi is not None:
+            self.roi.reset()
+        if self.pose is not None:
+            self.pose.close()
+            self.pose = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
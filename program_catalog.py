@@ -0,0 +1,232 @@
+import gc
+import json
+import os
+import re
+import time
+
+DIFFICULTIES = ("beginner", "intermediate", "advanced")
+DIFFICULTY_SET = set(DIFFICULTIES)
+
+# field -> required type, for each goal and each program in the file
+GOAL_FIELDS = {"name": str, "description": str, "calorie_adjustment": int, "programs": list}
+PROGRAM_FIELDS = {"name": str, "difficulty": str, "exercises": list, "sets": int, "reps": int}
+FIELD_TYPES = {"goal": tuple(GOAL_FIELDS.values()), "program": tuple(PROGRAM_FIELDS.values())}
+
+
+class CatalogError(ValueError):
+    def __init__(self, path, problems):
+        self.problems = problems
+        shown = "\n  ".join(problems[:20])
+        more = f"\n  ... and {len(problems) - 20} more" if len(problems) > 20 else ""
+        super().__init__(f"{path}: {len(problems)} problem(s) in the program catalog\n  {shown}{more}")
+
+
+SLUG_SEPARATORS = re.compile(r"[^a-z0-9]+")
+
+
+def program_id(goal_key, name):
+    # "weight_loss", "Beginner Fat Burn" -> "weight_loss/beginner-fat-burn"
+    return f"{goal_key}/{SLUG_SEPARATORS.sub('-', name.lower()).strip('-')}"
+
+
+def fold(name):
+    return " ".join(name.split()).lower()
+
+
+def field_problems(value, fields, what):
+    if type(value) is not dict:
+        return [": expected an object"]
+    # Fast path for the usual case, where every field has the right type
+    if tuple(map(type, map(value.get, fields))) == FIELD_TYPES[what]:
+        return []
+    # Exact types, as json gives them: a bool where an int belongs is a mistake
+    return [f".{field}: expected {kind.__name__}, got {value.get(field)!r}"
+            for field, kind in fields.items() if type(value.get(field)) is not kind]
+
+
+def program_problems(program, exercises):
+    # What's wrong with one program, as messages relative to it
+    problems = field_problems(program, PROGRAM_FIELDS, "program")
+    if problems:
+        return problems
+    if program["difficulty"] not in DIFFICULTY_SET:
+        problems.append(f".difficulty: {program['difficulty']!r} is not one of {', '.join(DIFFICULTIES)}")
+    problems.extend(f".{field}: must be at least 1" for field in ("sets", "reps") if program[field] < 1)
+    if not program["exercises"]:
+        problems.append(".exercises: a program needs at least one exercise")
+    problems.extend(f".exercises: unknown exercise {key!r}" for key in program["exercises"]
+                    if type(key) is not str or key not in exercises)
+    return problems
+
+
+def build_catalog(data, exercises):
+    # Validates the parsed file against `exercises` and builds every index in
+    # one pass. Returns (goals, indexes) or raises CatalogError listing all
+    # problems, so a bad file never half-replaces a good catalog.
+    if type(data) is not dict or type(data.get("goals")) is not dict:
+        raise CatalogError("catalog", ['top level: expected {"goals": {...}}'])
+    problems = []
+    goals, by_goal_name, by_id, by_goal_program = {}, {}, {}, {}
+    by_name, by_exercise, by_difficulty = {}, {}, {difficulty: [] for difficulty in DIFFICULTIES}
+
+    for goal_key, goal in data["goals"].items():
+        found = field_problems(goal, GOAL_FIELDS, "goal")
+        if found:
+            problems.extend(f"goals.{goal_key}{problem}" for problem in found)
+            continue
+        folded = fold(goal["name"])
+        if folded in by_goal_name:
+            problems.append(f"goals.{goal_key}.name: {goal['name']!r} is already used by goal {by_goal_name[folded]!r}")
+        by_goal_name[folded] = goal_key
+        if not goal["programs"]:
+            problems.append(f"goals.{goal_key}.programs: a goal needs at least one program")
+
+        programs = []
+        for i, program in enumerate(goal["programs"]):
+            found = program_problems(program, exercises)
+            if found:
+                problems.extend(f"goals.{goal_key}.programs[{i}]{problem}" for problem in found)
+                continue
+            folded = fold(program["name"])
+            if (goal_key, folded) in by_goal_program:
+                problems.append(f"goals.{goal_key}.programs[{i}].name: {program['name']!r} appears twice in the goal")
+            # Loaded programs know their id and goal, so a program dict alone
+            # is enough to find it again
+            program = dict(program, goal=goal_key)
+            if "id" not in program:
+                program["id"] = program_id(goal_key, program["name"])
+            if program["id"] in by_id:
+                problems.append(f"goals.{goal_key}.programs[{i}].id: {program['id']!r} is already used")
+            by_id[program["id"]] = program
+            by_goal_program[goal_key, folded] = program
+            programs.append(program)
+            by_name.setdefault(folded, []).append(program)
+            by_difficulty[program["difficulty"]].append(program)
+            for key in set(program["exercises"]):
+                by_exercise.setdefault(key, []).append(program)
+        goals[goal_key] = dict(goal, programs=programs)
+
+    if problems:
+        raise CatalogError("catalog", problems)
+    by_goal = {fold(key): key for key in goals}
+    by_goal.update(by_goal_name)
+    indexes = {
+        "goal_keys": by_goal,
+        "goal_labels": list(goals) + [goal["name"] for goal in goals.values()],
+        "programs": by_id,
+        "program_names": by_name,
+        "goal_programs": by_goal_program,
+        "exercise_programs": by_exercise,
+        "difficulty_programs": by_difficulty,
+        "exercise_names": {fold(exercise["name"]): key for key, exercise in exercises.items()}
+    }
+    return goals, indexes
+
+
+# --- Program Catalog ---
+# Goals and their programs, loaded from a JSON file and validated against
+# the exercise definitions: every program must name known exercises and
+# have a difficulty, positive sets and reps, and a name unique in its goal.
+# Every lookup (goal by key or name, program by id, by name, by exercise,
+# by difficulty) is a dict lookup, so it costs the same with thousands of
+# programs. `goals` keeps the original BODY_GOALS shape and is updated in
+# place on reload, so code holding a reference to it sees the new data.
+# check() reloads the file if it has changed since the last load; call it
+# on the thread that reads the catalog (the app polls it from Tk). A file
+# that fails to parse or validate is reported and the old catalog is kept.
+class ProgramCatalog:
+    def __init__(self, path, exercises):
+        self.path = path
+        self.exercises = exercises
+        self.goals = {}
+        self.indexes = {}
+        self.signature = None
+        self.version = 0
+        self.error = None
+        self.load_seconds = None
+        self.reload()
+
+    def file_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self):
+        start = time.perf_counter()
+        self.signature = self.file_signature()
+        # Loading makes a burst of small objects that all live on; collector
+        # passes over them halfway through would only slow it down
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            goals, indexes = build_catalog(data, self.exercises)
+        except CatalogError as e:
+            raise CatalogError(self.path, e.problems) from None
+        finally:
+            if collecting:
+                gc.enable()
+        self.goals.clear()
+        self.goals.update(goals)
+        self.indexes = indexes
+        self.version += 1
+        self.error = None
+        self.load_seconds = time.perf_counter() - start
+        return self
+
+    def check(self):
+        # -> True if the catalog was reloaded
+        try:
+            if self.file_signature() == self.signature:
+                return False
+            self.reload()
+            return True
+        except (OSError, ValueError) as e:
+            # Also covers a file caught half-written; it's retried once it changes again
+            if str(e) != str(self.error):
+                print(f"Keeping the current program catalog: {e}")
+            self.error = e
+            return False
+
+    # --- Lookups ---
+    def goal(self, goal_key):
+        return self.goals.get(goal_key)
+
+    def goal_key(self, key_or_name):
+        # Goal key or display name, any case -> key (None if unknown)
+        return self.indexes["goal_keys"].get(fold(key_or_name))
+
+    def goal_labels(self):
+        # Every goal key and display name, e.g. for matching user input
+        return self.indexes["goal_labels"]
+
+    def programs_for_goal(self, goal_key):
+        return self.goals[goal_key]["programs"] if goal_key in self.goals else []
+
+    def program(self, program_id):
+        return self.indexes["programs"].get(program_id)
+
+    def find_program(self, goal_key, name):
+        return self.indexes["goal_programs"].get((goal_key, fold(name)))
+
+    def programs_named(self, name):
+        return self.indexes["program_names"].get(fold(name), [])
+
+    def programs_with_exercise(self, exercise_key):
+        return self.indexes["exercise_programs"].get(exercise_key, [])
+
+    def programs_by_difficulty(self, difficulty):
+        return self.indexes["difficulty_programs"].get(difficulty.lower(), [])
+
+    def exercise_key(self, key_or_name):
+        if key_or_name in self.exercises:
+            return key_or_name
+        return self.indexes["exercise_names"].get(fold(key_or_name))
+
+    def stats(self):
+        return {
+            "catalog_version": self.version,
+            "catalog_goals": len(self.goals),
+            "catalog_programs": len(self.indexes["programs"]),
+            "catalog_load_ms": self.load_seconds * 1000
+        }
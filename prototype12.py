@@ -1,15 +1,38 @@
-import cv2 as cv
-import mediapipe as mp
-import numpy as np
 import math
+import os
 import time
 import random
+import threading
 import customtkinter as ctk
-from PIL import Image, ImageTk
 
-# Initialize MediaPipe
-mp_drawing = mp.solutions.drawing_utils
-mp_pose = mp.solutions.pose
+from buffer_pool import BufferPool, read_only
+from calorie_planner import ACTIVITY_MULTIPLIERS, calorie_plan
+from fitness_data import CATALOG, EXERCISES, MOTIVATIONAL_QUOTES
+from frame_pacer import FramePacer
+from inference_scheduler import InferenceScheduler
+from joint_angles import landmarks_to_array
+from landmark_recording import LandmarkRecorder
+from perf_monitor import PerfMonitor, PrometheusExporter
+from screen_manager import ScreenManager
+from video_source import DeviceDiscovery, VideoSource
+from virtual_list import VirtualList
+from warmup import BackgroundWarmup, LazyModule
+from workout_analytics import WorkoutAnalytics
+from workout_engine import WorkoutEngine
+from workout_history import WorkoutHistory
+
+# OpenCV, MediaPipe and the modules built on them are only needed once a
+# workout starts. They stay unloaded until then so the menu opens quickly;
+# the warm-up imports them while the user picks a goal and program.
+cv = LazyModule("cv2")
+mp = LazyModule("mediapipe")
+frame_display = LazyModule("frame_display")
+frame_pipeline = LazyModule("frame_pipeline")
+pose_session = LazyModule("pose_session")
+VISION_MODULES = (cv, mp, pose_session, frame_pipeline, frame_display)
+
+# How often to look for changes to the program catalog file
+CATALOG_POLL_MS = 2000
 
 # Set appearance mode and custom monoblack theme
 ctk.set_appearance_mode("dark")
@@ -25,169 +48,77 @@ MONOBLACK_COLORS = {
 }
 ctk.set_default_color_theme("green") # Still use green for button hover/click effects
 
-# --- Exercise and Motivational Data ---
-# Body goal types with programs and descriptions
-BODY_GOALS = {
-    "weight_loss": {
-        "name": "Weight Loss",
-        "description": "High-rep, full-body exercises to burn calories.",
-        "programs": [
-            {"name": "Beginner Fat Burn", "exercises": ["squat", "bicep_curl"], "sets": 3, "reps": 12},
-            {"name": "Intermediate Cardio Blast", "exercises": ["squat", "shoulder_press", "bicep_curl"], "sets": 4, "reps": 15},
-            {"name": "Advanced HIIT", "exercises": ["squat", "shoulder_press"], "sets": 5, "reps": 20}
-        ],
-        "calorie_adjustment": -500
-    },
-    "muscle_gain": {
-        "name": "Muscle Gain",
-        "description": "Strength training with progressive overload.",
-        "programs": [
-            {"name": "Beginner Strength", "exercises": ["bicep_curl", "shoulder_press"], "sets": 3, "reps": 8},
-            {"name": "Intermediate Hypertrophy", "exercises": ["bicep_curl", "shoulder_press", "squat"], "sets": 4, "reps": 10},
-            {"name": "Advanced Power Building", "exercises": ["squat", "shoulder_press"], "sets": 5, "reps": 6}
-        ],
-        "calorie_adjustment": 300
-    },
-    "endurance": {
-        "name": "Endurance",
-        "description": "Building muscular endurance and stamina.",
-        "programs": [
-            {"name": "Beginner Endurance", "exercises": ["squat", "bicep_curl"], "sets": 3, "reps": 15},
-            {"name": "Intermediate Stamina", "exercises": ["squat", "shoulder_press", "bicep_curl"], "sets": 4, "reps": 20},
-            {"name": "Advanced Marathon", "exercises": ["squat", "shoulder_press"], "sets": 5, "reps": 25}
-        ],
-        "calorie_adjustment": 0
-    },
-    "toning": {
-        "name": "Toning",
-        "description": "Sculpting and defining muscles.",
-        "programs": [
-            {"name": "Beginner Tone", "exercises": ["bicep_curl", "squat"], "sets": 3, "reps": 12},
-            {"name": "Intermediate Sculpt", "exercises": ["bicep_curl", "shoulder_press", "squat"], "sets": 4, "reps": 15},
-            {"name": "Advanced Definition", "exercises": ["shoulder_press", "squat"], "sets": 4, "reps": 15}
-        ],
-        "calorie_adjustment": 0
-    },
-    "athletic": {
-        "name": "Athletic Build",
-        "description": "Compound exercises for overall strength.",
-        "programs": [
-            {"name": "Beginner Athletic", "exercises": ["push_up", "squat"], "sets": 3, "reps": 8},
-            {"name": "Intermediate Athletic", "exercises": ["push_up", "squat", "bicep_curl"], "sets": 4, "reps": 10},
-            {"name": "Advanced Athletic", "exercises": ["push_up", "squat", "shoulder_press"], "sets": 4, "reps": 12}
-        ],
-        "calorie_adjustment": 0
-    },
-    "core_strength": {
-        "name": "Core Strength",
-        "description": "Building a strong core and abs.",
-        "programs": [
-            {"name": "Beginner Core", "exercises": ["plank", "squat"], "sets": 3, "reps": 10},
-            {"name": "Intermediate Core", "exercises": ["plank", "squat", "push_up"], "sets": 4, "reps": 12},
-            {"name": "Advanced Core", "exercises": ["plank", "push_up", "squat"], "sets": 4, "reps": 15}
-        ],
-        "calorie_adjustment": 0
-    },
-    "flexibility": {
-        "name": "Flexibility",
-        "description": "Improving range of motion and flexibility.",
-        "programs": [
-            {"name": "Beginner Flexibility", "exercises": ["stretch", "squat"], "sets": 3, "reps": 8},
-            {"name": "Intermediate Flexibility", "exercises": ["stretch", "squat", "push_up"], "sets": 3, "reps": 10},
-            {"name": "Advanced Flexibility", "exercises": ["stretch", "push_up", "squat"], "sets": 4, "reps": 12}
-        ],
-        "calorie_adjustment": 0
-    }
-}
-
-# Exercise definitions
-EXERCISES = {
-    "bicep_curl": {
-        "name": "Bicep Curl",
-        "logic": "bicep_curl_logic",
-        "landmarks": ["LEFT_SHOULDER", "LEFT_ELBOW", "LEFT_WRIST"],
-        "instructions": "1. Stand straight with arms by your side\n2. Curl your forearm up towards your shoulder\n3. Slowly lower back to starting position"
-    },
-    "shoulder_press": {
-        "name": "Shoulder Press",
-        "logic": "shoulder_press_logic",
-        "landmarks": ["LEFT_SHOULDER", "LEFT_ELBOW", "LEFT_WRIST"],
-        "instructions": "1. Start with elbows bent at 90 degrees\n2. Press upward until arms are fully extended\n3. Slowly return to starting position"
-    },
-    "squat": {
-        "name": "Squat",
-        "logic": "squat_logic",
-        "landmarks": ["LEFT_HIP", "LEFT_KNEE", "LEFT_ANKLE"],
-        "instructions": "1. Stand with feet shoulder-width apart\n2. Lower your hips as if sitting in a chair\n3. Keep your chest up and knees behind toes\n4. Return to standing position"
-    },
-    "push_up": {
-        "name": "Push Up",
-        "logic": "push_up_logic",
-        "landmarks": ["LEFT_SHOULDER", "LEFT_ELBOW", "LEFT_WRIST"],
-        "instructions": "1. Start in a plank position with hands shoulder-width apart\n2. Lower your body until chest nearly touches the floor\n3. Push back up to the starting position"
-    },
-    "plank": {
-        "name": "Plank",
-        "logic": "plank_logic",
-        "landmarks": ["LEFT_SHOULDER", "LEFT_HIP", "LEFT_ANKLE"],
-        "instructions": "1. Start in a push-up position with weight on forearms\n2. Keep your body in a straight line from head to heels\n3. Hold this position for the required time"
-    },
-    "stretch": {
-        "name": "Full Body Stretch",
-        "logic": "stretch_logic",
-        "landmarks": ["LEFT_SHOULDER", "LEFT_HIP", "LEFT_ANKLE"],
-        "instructions": "1. Stand with feet shoulder-width apart\n2. Reach arms overhead and stretch upward\n3. Bend at the waist and reach toward your toes\n4. Return to standing position"
-    }
-}
-
-MOTIVATIONAL_QUOTES = [
-    "KEEP GOING! YOU'VE GOT THIS!",
-    "DON'T GIVE UP! YOU'RE STRONGER THAN YOU THINK!",
-    "PUSH THROUGH THE PAIN! GROWTH IS ON THE OTHER SIDE!",
-    "ONE MORE REP! YOU CAN DO IT!",
-    "YOUR FUTURE SELF WILL THANK YOU!",
-    "STRENGTH DOESN'T COME FROM WHAT YOU CAN DO, IT COMES FROM OVERCOMING WHAT YOU ONCE THOUGHT YOU COULDN'T!",
-    "THE ONLY BAD WORKOUT IS THE ONE THAT DIDN'T HAPPEN!"
-]
-
 # --- Main Application Class ---
-class FitnessApp:
+class FitnessApp(WorkoutEngine):
     def __init__(self):
+        # The user moves on with the "next exercise" button; every engine
+        # event (rep, set complete, exercise change) goes to the history
+        WorkoutEngine.__init__(self, auto_advance=False, on_event=self.record_event)
         self.root = ctk.CTk()
         self.root.title("AI Fitness Coach")
         self.root.geometry("1200x700")
         self.root.minsize(1000, 600)
         self.root.configure(fg_color=MONOBLACK_COLORS["background"])
         
-        # Initialize variables
-        self.counter = 0
-        self.stage = None
-        self.last_rep_time = time.time()
-        self.LONG_REST_THRESHOLD = 5
-        self.motivation_played = False
-        self.current_exercise = None
-        self.current_quote = "SELECT YOUR FITNESS GOAL TO BEGIN"
-        self.quote_display_time = time.time()
+        # Initialize variables (exercise state lives in WorkoutEngine)
         self.cap = None
         self.is_camera_active = False
         self.user_goal = None
-        self.selected_program = None
-        self.current_set = 1
         self.workout_in_progress = False
-        self.exercise_index = 0
-        
-        # Load custom fonts
+        self.pose_session = None
+        self.pipeline = None
+        # Camera index, video file or stream URL; unset uses the first camera found
+        self.device_discovery = DeviceDiscovery()
+        self.video_source = VideoSource(os.environ.get("FITNESS_VIDEO_SOURCE") or None, self.device_discovery,
+                                        loop=os.environ.get("FITNESS_VIDEO_LOOP") == "1")
+        self.frame_pool = BufferPool()
+        self.display_fps = self.video_source.settings["fps"]
+        self.pacer = None
+        self.display_job = None
+        self.warmup = None
+        self.state_lock = threading.Lock()
+        # Workout history, written behind the frame loop by its own thread
+        self.user = os.environ.get("FITNESS_USER", "local")
+        self.history = WorkoutHistory(os.environ.get("FITNESS_HISTORY", "workout_history.db"))
+        self.history_session = None
+        # Dashboard rollups, updated as each workout is committed
+        self.analytics = WorkoutAnalytics(self.history)
+        self.reps_text = None
+        # Landmark recordings for replay, off unless FITNESS_RECORD=1
+        self.record_sessions = os.environ.get("FITNESS_RECORD") == "1"
+        self.recordings_dir = os.environ.get("FITNESS_RECORDINGS", "recordings")
+        self.recorder = None
+        # Live instrumentation, off unless FITNESS_PERF=1
+        self.perf = PerfMonitor(enabled=os.environ.get("FITNESS_PERF") == "1")
+        self.perf.add_gauge_source(self.history.stats)
+        self.perf.add_gauge_source(CATALOG.stats)
+        self.perf_overlay = True
+        self.metrics_path = "metrics.prom"
+        self.metrics_exporter = None
+        self.pose_config = {
+            "min_detection_confidence": 0.8,
+            "min_tracking_confidence": 0.65,
+            "model_complexity": 1,
+            # Crop inference to the athlete's box; see `benchmarks.py roi`
+            "roi_cropping": False
+        }
+        # Predict landmarks between inferences during slow movement;
+        # max_skip=1 runs the model on every frame. Once skipping may have
+        # miscounted max_rep_error reps in a workout, it turns itself off.
+        self.frame_skip = {"max_skip": 3, "guard_band": 12.0, "max_rep_error": 1}
+        self.scheduler = None
+        self.last_pose_landmarks = None
+        
+        # Load custom fonts once; every screen shares them
         self.font_title = ctk.CTkFont(family="Inter", size=36, weight="bold")
         self.font_header = ctk.CTkFont(family="Inter", size=24, weight="bold")
         self.font_medium = ctk.CTkFont(family="Inter", size=16, weight="bold")
         self.font_small = ctk.CTkFont(family="Inter", size=12)
+        self.font_exercise = ctk.CTkFont(family="Inter", size=28, weight="bold")
+        self.font_reps = ctk.CTkFont(family="Inter", size=70, weight="bold")
         
         # Setup the main UI
         self.setup_ui()
-        
-    def clear_frame(self, frame):
-        for widget in frame.winfo_children():
-            widget.destroy()
 
     def setup_ui(self):
         self.root.grid_columnconfigure(0, weight=1)
@@ -198,13 +129,37 @@ class FitnessApp:
         self.main_container.grid_columnconfigure(0, weight=1)
         self.main_container.grid_rowconfigure(0, weight=1)
         
+        # Screens are built on first visit, then only shown, hidden and updated
+        self.screens = ScreenManager(self.main_container)
+        self.screens.register("menu", self.build_main_menu)
+        self.screens.register("goals", self.build_goal_selection, self.refresh_goal_selection)
+        self.screens.register("calories", self.build_calorie_tracker, self.refresh_calorie_tracker)
+        self.screens.register("programs", self.build_program_selection, self.refresh_program_selection)
+        self.screens.register("preview", self.build_workout_preview, self.refresh_workout_preview)
+        self.screens.register("workout", self.build_workout_ui, self.refresh_workout_ui)
+        self.screens.register("finish", self.build_finish_screen, self.refresh_finish_screen)
+        
         self.setup_main_menu()
+        self.catalog_job = self.root.after(CATALOG_POLL_MS, self.check_catalog)
+
+    def check_catalog(self):
+        # Hot reload: screens that list goals or programs pick up the new
+        # catalog when they refresh, the one on screen right away
+        if CATALOG.check():
+            if self.screens.showing("programs") and CATALOG.goal(self.user_goal) is None:
+                self.screens.show("goals")
+            elif any(self.screens.showing(name) for name in ("goals", "programs", "calories")):
+                self.screens.show(self.screens.current[0])
+        self.catalog_job = self.root.after(CATALOG_POLL_MS, self.check_catalog)
 
     def setup_main_menu(self):
-        self.clear_frame(self.main_container)
-        
+        # Backed out of a workout before starting it: give the camera back
+        self.close_warmup()
+        self.screens.show("menu")
+
+    def build_main_menu(self, screen):
         # Main Title Frame
-        title_frame = ctk.CTkFrame(self.main_container, fg_color="transparent")
+        title_frame = ctk.CTkFrame(screen, fg_color="transparent")
         title_frame.grid(row=0, column=0, pady=(20, 0), sticky="ew")
         title_frame.grid_columnconfigure(0, weight=1)
         
@@ -215,7 +170,7 @@ class FitnessApp:
         subtitle_label.grid(row=1, column=0, pady=(0, 20))
         
         # Main Menu Buttons
-        menu_frame = ctk.CTkFrame(self.main_container, fg_color="transparent")
+        menu_frame = ctk.CTkFrame(screen, fg_color="transparent")
         menu_frame.grid(row=1, column=0, pady=10)
         
         workout_btn = ctk.CTkButton(menu_frame, text="Start Workout", command=self.setup_goal_selection, font=self.font_medium, height=40, width=200)
@@ -225,10 +180,12 @@ class FitnessApp:
         calorie_btn.pack(side="left", padx=10, pady=10)
         
     def setup_goal_selection(self):
-        self.clear_frame(self.main_container)
-        
+        self.start_warmup()
+        self.screens.show("goals")
+
+    def build_goal_selection(self, screen):
         # Header
-        header_frame = ctk.CTkFrame(self.main_container, fg_color="transparent")
+        header_frame = ctk.CTkFrame(screen, fg_color="transparent")
         header_frame.grid(row=0, column=0, pady=(20, 0), sticky="ew")
         header_frame.grid_columnconfigure(0, weight=1)
         
@@ -238,57 +195,76 @@ class FitnessApp:
         subtitle_label = ctk.CTkLabel(header_frame, text="Choose a goal to get your custom workout plan.", font=self.font_medium, text_color=MONOBLACK_COLORS["text_gray"])
         subtitle_label.grid(row=1, column=0, pady=(0, 20))
         
-        # Goals Frame with improved spacing and a fixed height for scrolling
-        goals_frame = ctk.CTkScrollableFrame(self.main_container, fg_color="transparent", height=400)
-        goals_frame.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
-        goals_frame.grid_columnconfigure((0, 1, 2), weight=1, minsize=250)
-        
-        row, col = 0, 0
-        for goal_key, goal_data in BODY_GOALS.items():
-            goal_card = ctk.CTkFrame(
-                goals_frame, 
-                corner_radius=15, 
-                fg_color=MONOBLACK_COLORS["card_bg"],
-                border_width=2,
-                border_color=MONOBLACK_COLORS["card_border"]
-            )
-            goal_card.grid(row=row, column=col, padx=15, pady=15, sticky="nsew")
-            
-            goal_card.grid_columnconfigure(0, weight=1)
-            
-            name_label = ctk.CTkLabel(goal_card, text=goal_data["name"], font=self.font_medium)
-            name_label.grid(row=0, column=0, pady=(20, 5))
-            
-            desc_label = ctk.CTkLabel(goal_card, text=goal_data["description"], font=self.font_small, wraplength=200, justify="center", text_color=MONOBLACK_COLORS["text_gray"])
-            desc_label.grid(row=1, column=0, padx=10, pady=(0, 10))
-            
-            select_btn = ctk.CTkButton(
-                goal_card, 
-                text="Select", 
-                command=lambda gk=goal_key: self.select_goal(gk), 
-                height=30,
-                corner_radius=8,
-                fg_color=MONOBLACK_COLORS["accent_green"],
-                hover_color="#458a48"
-            )
-            select_btn.grid(row=2, column=0, pady=(0, 15), padx=20, sticky="ew")
-
-            col += 1
-            if col > 2: # 3 cards per row
-                col = 0
-                row += 1
+        self.goal_search = ctk.CTkEntry(header_frame, placeholder_text="Search goals", width=300)
+        self.goal_search.grid(row=2, column=0, pady=(0, 10))
+        self.goal_search.bind("<KeyRelease>", lambda event: self.goal_list.filter(self.goal_search.get()))
+        
+        # Goal cards, 3 per row; only the ones in view exist as widgets
+        self.goal_list = VirtualList(
+            screen,
+            self.make_goal_card,
+            self.fill_goal_card,
+            row_height=180,
+            columns=3,
+            search_text=lambda item: f"{item[1]['name']} {item[1]['description']}",
+            gap=30,
+            empty_text="No goals match your search.",
+            fg_color="transparent",
+            height=400
+        )
+        self.goal_list.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
+        self.goal_list_version = None
 
-        back_btn = ctk.CTkButton(self.main_container, text="← Back to Menu", command=self.setup_main_menu, font=self.font_small, width=150, fg_color="transparent")
+        back_btn = ctk.CTkButton(screen, text="← Back to Menu", command=self.setup_main_menu, font=self.font_small, width=150, fg_color="transparent")
         back_btn.grid(row=2, column=0, pady=10, sticky="w")
 
+    def refresh_goal_selection(self):
+        if self.goal_list_version != CATALOG.version:
+            self.goal_list.set_items(CATALOG.goals.items())
+            self.goal_list_version = CATALOG.version
+
+    def make_goal_card(self, parent):
+        goal_card = ctk.CTkFrame(
+            parent, 
+            corner_radius=15, 
+            fg_color=MONOBLACK_COLORS["card_bg"],
+            border_width=2,
+            border_color=MONOBLACK_COLORS["card_border"]
+        )
+        goal_card.grid_columnconfigure(0, weight=1)
+        
+        goal_card.name_label = ctk.CTkLabel(goal_card, font=self.font_medium)
+        goal_card.name_label.grid(row=0, column=0, pady=(20, 5))
+        
+        goal_card.desc_label = ctk.CTkLabel(goal_card, font=self.font_small, wraplength=200, justify="center", text_color=MONOBLACK_COLORS["text_gray"])
+        goal_card.desc_label.grid(row=1, column=0, padx=10, pady=(0, 10))
+        
+        goal_card.select_btn = ctk.CTkButton(
+            goal_card, 
+            text="Select", 
+            height=30,
+            corner_radius=8,
+            fg_color=MONOBLACK_COLORS["accent_green"],
+            hover_color="#458a48"
+        )
+        goal_card.select_btn.grid(row=2, column=0, pady=(0, 15), padx=20, sticky="ew")
+        return goal_card
+
+    def fill_goal_card(self, goal_card, item):
+        goal_key, goal_data = item
+        goal_card.name_label.configure(text=goal_data["name"])
+        goal_card.desc_label.configure(text=goal_data["description"])
+        goal_card.select_btn.configure(command=lambda: self.select_goal(goal_key))
+
     def select_goal(self, goal_key):
         self.user_goal = goal_key
         self.show_program_selection()
     
     def setup_calorie_tracker(self):
-        self.clear_frame(self.main_container)
-        
-        main_frame = ctk.CTkFrame(self.main_container, fg_color="transparent")
+        self.screens.show("calories")
+
+    def build_calorie_tracker(self, screen):
+        main_frame = ctk.CTkFrame(screen, fg_color="transparent")
         main_frame.grid(row=0, column=0, padx=20, pady=20, sticky="nsew")
         main_frame.grid_columnconfigure(0, weight=1)
         main_frame.grid_rowconfigure(0, weight=1)
@@ -330,7 +306,7 @@ class FitnessApp:
         activity_option_menu = ctk.CTkOptionMenu(
             input_frame,
             variable=self.activity_level_var,
-            values=["Sedentary", "Lightly active", "Moderately active", "Very active", "Extra active"]
+            values=list(ACTIVITY_MULTIPLIERS)
         )
         activity_option_menu.grid(row=3, column=1, padx=10, pady=5, sticky="w")
         
@@ -345,13 +321,9 @@ class FitnessApp:
         
         # New Goal Selection for Calorie Tracker
         ctk.CTkLabel(input_frame, text="Body Goal:", font=self.font_medium).grid(row=5, column=0, padx=10, pady=5, sticky="e")
-        self.goal_var = ctk.StringVar(value=BODY_GOALS["weight_loss"]["name"])
-        goal_option_menu = ctk.CTkOptionMenu(
-            input_frame,
-            variable=self.goal_var,
-            values=[goal["name"] for goal in BODY_GOALS.values()]
-        )
-        goal_option_menu.grid(row=5, column=1, padx=10, pady=5, sticky="w")
+        self.goal_var = ctk.StringVar()
+        self.goal_option_menu = ctk.CTkOptionMenu(input_frame, variable=self.goal_var)
+        self.goal_option_menu.grid(row=5, column=1, padx=10, pady=5, sticky="w")
         
         calculate_btn = ctk.CTkButton(tracker_card, text="Calculate", command=self.calculate_calories, font=self.font_medium, fg_color=MONOBLACK_COLORS["accent_green"])
         calculate_btn.grid(row=2, column=0, columnspan=2, pady=20)
@@ -374,9 +346,16 @@ class FitnessApp:
         self.goal_desc_label.grid(row=3, column=0, pady=(5, 5))
         
         # Back Button
-        back_btn = ctk.CTkButton(self.main_container, text="← Back to Menu", command=self.setup_main_menu, font=self.font_small, width=150, fg_color="transparent")
+        back_btn = ctk.CTkButton(screen, text="← Back to Menu", command=self.setup_main_menu, font=self.font_small, width=150, fg_color="transparent")
         back_btn.grid(row=1, column=0, pady=10, sticky="w")
 
+    def refresh_calorie_tracker(self):
+        # Goal choices follow the catalog; a choice that's gone falls back to the first
+        names = [goal["name"] for goal in CATALOG.goals.values()]
+        self.goal_option_menu.configure(values=names)
+        if self.goal_var.get() not in names:
+            self.goal_var.set(names[0])
+
     def calculate_calories(self):
         try:
             age = int(self.age_entry.get())
@@ -385,44 +364,25 @@ class FitnessApp:
             gender = self.gender_var.get()
             activity_level = self.activity_level_var.get()
             
-            # Harris-Benedict Equation for BMR
-            if gender == "Male":
-                bmr = 88.362 + (13.397 * weight) + (4.799 * height) - (5.677 * age)
-            else: # Female
-                bmr = 447.593 + (9.247 * weight) + (3.098 * height) - (4.330 * age)
+            # Harris-Benedict BMR times the activity multiplier, plus the goal's adjustment
+            plan = calorie_plan(age, height, weight, gender, activity_level, self.goal_var.get())
+            maintenance_calories = plan["maintenance_calories"]
+            goal_calories = plan["goal_calories"]
+            adjustment = plan["adjustment"]
             
-            # Activity level multipliers
-            activity_multipliers = {
-                "Sedentary": 1.2,
-                "Lightly active": 1.375,
-                "Moderately active": 1.55,
-                "Very active": 1.725,
-                "Extra active": 1.9
-            }
+            self.maintenance_label.configure(text=f"Maintenance Calories: {maintenance_calories} cal", text_color=MONOBLACK_COLORS["text_white"])
+            self.goal_calories_label.configure(text=f"Goal Calories: {goal_calories} cal", text_color=MONOBLACK_COLORS["accent_green"])
             
-            maintenance_calories = int(bmr * activity_multipliers[activity_level])
+            if adjustment > 0:
+                desc_text = f"To gain muscle, aim for a daily surplus of {adjustment} calories."
+            elif adjustment < 0:
+                desc_text = f"To lose weight, aim for a daily deficit of {abs(adjustment)} calories."
+            else:
+                desc_text = "For this goal, maintaining your current calorie intake is key."
             
-            # Find the selected goal and calculate Goal Calories
-            selected_goal_name = self.goal_var.get()
-            selected_goal_key = next((key for key, value in BODY_GOALS.items() if value['name'] == selected_goal_name), None)
+            self.goal_desc_label.configure(text=desc_text)
+            self.result_label.configure(text="Results:")
             
-            if selected_goal_key:
-                adjustment = BODY_GOALS[selected_goal_key]["calorie_adjustment"]
-                goal_calories = maintenance_calories + adjustment
-                
-                self.maintenance_label.configure(text=f"Maintenance Calories: {maintenance_calories} cal", text_color=MONOBLACK_COLORS["text_white"])
-                self.goal_calories_label.configure(text=f"Goal Calories: {goal_calories} cal", text_color=MONOBLACK_COLORS["accent_green"])
-                
-                if adjustment > 0:
-                    desc_text = f"To gain muscle, aim for a daily surplus of {adjustment} calories."
-                elif adjustment < 0:
-                    desc_text = f"To lose weight, aim for a daily deficit of {abs(adjustment)} calories."
-                else:
-                    desc_text = "For this goal, maintaining your current calorie intake is key."
-                
-                self.goal_desc_label.configure(text=desc_text)
-                self.result_label.configure(text="Results:")
-                
         except ValueError:
             self.maintenance_label.configure(text="", text_color=MONOBLACK_COLORS["text_white"])
             self.goal_calories_label.configure(text="", text_color=MONOBLACK_COLORS["accent_green"])
@@ -430,12 +390,12 @@ class FitnessApp:
             self.result_label.configure(text="Invalid input. Please enter numbers.", text_color="#dc3545")
 
     def show_program_selection(self):
-        self.clear_frame(self.main_container)
-        
-        self.main_container.grid_columnconfigure(0, weight=1)
-        self.main_container.grid_rowconfigure(1, weight=1)
+        self.screens.show("programs")
 
-        header_frame = ctk.CTkFrame(self.main_container, fg_color="transparent")
+    def build_program_selection(self, screen):
+        screen.grid_rowconfigure(1, weight=1)
+
+        header_frame = ctk.CTkFrame(screen, fg_color="transparent")
         header_frame.grid(row=0, column=0, padx=20, pady=20, sticky="ew")
         header_frame.grid_columnconfigure(0, weight=0)
         header_frame.grid_columnconfigure(1, weight=1)
@@ -443,80 +403,104 @@ class FitnessApp:
         back_btn = ctk.CTkButton(header_frame, text="← Back", command=self.setup_goal_selection, width=100)
         back_btn.grid(row=0, column=0, sticky="w")
         
-        title_label = ctk.CTkLabel(header_frame, text=f"Programs for {BODY_GOALS[self.user_goal]['name']}", font=self.font_header)
-        title_label.grid(row=0, column=1, padx=(10, 0))
-        
-        programs_frame = ctk.CTkScrollableFrame(self.main_container, fg_color="transparent")
-        programs_frame.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
-        programs_frame.grid_columnconfigure(0, weight=1)
+        self.programs_title_label = ctk.CTkLabel(header_frame, text="", font=self.font_header)
+        self.programs_title_label.grid(row=0, column=1, padx=(10, 0))
+        
+        self.program_search = ctk.CTkEntry(header_frame, placeholder_text="Search by name, difficulty or exercise", width=300)
+        self.program_search.grid(row=1, column=1, pady=(10, 0))
+        self.program_search.bind("<KeyRelease>", lambda event: self.program_list.filter(self.program_search.get()))
+        
+        # One list for every goal; refresh swaps in the chosen goal's programs
+        self.program_list = VirtualList(
+            screen,
+            self.make_program_card,
+            self.fill_program_card,
+            row_height=190,
+            search_text=lambda program: " ".join([program["name"], program["difficulty"]] + [EXERCISES[ex]["name"] for ex in program["exercises"]]),
+            gap=20,
+            empty_text="No programs match your search.",
+            fg_color="transparent"
+        )
+        self.program_list.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
+        self.program_list_source = None
+
+    def refresh_program_selection(self):
+        source = (self.user_goal, CATALOG.version)
+        if self.program_list_source != source:
+            self.programs_title_label.configure(text=f"Programs for {CATALOG.goal(self.user_goal)['name']}")
+            self.program_search.delete(0, "end")
+            self.program_list.set_items(CATALOG.programs_for_goal(self.user_goal))
+            self.program_list_source = source
+
+    def make_program_card(self, parent):
+        program_card = ctk.CTkFrame(
+            parent, 
+            corner_radius=15, 
+            fg_color=MONOBLACK_COLORS["card_bg"],
+            border_width=2,
+            border_color=MONOBLACK_COLORS["card_border"]
+        )
+        program_card.grid_columnconfigure(0, weight=1)
 
-        for i, program in enumerate(BODY_GOALS[self.user_goal]['programs']):
-            program_card = ctk.CTkFrame(
-                programs_frame, 
-                corner_radius=15, 
-                fg_color=MONOBLACK_COLORS["card_bg"],
-                border_width=2,
-                border_color=MONOBLACK_COLORS["card_border"]
-            )
-            program_card.grid(row=i, column=0, padx=10, pady=10, sticky="ew")
-            program_card.grid_columnconfigure(0, weight=1)
+        program_card.name_label = ctk.CTkLabel(program_card, font=self.font_medium)
+        program_card.name_label.grid(row=0, column=0, padx=20, pady=(15, 5), sticky="w")
+        
+        program_card.details_label = ctk.CTkLabel(program_card, font=self.font_small, text_color=MONOBLACK_COLORS["text_gray"])
+        program_card.details_label.grid(row=1, column=0, padx=20, pady=(0, 10), sticky="w")
+        
+        program_card.ex_label = ctk.CTkLabel(program_card, font=self.font_small, wraplength=500, justify="left", text_color=MONOBLACK_COLORS["text_gray"])
+        program_card.ex_label.grid(row=2, column=0, padx=20, pady=(0, 15), sticky="w")
+        
+        program_card.select_btn = ctk.CTkButton(
+            program_card, 
+            text="Start Program", 
+            height=30,
+            corner_radius=8,
+            fg_color=MONOBLACK_COLORS["accent_green"],
+            hover_color="#458a48"
+        )
+        program_card.select_btn.grid(row=3, column=0, pady=(0, 15), padx=20, sticky="ew")
+        return program_card
 
-            name_label = ctk.CTkLabel(program_card, text=program['name'], font=self.font_medium)
-            name_label.grid(row=0, column=0, padx=20, pady=(15, 5), sticky="w")
-            
-            details_label = ctk.CTkLabel(program_card, text=f"Sets: {program['sets']} | Reps: {program['reps']}", font=self.font_small, text_color=MONOBLACK_COLORS["text_gray"])
-            details_label.grid(row=1, column=0, padx=20, pady=(0, 10), sticky="w")
-            
-            exercises = ", ".join([EXERCISES[ex]['name'] for ex in program['exercises']])
-            ex_label = ctk.CTkLabel(program_card, text=f"Exercises: {exercises}", font=self.font_small, wraplength=500, justify="left", text_color=MONOBLACK_COLORS["text_gray"])
-            ex_label.grid(row=2, column=0, padx=20, pady=(0, 15), sticky="w")
-            
-            select_btn = ctk.CTkButton(
-                program_card, 
-                text="Start Program", 
-                command=lambda p=program: self.select_program(p), 
-                height=30,
-                corner_radius=8,
-                fg_color=MONOBLACK_COLORS["accent_green"],
-                hover_color="#458a48"
-            )
-            select_btn.grid(row=3, column=0, pady=(0, 15), padx=20, sticky="ew")
+    def fill_program_card(self, program_card, program):
+        program_card.name_label.configure(text=program['name'])
+        program_card.details_label.configure(text=f"Sets: {program['sets']} | Reps: {program['reps']}")
+        exercises = ", ".join([EXERCISES[ex]['name'] for ex in program['exercises']])
+        program_card.ex_label.configure(text=f"Exercises: {exercises}")
+        program_card.select_btn.configure(command=lambda: self.select_program(program))
 
     def select_program(self, program):
         self.selected_program = program
         self.show_workout_preview()
 
     def show_workout_preview(self):
-        self.clear_frame(self.main_container)
+        self.screens.show("preview")
 
-        preview_panel = ctk.CTkFrame(self.main_container, corner_radius=15, fg_color=MONOBLACK_COLORS["card_bg"], border_width=2, border_color=MONOBLACK_COLORS["card_border"])
+    def build_workout_preview(self, screen):
+        preview_panel = ctk.CTkFrame(screen, corner_radius=15, fg_color=MONOBLACK_COLORS["card_bg"], border_width=2, border_color=MONOBLACK_COLORS["card_border"])
         preview_panel.grid(row=0, column=0, padx=20, pady=20, sticky="nsew")
         preview_panel.grid_columnconfigure(0, weight=1)
         
-        title = ctk.CTkLabel(preview_panel, text=self.selected_program['name'], font=self.font_header)
-        title.grid(row=0, column=0, padx=20, pady=(20, 5))
+        self.preview_title = ctk.CTkLabel(preview_panel, text="", font=self.font_header)
+        self.preview_title.grid(row=0, column=0, padx=20, pady=(20, 5))
         
         details_frame = ctk.CTkFrame(preview_panel, fg_color="transparent")
         details_frame.grid(row=1, column=0, padx=20, pady=10, sticky="ew")
         details_frame.grid_columnconfigure(0, weight=1)
         details_frame.grid_columnconfigure(1, weight=1)
 
-        sets_label = ctk.CTkLabel(details_frame, text=f"Sets\n{self.selected_program['sets']}", font=self.font_medium, justify="center")
-        sets_label.grid(row=0, column=0, padx=10, pady=10)
+        self.preview_sets_label = ctk.CTkLabel(details_frame, text="", font=self.font_medium, justify="center")
+        self.preview_sets_label.grid(row=0, column=0, padx=10, pady=10)
         
-        reps_label = ctk.CTkLabel(details_frame, text=f"Reps\n{self.selected_program['reps']}", font=self.font_medium, justify="center")
-        reps_label.grid(row=0, column=1, padx=10, pady=10)
+        self.preview_reps_label = ctk.CTkLabel(details_frame, text="", font=self.font_medium, justify="center")
+        self.preview_reps_label.grid(row=0, column=1, padx=10, pady=10)
 
         exercises_title = ctk.CTkLabel(preview_panel, text="Exercises in this program:", font=self.font_medium)
         exercises_title.grid(row=2, column=0, padx=20, pady=(20, 5), sticky="w")
         
-        ex_list_frame = ctk.CTkFrame(preview_panel, fg_color="transparent")
-        ex_list_frame.grid(row=3, column=0, padx=20, pady=(5, 20), sticky="w")
-
-        for exercise_key in self.selected_program['exercises']:
-            exercise_name = EXERCISES[exercise_key]['name']
-            ex_label = ctk.CTkLabel(ex_list_frame, text=f"• {exercise_name}", font=self.font_small, text_color=MONOBLACK_COLORS["text_gray"])
-            ex_label.pack(anchor="w", pady=2)
+        # One label for the whole list, so a different program is a text change
+        self.preview_exercises_label = ctk.CTkLabel(preview_panel, text="", font=self.font_small, justify="left", anchor="w", text_color=MONOBLACK_COLORS["text_gray"])
+        self.preview_exercises_label.grid(row=3, column=0, padx=20, pady=(5, 20), sticky="w")
             
         btn_frame = ctk.CTkFrame(preview_panel, fg_color="transparent")
         btn_frame.grid(row=4, column=0, pady=(0, 20))
@@ -542,53 +526,61 @@ class FitnessApp:
         )
         back_btn.pack(side="left", padx=5)
 
+    def refresh_workout_preview(self):
+        program = self.selected_program
+        self.preview_title.configure(text=program['name'])
+        self.preview_sets_label.configure(text=f"Sets\n{program['sets']}")
+        self.preview_reps_label.configure(text=f"Reps\n{program['reps']}")
+        self.preview_exercises_label.configure(text="\n".join(f"• {EXERCISES[exercise_key]['name']}" for exercise_key in program['exercises']))
+
     def start_workout(self):
         self.workout_in_progress = True
-        self.current_set = 1
-        self.exercise_index = 0
-        self.counter = 0
-        self.current_exercise = self.selected_program['exercises'][self.exercise_index]
+        self.history_session = self.history.start().begin_session(self.user, self.user_goal, self.selected_program['name'])
+        self.start_program(self.selected_program)
+        
+        if self.record_sessions:
+            self.start_recording()
         
         self.show_workout_ui()
+        # The display outlives workouts; don't show the last one's final frame
+        self.camera_display.clear("Camera feed will appear here")
         self.start_camera()
 
     def show_workout_ui(self):
-        self.clear_frame(self.main_container)
-        
-        self.main_container.grid_columnconfigure(0, weight=1)
-        self.main_container.grid_columnconfigure(1, weight=1)
-        self.main_container.grid_rowconfigure(0, weight=1)
+        self.screens.show("workout")
+
+    def build_workout_ui(self, screen):
+        screen.grid_columnconfigure(1, weight=1)
 
         # Camera frame
-        self.camera_frame = ctk.CTkFrame(self.main_container, corner_radius=15, fg_color=MONOBLACK_COLORS["card_bg"], border_width=2, border_color=MONOBLACK_COLORS["card_border"])
+        self.camera_frame = ctk.CTkFrame(screen, corner_radius=15, fg_color=MONOBLACK_COLORS["card_bg"], border_width=2, border_color=MONOBLACK_COLORS["card_border"])
         self.camera_frame.grid(row=0, column=0, padx=(20, 10), pady=20, sticky="nsew")
         self.camera_frame.grid_columnconfigure(0, weight=1)
         self.camera_frame.grid_rowconfigure(0, weight=1)
         
-        self.camera_label = ctk.CTkLabel(self.camera_frame, text="Camera feed will appear here", font=self.font_medium, text_color=MONOBLACK_COLORS["text_gray"])
-        self.camera_label.grid(row=0, column=0, sticky="nsew")
+        self.camera_display = frame_display.FrameDisplay(self.camera_frame, (640, 480), text="Camera feed will appear here", font=self.font_medium,
+                                                         fg=MONOBLACK_COLORS["text_gray"], bg=MONOBLACK_COLORS["card_bg"])
+        self.camera_display.grid(row=0, column=0, padx=4, pady=4)
         
-        # Info panel
-        self.info_panel = ctk.CTkFrame(self.main_container, corner_radius=15, fg_color=MONOBLACK_COLORS["card_bg"], border_width=2, border_color=MONOBLACK_COLORS["card_border"])
+        # Info panel; the text is filled in by refresh_workout_ui
+        self.info_panel = ctk.CTkFrame(screen, corner_radius=15, fg_color=MONOBLACK_COLORS["card_bg"], border_width=2, border_color=MONOBLACK_COLORS["card_border"])
         self.info_panel.grid(row=0, column=1, padx=(10, 20), pady=20, sticky="nsew")
         self.info_panel.grid_columnconfigure(0, weight=1)
 
-        set_label = ctk.CTkLabel(self.info_panel, text=f"SET {self.current_set}/{self.selected_program['sets']}", font=self.font_medium, text_color=MONOBLACK_COLORS["text_gray"])
-        set_label.grid(row=0, column=0, padx=20, pady=(20, 5))
+        self.set_label = ctk.CTkLabel(self.info_panel, text="", font=self.font_medium, text_color=MONOBLACK_COLORS["text_gray"])
+        self.set_label.grid(row=0, column=0, padx=20, pady=(20, 5))
         
-        ex_name = EXERCISES[self.current_exercise]['name'].upper()
-        ex_label = ctk.CTkLabel(self.info_panel, text=ex_name, font=ctk.CTkFont(family="Inter", size=28, weight="bold"), text_color=MONOBLACK_COLORS["accent_green"])
-        ex_label.grid(row=1, column=0, padx=20, pady=(0, 20))
+        self.exercise_label = ctk.CTkLabel(self.info_panel, text="", font=self.font_exercise, text_color=MONOBLACK_COLORS["accent_green"])
+        self.exercise_label.grid(row=1, column=0, padx=20, pady=(0, 20))
         
-        self.reps_label = ctk.CTkLabel(self.info_panel, text=f"{self.counter}/{self.selected_program['reps']}", font=ctk.CTkFont(family="Inter", size=70, weight="bold"), text_color=MONOBLACK_COLORS["text_white"])
+        self.reps_label = ctk.CTkLabel(self.info_panel, text="", font=self.font_reps, text_color=MONOBLACK_COLORS["text_white"])
         self.reps_label.grid(row=2, column=0, padx=20, pady=10)
 
         instructions_title = ctk.CTkLabel(self.info_panel, text="INSTRUCTIONS", font=self.font_medium, text_color=MONOBLACK_COLORS["accent_green"])
         instructions_title.grid(row=3, column=0, padx=20, pady=(20, 5), sticky="w")
         
-        instructions_text = EXERCISES[self.current_exercise]['instructions']
-        instructions_label = ctk.CTkLabel(self.info_panel, text=instructions_text, font=self.font_small, justify="left", wraplength=400, text_color=MONOBLACK_COLORS["text_gray"])
-        instructions_label.grid(row=4, column=0, padx=20, pady=(0, 20), sticky="w")
+        self.instructions_label = ctk.CTkLabel(self.info_panel, text="", font=self.font_small, justify="left", wraplength=400, text_color=MONOBLACK_COLORS["text_gray"])
+        self.instructions_label.grid(row=4, column=0, padx=20, pady=(0, 20), sticky="w")
         
         self.next_exercise_btn = ctk.CTkButton(
             self.info_panel,
@@ -613,29 +605,38 @@ class FitnessApp:
         )
         finish_btn.grid(row=6, column=0, padx=20, pady=5, sticky="ew")
 
+    def refresh_workout_ui(self):
+        # A new exercise or set only changes the text; the camera keeps running
+        exercise = EXERCISES[self.current_exercise]
+        self.set_label.configure(text=f"SET {self.current_set}/{self.selected_program['sets']}")
+        self.exercise_label.configure(text=exercise['name'].upper())
+        self.instructions_label.configure(text=exercise['instructions'])
+        self.reps_text = f"{self.counter}/{self.selected_program['reps']}"
+        self.reps_label.configure(text=self.reps_text)
+        self.next_exercise_btn.configure(state="disabled")
+
     def next_exercise(self):
-        self.exercise_index += 1
-        self.counter = 0
-        self.last_rep_time = time.time()
-        self.motivation_played = False
-        
-        if self.exercise_index >= len(self.selected_program['exercises']):
-            self.exercise_index = 0
-            self.current_set += 1
-            if self.current_set > self.selected_program['sets']:
-                self.finish_workout()
-                return
-                
-        self.current_exercise = self.selected_program['exercises'][self.exercise_index]
-        self.show_workout_ui()
+        with self.state_lock:
+            workout_done = not self.advance()
+            # Hand the exercise/workout_done event to the history now; no more
+            # frames will flush it once the workout is done
+            self.flush()
+        
+        if workout_done:
+            self.finish_workout()
+            return
+        self.refresh_workout_ui()
 
     def finish_workout(self):
         self.workout_in_progress = False
         self.stop_camera()
-        
-        self.clear_frame(self.main_container)
+        if self.history_session is not None:
+            self.history.end_session(self.history_session, completed=self.finished)
+            self.history_session = None
+        self.screens.show("finish")
 
-        finish_panel = ctk.CTkFrame(self.main_container, corner_radius=15, fg_color=MONOBLACK_COLORS["card_bg"], border_width=2, border_color=MONOBLACK_COLORS["card_border"])
+    def build_finish_screen(self, screen):
+        finish_panel = ctk.CTkFrame(screen, corner_radius=15, fg_color=MONOBLACK_COLORS["card_bg"], border_width=2, border_color=MONOBLACK_COLORS["card_border"])
         finish_panel.grid(row=0, column=0, padx=20, pady=20, sticky="nsew")
         finish_panel.grid_columnconfigure(0, weight=1)
         finish_panel.grid_rowconfigure(0, weight=1)
@@ -643,8 +644,8 @@ class FitnessApp:
         title = ctk.CTkLabel(finish_panel, text="🎉 WORKOUT COMPLETED! 🎉", font=self.font_header, text_color=MONOBLACK_COLORS["accent_green"])
         title.grid(row=0, column=0, padx=20, pady=(40, 10))
 
-        quote = ctk.CTkLabel(finish_panel, text=random.choice(MOTIVATIONAL_QUOTES), font=self.font_medium, wraplength=600, justify="center", text_color=MONOBLACK_COLORS["text_gray"])
-        quote.grid(row=1, column=0, padx=20, pady=20)
+        self.finish_quote_label = ctk.CTkLabel(finish_panel, text="", font=self.font_medium, wraplength=600, justify="center", text_color=MONOBLACK_COLORS["text_gray"])
+        self.finish_quote_label.grid(row=1, column=0, padx=20, pady=20)
 
         new_btn = ctk.CTkButton(
             finish_panel,
@@ -656,207 +657,239 @@ class FitnessApp:
             hover_color="#458a48"
         )
         new_btn.grid(row=2, column=0, pady=30, padx=20, sticky="ew")
+
+    def refresh_finish_screen(self):
+        self.finish_quote_label.configure(text=random.choice(MOTIVATIONAL_QUOTES))
         
+    def start_warmup(self):
+        # Load and warm the pose model (one estimator for the whole workout)
+        # and open the camera in the background while the user is still
+        # choosing, so "Start Workout" doesn't stall on either
+        if self.warmup is None and self.cap is None:
+            self.device_discovery.start()
+            self.warmup = BackgroundWarmup(VISION_MODULES, self.create_pose_session, self.video_source.open).start()
+
+    def create_pose_session(self):
+        return pose_session.PoseSession(**self.pose_config).warm_up()
+
+    def close_warmup(self):
+        if self.warmup is not None:
+            self.warmup.close()
+            self.warmup = None
+
     def start_camera(self):
         if self.cap is None:
-            # Try a few common camera indices to find a working one
-            camera_index = 1
-            for i in range(3):
-                temp_cap = cv.VideoCapture(i)
-                if temp_cap.isOpened():
-                    camera_index = i
-                    temp_cap.release()
-                    break
-            
-            if camera_index != -1:
-                self.cap = cv.VideoCapture(camera_index)
-                print(f"Camera opened with index {camera_index}")
+            self.display_job = None
+            self.start_warmup()
+            if not self.warmup.ready():
+                # Clicked through faster than the warm-up; check back without blocking the UI
+                self.camera_display.set_text("Loading pose model...")
+                self.display_job = self.root.after(50, self.start_camera)
+                return
+            warmup, self.warmup = self.warmup, None
+            try:
+                self.pose_session, self.cap = warmup.take()
+            except Exception as e:
+                # The next start_camera() warms up from scratch
+                print(f"Error: Warm-up failed: {e}")
+                self.camera_display.set_text(f"Could not start the camera or pose model.\n{e}")
+                self.is_camera_active = False
+                return
+            if self.cap is not None:
+                print(f"Capturing from {self.video_source.describe(self.cap)}")
                 self.is_camera_active = True
+                self.pipeline = frame_pipeline.FramePipeline(self.cap, self.pipeline_process, perf=self.perf, pool=self.frame_pool).start()
+                self.perf.add_gauge_source(self.pipeline.stats)
+                self.pacer = FramePacer(self.display_fps)
+                self.perf.add_gauge_source(self.pacer.stats)
+                self.metrics_exporter = PrometheusExporter(self.perf, self.metrics_path).start()
                 self.update_camera()
             else:
                 print("Error: Could not open any video stream.")
-                self.camera_label.configure(text="Camera not available.\nCheck permissions or if it's in use.")
+                self.camera_display.set_text("Camera not available.\nCheck permissions or if it's in use.")
                 self.is_camera_active = False
 
     def stop_camera(self):
         self.is_camera_active = False
+        if self.display_job is not None:
+            self.root.after_cancel(self.display_job)
+            self.display_job = None
+        self.close_warmup()
+        if self.pacer is not None:
+            print(f"Display pacing: {self.pacer.stats()}")
+            self.perf.remove_gauge_source(self.pacer.stats)
+            self.pacer = None
+        if self.pipeline:
+            # Join the worker threads before releasing what they use
+            self.pipeline.stop()
+            print(f"Frame pipeline: {self.pipeline.stats()}")
+            self.perf.remove_gauge_source(self.pipeline.stats)
+            self.pipeline = None
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+            self.metrics_exporter = None
+        self.stop_recording()
         if self.cap:
             self.cap.release()
             self.cap = None
+        self.close_pose_session()
+
+    def start_recording(self):
+        os.makedirs(self.recordings_dir, exist_ok=True)
+        path = os.path.join(self.recordings_dir, time.strftime("%Y%m%d-%H%M%S") + ".fitrec")
+        meta = {"goal": self.user_goal, "program": self.selected_program['name']}
+        self.recorder = LandmarkRecorder(path, meta)
+        print(f"Recording landmarks to {path}")
+
+    def record_event(self, event):
+        # Called by the engine, often on the inference thread; only queues
+        if self.history_session is not None:
+            self.history.record(self.history_session, self.user, event)
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def close_pose_session(self):
+        if self.pose_session is not None:
+            stats = self.pose_session.latency_stats()
+            print(f"Pose inference: {stats['frames']} frames, mean {stats['mean_ms']:.1f} ms, "
+                  f"p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms")
+            self.pose_session.close()
+            self.pose_session = None
+        if self.scheduler is not None:
+            stats = self.scheduler.stats()
+            print(f"Frame skipping: {stats['inferred']} inferred, {stats['predicted']} predicted "
+                  f"({stats['skip_ratio'] * 100:.0f}% skipped), {stats['estimated_rep_error']} possible rep errors")
+            self.scheduler = None
+            self.last_pose_landmarks = None
+
+    def pipeline_process(self, frame):
+        # Runs on the inference worker thread
+        if self.workout_in_progress:
+            return self.process_frame(frame)
+        return cv.cvtColor(frame, cv.COLOR_BGR2RGB, dst=self.frame_pool.acquire_like(frame))
 
     def update_camera(self):
-        if not self.is_camera_active or self.cap is None:
+        if not self.is_camera_active or self.pipeline is None:
             return
 
-        ret, frame = self.cap.read()
-        if ret:
-            frame = cv.flip(frame, 1)
-            
-            if self.workout_in_progress:
-                frame = self.process_frame(frame)
+        start = self.perf.start()
+        self.pacer.begin()
+        # Only the newest finished frame is shown; older ones are dropped
+        frame, captured_at = self.pipeline.latest_with_time()
+        shown = False
+        if frame is not None:
+            if not self.pacer.is_stale(captured_at):
+                # Frames arrive as RGB with overlays drawn; this is the only resize
+                self.camera_display.show(frame)
+                self.pacer.shown()
+                shown = True
+            self.pipeline.release(frame)
             
-            frame = cv.resize(frame, (640, 480))
-            rgb_frame = cv.cvtColor(frame, cv.COLOR_BGR2RGB)
-            pil_image = Image.fromarray(rgb_frame)
-            ctk_image = ctk.CTkImage(light_image=pil_image, size=(640, 480))
-            self.camera_label.configure(image=ctk_image, text="")
-            
-        else:
-            self.camera_label.configure(image=None, text="Camera not available")
+        elif not self.pipeline.last_read_ok:
+            self.camera_display.set_text("Camera not available")
+        
+        if self.workout_in_progress:
+            self.refresh_rep_display()
+        
+        if shown:
+            self.perf.stop("display", start)
+            self.perf.tick("display")
             
-        self.root.after(10, self.update_camera)
+        # Next tick lands one frame after this one's deadline, minus the work just done
+        self.display_job = self.root.after(self.pacer.next_delay_ms(shown), self.update_camera)
+
+    def refresh_rep_display(self):
+        # Tk widgets are only touched from the UI thread
+        reps_text = f"{self.counter}/{self.selected_program['reps']}"
+        if reps_text != self.reps_text:
+            self.reps_text = reps_text
+            self.reps_label.configure(text=reps_text)
+            if self.set_complete():
+                self.next_exercise_btn.configure(state="normal")
 
     def process_frame(self, frame):
-        with mp_pose.Pose(min_detection_confidence=0.8, min_tracking_confidence=0.65) as pose:
-            image = cv.cvtColor(frame, cv.COLOR_BGR2RGB)
-            image.flags.writeable = False
-            results = pose.process(image)
-            image.flags.writeable = True
-            image = cv.cvtColor(image, cv.COLOR_RGB2BGR)
-
-            if results.pose_landmarks:
-                mp_drawing.draw_landmarks(
-                    image, results.pose_landmarks, mp_pose.POSE_CONNECTIONS,
-                    mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
-                    mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2)
-                )
-                
-                landmarks = results.pose_landmarks.landmark
-                rep_detected = False
-                exercise_angle = 0
-                
-                if self.current_exercise == "bicep_curl":
-                    rep_detected, exercise_angle = self.bicep_curl_logic(landmarks)
-                elif self.current_exercise == "shoulder_press":
-                    rep_detected, exercise_angle = self.shoulder_press_logic(landmarks)
-                elif self.current_exercise == "squat":
-                    rep_detected, exercise_angle = self.squat_logic(landmarks)
-                elif self.current_exercise == "push_up":
-                    rep_detected, exercise_angle = self.push_up_logic(landmarks)
-                elif self.current_exercise == "plank":
-                    rep_detected, exercise_angle = self.plank_logic(landmarks)
-                elif self.current_exercise == "stretch":
-                    rep_detected, exercise_angle = self.stretch_logic(landmarks)
-                
-                if rep_detected:
-                    self.counter += 1
-                    self.reps_label.configure(text=f"{self.counter}/{self.selected_program['reps']}")
-                    self.last_rep_time = time.time()
-                    self.motivation_played = False
-                    
-                    if self.counter >= self.selected_program['reps']:
-                        self.next_exercise_btn.configure(state="normal")
-                        self.current_quote = "SET COMPLETE! TIME FOR A QUICK BREAK."
-                        self.quote_display_time = time.time()
-                
-                cv.putText(image, f"Angle: {int(exercise_angle)}", (10, 90),
-                           cv.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            
-            cv.putText(image, f"Exercise: {EXERCISES[self.current_exercise]['name']}", (10, 30),
-                       cv.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-            cv.putText(image, f"Set: {self.current_set}/{self.selected_program['sets']}", (10, 60),
-                       cv.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-
-            current_time = time.time()
-            rest_duration = current_time - self.last_rep_time
-            
-            if rest_duration > self.LONG_REST_THRESHOLD and not self.motivation_played:
-                self.current_quote = random.choice(MOTIVATIONAL_QUOTES)
-                self.quote_display_time = time.time()
-                self.motivation_played = True
-                
-            if current_time - self.quote_display_time < 3:
-                cv.putText(image, self.current_quote, (100, 300),
-                           cv.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        perf = self.perf
+        frame_start = perf.start()
+        now = self.clock()
+        if self.scheduler is None:
+            self.scheduler = InferenceScheduler(**self.frame_skip)
+        with self.state_lock:
+            angle_index, machine = self.rep_machines[self.current_exercise]
+        infer = self.scheduler.should_infer(now, angle_index, machine)
+
+        # The one color conversion per frame: inference, overlays and display
+        # all work on this RGB buffer, so overlay colors below are RGB
+        image = cv.cvtColor(frame, cv.COLOR_BGR2RGB, dst=self.frame_pool.acquire_like(frame))
+        points = None
+        if infer:
+            start = perf.start()
+            results = self.pose_session.process(read_only(image))
+            perf.stop("pose", start)
+            pose_landmarks = self.last_pose_landmarks = results.pose_landmarks
+            if pose_landmarks:
+                points = landmarks_to_array(pose_landmarks.landmark)
+            self.scheduler.observe(now, points)
+        else:
+            # Skipped frame: the rep logic and the skeleton use predicted landmarks
+            points = self.scheduler.predict(now)
+            pose_landmarks = self.last_pose_landmarks
+            for lm, (x, y, z, _) in zip(pose_landmarks.landmark, points):
+                lm.x, lm.y, lm.z = float(x), float(y), float(z)
+            perf.count("frames_predicted")
+
+        # The rep label and next button are refreshed by update_camera
+        start = perf.start()
+        with self.state_lock:
+            events = self.handle_landmarks(points)
+        perf.stop("rep_logic", start)
+        rep_detected = any(event["type"] == "rep" for event in events)
+
+        exercise_angle = 0
+        if points is not None:
+            drawing = mp.solutions.drawing_utils
+            drawing.draw_landmarks(
+                image, pose_landmarks, mp.solutions.pose.POSE_CONNECTIONS,
+                drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
+                drawing.DrawingSpec(color=(0, 0, 255), thickness=2)
+            )
+            exercise_angle = self.last_angle
             
-            return image
-        
-        return frame
-        
-    # Exercise logic functions (remain unchanged)
-    def calculate_angle(self, a, b, c):
-        a, b, c = np.array(a), np.array(b), np.array(c)
-        radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-        angle = np.abs(radians * 180.0 / np.pi)
-        if angle > 180.0:
-            angle = 360 - angle
-        return angle
-        
-    def bicep_curl_logic(self, landmarks):
-        shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        elbow = landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value]
-        wrist = landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value]
-        angle = self.calculate_angle((shoulder.x, shoulder.y), (elbow.x, elbow.y), (wrist.x, wrist.y))
-        if angle > 160:
-            self.stage = "down"
-        if angle < 50 and self.stage == 'down':
-            self.stage = "up"
-            return True, angle
-        return False, angle
-        
-    def shoulder_press_logic(self, landmarks):
-        shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        elbow = landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value]
-        wrist = landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value]
-        angle = self.calculate_angle((shoulder.x, shoulder.y), (elbow.x, elbow.y), (wrist.x, wrist.y))
-        if angle < 60:
-            self.stage = "down"
-        if angle > 150 and self.stage == 'down':
-            self.stage = "up"
-            return True, angle
-        return False, angle
-        
-    def squat_logic(self, landmarks):
-        hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-        knee = landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value]
-        ankle = landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        angle = self.calculate_angle((hip.x, hip.y), (knee.x, knee.y), (ankle.x, ankle.y))
-        if angle > 160:
-            self.stage = "up"
-        if angle < 100 and self.stage == 'up':
-            self.stage = "down"
-            return True, angle
-        return False, angle
-        
-    def push_up_logic(self, landmarks):
-        shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        elbow = landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value]
-        wrist = landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value]
-        angle = self.calculate_angle((shoulder.x, shoulder.y), (elbow.x, elbow.y), (wrist.x, wrist.y))
-        if angle > 160:
-            self.stage = "up"
-        if angle < 90 and self.stage == 'up':
-            self.stage = "down"
-            return True, angle
-        return False, angle
-        
-    def plank_logic(self, landmarks):
-        shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-        ankle = landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        angle = self.calculate_angle((shoulder.x, shoulder.y), (hip.x, hip.y), (ankle.x, ankle.y))
-        rep_detected = False
-        if time.time() - self.last_rep_time > 3:
-            rep_detected = True
-        return rep_detected, angle
-        
-    def stretch_logic(self, landmarks):
-        shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-        ankle = landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        angle = self.calculate_angle((shoulder.x, shoulder.y), (hip.x, hip.y), (ankle.x, ankle.y))
-        if angle > 170:
-            self.stage = "extended"
-        if angle < 140 and self.stage == 'extended':
-            self.stage = "bent"
-            return True, angle
-        return False, angle
+            cv.putText(image, f"Angle: {int(exercise_angle)}", (10, 90),
+                       cv.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+            cv.putText(image, f"Inference: {self.pose_session.last_latency_ms:.0f} ms", (10, 120),
+                       cv.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+
+        if self.recorder is not None:
+            with self.state_lock:
+                self.recorder.append(now, points, exercise_angle, self.current_exercise, self.stage,
+                                     self.current_set, self.counter, rep_detected)
+
+        cv.putText(image, f"Exercise: {EXERCISES[self.current_exercise]['name']}", (10, 30),
+                   cv.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+        cv.putText(image, f"Set: {self.current_set}/{self.selected_program['sets']}", (10, 60),
+                   cv.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+        if self.quote_visible:
+            cv.putText(image, self.current_quote, (100, 300),
+                       cv.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
+        
+        if self.perf_overlay:
+            self.perf.draw_overlay(image)
+        perf.stop("process_frame", frame_start)
+        return image
         
     def run(self):
         self.root.mainloop()
-        
+
+        self.close_warmup()
         if self.cap:
             self.cap.release()
+        self.close_pose_session()
+        # Commits whatever is still queued
+        self.history.close()
 
 if __name__ == "__main__":
     app = FitnessApp()
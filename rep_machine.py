@@ -0,0 +1,133 @@
+import numpy as np
+
+from fitness_data import EXERCISES
+from joint_angles import EXERCISE_ANGLE_INDEX
+
+
+# --- Threshold Rep Machine ---
+# Two stages: the joint first goes past enter_angle (ready stage), then past
+# exit_angle (rep stage), which counts one rep. Both tests are written as
+# "sign * angle vs limit" so rising and falling movements share one code path.
+class ThresholdMachine:
+    def __init__(self, enter_angle, exit_angle, stages, hysteresis=0, min_dwell=0.0):
+        if enter_angle == exit_angle:
+            raise ValueError("enter_angle and exit_angle must differ")
+        if hysteresis < 0:
+            raise ValueError("hysteresis can't be negative")
+        self.ready_stage, self.rep_stage = stages
+        self.min_dwell = min_dwell
+        self.sign = 1.0 if enter_angle > exit_angle else -1.0
+        self.ready_limit = self.sign * enter_angle + hysteresis
+        self.rep_limit = self.sign * exit_angle - hysteresis
+
+    @classmethod
+    def from_spec(cls, spec):
+        return cls(spec["enter_angle"], spec["exit_angle"], spec["stages"], spec.get("hysteresis", 0), spec.get("min_dwell", 0.0))
+
+    def thresholds(self):
+        # Angles (degrees) where the stage can change
+        return (self.sign * self.ready_limit, self.sign * self.rep_limit)
+
+    def step(self, state, angle, now):
+        # `state` is an ExerciseTracker: stage, stage_since and last_rep_time
+        value = self.sign * angle
+        if value > self.ready_limit:
+            if state.stage != self.ready_stage:
+                state.stage_since = now
+            state.stage = self.ready_stage
+        if value < self.rep_limit and state.stage == self.ready_stage:
+            state.stage = self.rep_stage
+            # Too quick a movement leaves the ready stage without counting
+            return now - state.stage_since >= self.min_dwell
+        return False
+
+    def count_series(self, angles, timestamps=None, stage=None, stage_since=0.0, last_rep_time=0.0):
+        # Same result as calling step() on every sample, as array operations.
+        # A rep is a rep-side sample whose previous threshold crossing was on
+        # the ready side. NaN angles (no pose) never cross either threshold.
+        values = self.sign * np.asarray(angles, dtype=np.float64)
+        ready = values > self.ready_limit
+        fire = values < self.rep_limit
+        events = np.flatnonzero(ready | fire)
+        if events.size == 0:
+            return events
+
+        is_fire = fire[events]
+        started_ready = stage == self.ready_stage
+        prev_ready = np.empty(events.size, dtype=bool)
+        prev_ready[0] = started_ready
+        prev_ready[1:] = ~is_fire[:-1]
+        reps = is_fire & prev_ready
+
+        if self.min_dwell > 0:
+            if timestamps is None:
+                raise ValueError("timestamps are needed when min_dwell is set")
+            t = np.asarray(timestamps, dtype=np.float64)[events]
+            # Where each ready run began: the first ready sample after a rep-side one
+            after_fire = np.empty(events.size, dtype=bool)
+            after_fire[0] = not started_ready
+            after_fire[1:] = is_fire[:-1]
+            run_start = np.where(~is_fire & after_fire, np.arange(events.size), -1)
+            run_start = np.maximum.accumulate(run_start)
+            since = np.where(run_start >= 0, t[np.maximum(run_start, 0)], stage_since)
+            reps &= (t - since) >= self.min_dwell
+
+        return events[reps]
+
+
+# --- Hold Rep Machine ---
+# One rep for every hold_seconds since the last rep (plank).
+class HoldMachine:
+    def __init__(self, hold_seconds):
+        self.hold_seconds = hold_seconds
+
+    @classmethod
+    def from_spec(cls, spec):
+        return cls(spec["hold_seconds"])
+
+    def thresholds(self):
+        # Holds are counted on time alone
+        return ()
+
+    def step(self, state, angle, now):
+        return now - state.last_rep_time > self.hold_seconds
+
+    def count_series(self, angles, timestamps=None, stage=None, stage_since=0.0, last_rep_time=0.0):
+        if timestamps is None:
+            raise ValueError("timestamps are needed to count holds")
+        valid = np.flatnonzero(~np.isnan(np.asarray(angles, dtype=np.float64)))
+        t = np.asarray(timestamps, dtype=np.float64)[valid]
+        # One binary search per rep rather than a Python step per frame
+        reps = []
+        k = np.searchsorted(t, last_rep_time + self.hold_seconds, side="right")
+        while k < t.size:
+            reps.append(valid[k])
+            k = np.searchsorted(t, t[k] + self.hold_seconds, side="right")
+        return np.array(reps, dtype=np.intp)
+
+
+MACHINE_TYPES = {
+    "threshold": ThresholdMachine,
+    "hold": HoldMachine
+}
+
+
+def compile_exercises(exercises):
+    # exercise key -> (joint angle column, rep machine), built once at startup
+    table = {}
+    for key, exercise in exercises.items():
+        machine_type = MACHINE_TYPES.get(exercise["logic"])
+        if machine_type is None:
+            raise ValueError(f"Unknown logic {exercise['logic']!r} for exercise {key!r}")
+        table[key] = (EXERCISE_ANGLE_INDEX[key], machine_type.from_spec(exercise))
+    return table
+
+
+REP_MACHINES = compile_exercises(EXERCISES)
+
+
+def count_reps(exercise_key, angles, timestamps=None, **start):
+    # Rep frame indices for a whole recording. `angles` is the (T, J) output
+    # of joint_angles() with NaN rows where no pose was found.
+    angle_index, machine = REP_MACHINES[exercise_key]
+    return machine.count_series(np.asarray(angles)[:, angle_index], timestamps, **start)
@@ -0,0 +1,69 @@
+import customtkinter as ctk
+
+
+# --- Screen Manager ---
+# Each screen is a frame built once, the first time it's shown, and then
+# kept. Switching hides the current frame with grid_remove() (which keeps its
+# grid options) and shows and raises the next, so navigating never destroys
+# or recreates widgets. A screen's `refresh` callback runs every time it's
+# shown and should only update existing widgets in place.
+# Extra arguments to show() pick a variant of a screen; each variant is
+# built once and the arguments are passed to build/refresh.
+class ScreenManager:
+    def __init__(self, container):
+        self.container = container
+        self.builders = {}
+        self.screens = {}
+        self.current = None
+        self.builds = 0
+        self.switches = 0
+
+    def register(self, name, build, refresh=None):
+        # build(frame, *args) fills a new, empty screen frame
+        self.builders[name] = (build, refresh)
+
+    def show(self, name, *args):
+        screen_id = (name, *args)
+        build, refresh = self.builders[name]
+        screen = self.screens.get(screen_id)
+        if screen is None:
+            # Like the container, a screen's first row and column stretch
+            screen = ctk.CTkFrame(self.container, fg_color="transparent")
+            screen.grid(row=0, column=0, sticky="nsew")
+            screen.grid_columnconfigure(0, weight=1)
+            screen.grid_rowconfigure(0, weight=1)
+            build(screen, *args)
+            self.screens[screen_id] = screen
+            self.builds += 1
+        elif screen_id != self.current:
+            screen.grid()
+
+        if self.current is not None and self.current != screen_id:
+            self.screens[self.current].grid_remove()
+        self.current = screen_id
+        screen.tkraise()
+        self.switches += 1
+        if refresh is not None:
+            refresh(*args)
+        return screen
+
+    def discard(self, name, *args):
+        # Destroy a screen whose contents are out of date; it's rebuilt on
+        # its next show(). With no args, every variant of `name` goes.
+        for screen_id in [screen_id for screen_id in self.screens
+                          if screen_id[0] == name and (not args or screen_id[1:] == args)]:
+            self.screens.pop(screen_id).destroy()
+            if screen_id == self.current:
+                self.current = None
+
+    def showing(self, name):
+        return self.current is not None and self.current[0] == name
+
+    def widget_count(self):
+        # Live widgets under the container, for leak checks
+        count, pending = 0, [self.container]
+        while pending:
+            children = pending.pop().winfo_children()
+            count += len(children)
+            pending.extend(children)
+        return count
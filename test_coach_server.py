@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from coach_server import CoachClient, CoachServer, http_request
+from test_workout_engine import leg_pose
+
+
+def run_with_server(check):
+    async def main():
+        server = await CoachServer(port=0).start()
+        try:
+            return await check(server.port)
+        finally:
+            await server.close()
+    return asyncio.run(main())
+
+
+async def post_session(port, payload):
+    return await http_request("127.0.0.1", port, "POST", "/sessions", payload)
+
+
+@pytest.mark.parametrize("payload, message", [
+    ([{"exercise": "squat"}], "The request body must be a JSON object"),
+    ("squat", "The request body must be a JSON object"),
+    ({"exercise": "squat", "sets": "two"}, "'sets' must be an integer, got 'two'"),
+    ({"exercise": "squat", "reps": 0}, "'reps' must be a positive integer, got 0"),
+    ({"exercise": "squat", "reps": True}, "'reps' must be an integer, got True"),
+    ({"exercise": ["squat"]}, "'exercise' must be a string, got ['squat']"),
+    ({"goal": 5}, "'goal' must be a string, got 5"),
+])
+def test_bad_session_requests_are_rejected(payload, message):
+    status, body = run_with_server(lambda port: post_session(port, payload))
+    assert status == 400
+    assert body == {"error": message}
+
+
+def test_workout_done_reports_the_last_set():
+    async def check(port):
+        await post_session(port, {"id": "a", "exercise": "squat", "sets": 1, "reps": 2})
+        client = await CoachClient.connect("127.0.0.1", port, "a")
+        for frame, angle in enumerate([170, 80, 170, 80, 170]):
+            await client.send_json({"type": "landmarks", "landmarks": leg_pose(angle).tolist(), "frame": frame})
+        events = []
+        while not events or events[-1]["type"] != "workout_done":
+            events.append(await asyncio.wait_for(client.receive(), 5))
+        await client.close()
+        return events
+
+    events = run_with_server(check)
+    assert [event["type"] for event in events if event["type"] not in ("exercise", "status")] == ["rep", "rep", "set_complete", "workout_done"]
+    assert events[-1]["set"] == 1
+
+
+def test_deleting_a_session_closes_its_viewers():
+    async def check(port):
+        await post_session(port, {"id": "a", "exercise": "squat"})
+        client = await CoachClient.connect("127.0.0.1", port, "a")
+        assert (await client.receive())["type"] == "status"
+        await http_request("127.0.0.1", port, "DELETE", "/sessions/a")
+        return await asyncio.wait_for(client.receive(), 5)
+
+    assert run_with_server(check) is None
+
+
+@pytest.mark.parametrize("length", ["ten", "-1"])
+def test_bad_content_length_is_rejected(length):
+    async def check(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"POST /sessions HTTP/1.1\r\nContent-Length: {length}\r\n\r\n{{}}".encode("latin-1"))
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return response
+
+    response = run_with_server(check)
+    assert response.startswith(b"HTTP/1.1 400 ")
+    assert b"Content-Length must be a non-negative integer" in response
@@ -0,0 +1,39 @@
+from inference_scheduler import InferenceScheduler
+from rep_machine import REP_MACHINES
+from test_workout_engine import leg_pose
+
+SQUAT = REP_MACHINES["squat"]
+
+
+def test_no_skipping_with_zero_error_budget():
+    scheduler = InferenceScheduler(max_skip=6, max_rep_error=0)
+    for i in range(30):
+        now = i / 30
+        assert scheduler.should_infer(now, *SQUAT)
+        scheduler.observe(now, leg_pose(170))
+    assert scheduler.predicted == 0
+
+
+def test_overshoot_past_a_threshold_spends_the_budget():
+    scheduler = InferenceScheduler(max_skip=6, guard_band=0.0, max_rep_error=1)
+    scheduler.should_infer(0.0, *SQUAT)
+    scheduler.observe(0.0, leg_pose(120))
+    scheduler.observe(0.1, leg_pose(110))
+    # Predicted on down past the squat's 100 degree threshold...
+    assert scheduler.predict(0.25) is not None
+    # ...but the athlete turned back up before reaching it
+    scheduler.observe(0.3, leg_pose(115))
+    assert scheduler.stats()["estimated_rep_error"] == 1
+    assert scheduler.error_budget_spent()
+    assert all(scheduler.should_infer(0.3 + i / 30, *SQUAT) for i in range(1, 30))
+
+
+def test_late_crossing_is_not_a_rep_error():
+    scheduler = InferenceScheduler(max_skip=6, guard_band=0.0, max_rep_error=1)
+    scheduler.should_infer(0.0, *SQUAT)
+    scheduler.observe(0.0, leg_pose(130))
+    scheduler.observe(0.1, leg_pose(125))
+    scheduler.predict(0.15)
+    # The athlete sped up and crossed between inferences; the rep logic sees it now
+    scheduler.observe(0.2, leg_pose(90))
+    assert scheduler.stats()["estimated_rep_error"] == 0
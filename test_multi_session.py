@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+import cv2 as cv
+import numpy as np
+import pytest
+
+from multi_session import SessionManager
+from test_workout_engine import leg_pose
+
+FPS = 30.0
+FRAMES_PER_STAGE = 3
+
+
+class StubPose:
+    # Stands in for PoseSession in the workers: bright frames are an athlete
+    # standing, dark frames the bottom of a squat
+    last_latency_ms = 0.0
+
+    def __init__(self, **config):
+        pass
+
+    def warm_up(self):
+        return self
+
+    def process(self, image):
+        points = leg_pose(170 if image.mean() > 127 else 80)
+        landmarks = [SimpleNamespace(x=x, y=y, z=z, visibility=v) for x, y, z, v in points.tolist()]
+        return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=landmarks))
+
+    def close(self):
+        pass
+
+
+def write_squat_video(path, squats):
+    writer = cv.VideoWriter(str(path), cv.VideoWriter_fourcc(*"MJPG"), FPS, (64, 48))
+    assert writer.isOpened()
+    for shade in [255, 0] * squats + [255]:
+        for _ in range(FRAMES_PER_STAGE):
+            writer.write(np.full((48, 64, 3), shade, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+def squat_program(reps=100):
+    return {"name": "Squats", "exercises": ["squat"], "sets": 1, "reps": reps}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sessions_count_their_own_reps(tmp_path, workers):
+    manager = SessionManager(workers=workers, pose_factory=StubPose)
+    expected = {}
+    for squats in (2, 3, 5):
+        session_id = manager.add_session(write_squat_video(tmp_path / f"squats-{squats}.avi", squats), squat_program())
+        expected[session_id] = squats
+
+    events = []
+    statuses = manager.start().run(on_event=events.append)
+
+    assert {status["session"]: status["reps"] for status in statuses} == expected
+    for session_id, squats in expected.items():
+        reps = [event["rep"] for event in events if event["session"] == session_id]
+        assert reps == list(range(1, squats + 1))
+    assert all(status["frames"] == (2 * expected[status["session"]] + 1) * FRAMES_PER_STAGE for status in statuses)
+    assert not any(status["error"] for status in statuses)
+
+
+def test_rep_times_follow_the_video(tmp_path):
+    manager = SessionManager(workers=1, pose_factory=StubPose)
+    session_id = manager.add_session(write_squat_video(tmp_path / "squats.avi", 3), squat_program())
+    manager.start().run()
+
+    # Each rep lands on the first dark frame of its squat, however fast the file decoded
+    times = [event["time"] for event in manager.sessions[session_id].events]
+    assert times == pytest.approx([(2 * i + 1) * FRAMES_PER_STAGE / FPS for i in range(3)])
+
+
+def test_session_finishes_at_the_rep_target(tmp_path):
+    manager = SessionManager(workers=1, pose_factory=StubPose)
+    session_id = manager.add_session(write_squat_video(tmp_path / "squats.avi", 5), squat_program(reps=3))
+    manager.start().run()
+
+    session = manager.sessions[session_id]
+    assert session.finished
+    assert len(session.events) == 3
+
+
+def test_missing_file_is_reported(tmp_path):
+    manager = SessionManager(workers=1, pose_factory=StubPose)
+    session_id = manager.add_session(str(tmp_path / "missing.avi"), squat_program())
+    status, = manager.start().run()
+    assert status["session"] == session_id
+    assert status["error"]
@@ -0,0 +1,60 @@
+import math
+
+import numpy as np
+
+from exercise_tracker import ManualClock
+from joint_angles import LANDMARK_INDEX, NUM_LANDMARKS
+from workout_engine import WorkoutEngine
+
+
+def leg_pose(knee_angle):
+    # Both legs bent to `knee_angle` degrees at the knee
+    points = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+    points[:, 3] = 1.0
+    bend = math.radians(knee_angle)
+    for side in ("LEFT", "RIGHT"):
+        points[LANDMARK_INDEX[f"{side}_HIP"], :2] = (0.5, 0.3)
+        points[LANDMARK_INDEX[f"{side}_KNEE"], :2] = (0.5, 0.5)
+        points[LANDMARK_INDEX[f"{side}_ANKLE"], :2] = (0.5 + 0.2 * math.sin(bend), 0.5 - 0.2 * math.cos(bend))
+    return points
+
+
+def squat_program(sets=2, reps=2):
+    return {"name": "Squats", "exercises": ["squat"], "sets": sets, "reps": reps}
+
+
+def do_squats(engine, clock, count):
+    events = []
+    for _ in range(count):
+        for angle in (170, 80, 170):
+            clock.now += 0.5
+            events.extend(engine.handle_landmarks(leg_pose(angle)))
+    return [event["type"] for event in events]
+
+
+def test_set_complete_once_past_target():
+    clock = ManualClock()
+    engine = WorkoutEngine(squat_program(reps=2), clock=clock, auto_advance=False)
+    engine.flush()
+    assert do_squats(engine, clock, 5) == ["rep", "rep", "set_complete", "rep", "rep", "rep"]
+    assert engine.counter == 5
+
+
+def test_auto_advance_completes_each_set():
+    clock = ManualClock()
+    engine = WorkoutEngine(squat_program(sets=2, reps=2), clock=clock, auto_advance=True)
+    engine.flush()
+    assert do_squats(engine, clock, 4) == ["rep", "rep", "set_complete", "exercise",
+                                           "rep", "rep", "set_complete", "workout_done"]
+    assert engine.finished
+
+
+def test_new_program_starts_with_no_leftover_events():
+    clock = ManualClock()
+    engine = WorkoutEngine(squat_program(sets=1, reps=1), clock=clock, auto_advance=False)
+    engine.flush()
+    do_squats(engine, clock, 1)
+    # advance() without a flush, as a caller that stops feeding frames might
+    engine.advance()
+    assert engine.finished
+    assert [event["type"] for event in engine.start_program(squat_program())] == ["exercise"]
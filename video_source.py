@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+
+from warmup import LazyModule
+
+# cv2 is imported on first use, normally on the discovery or warm-up
+# thread, so importing this module doesn't slow app startup
+cv = LazyModule("cv2")
+
+# Low-latency defaults for webcams: MJPG keeps USB bandwidth low at 30 fps
+# and a one-frame driver buffer means read() returns the newest frame
+CAPTURE_SETTINGS = {"width": 640, "height": 480, "fps": 30, "fourcc": "MJPG", "buffer_size": 1}
+
+
+def parse_source(source):
+    # "0" -> camera 0; anything else is a file path or stream URL
+    if isinstance(source, str) and source.strip().isdigit():
+        return int(source)
+    return source
+
+
+def is_device(source):
+    return isinstance(source, int)
+
+
+def open_capture(source, width=640, height=480, fps=30, fourcc="MJPG", buffer_size=1):
+    # Returns an opened cv.VideoCapture, or None. Capture properties only
+    # apply to devices; files and streams keep their own format.
+    source = parse_source(source)
+    cap = cv.VideoCapture(source)
+    if not cap.isOpened():
+        cap.release()
+        return None
+    if is_device(source):
+        if fourcc:
+            cap.set(cv.CAP_PROP_FOURCC, cv.VideoWriter_fourcc(*fourcc))
+        if width and height:
+            cap.set(cv.CAP_PROP_FRAME_WIDTH, width)
+            cap.set(cv.CAP_PROP_FRAME_HEIGHT, height)
+        if fps:
+            cap.set(cv.CAP_PROP_FPS, fps)
+        if buffer_size:
+            cap.set(cv.CAP_PROP_BUFFERSIZE, buffer_size)
+    return cap
+
+
+# --- Paced File Playback ---
+# Video files decode much faster than real time; this plays them at their
+# own frame rate so a file can stand in for a camera.
+class PacedCapture:
+    def __init__(self, cap, fps=None, loop=False):
+        self.cap = cap
+        self.interval = 1.0 / (fps or cap.get(cv.CAP_PROP_FPS) or 30.0)
+        self.loop = loop
+        self.next_time = None
+
+    def read(self, image=None):
+        now = time.perf_counter()
+        if self.next_time is not None and now < self.next_time:
+            time.sleep(self.next_time - now)
+        self.next_time = max(now, self.next_time or now) + self.interval
+        ret, frame = self.cap.read(image)
+        if not ret and self.loop:
+            self.cap.set(cv.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read(image)
+        return ret, frame
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+
+# --- Background Device Discovery ---
+# Probing cameras takes hundreds of milliseconds per index, so it runs once
+# on a background thread (started as the user heads for a workout) and the
+# result is kept for later workouts. refresh() rescans, e.g. after a camera
+# fails to open.
+class DeviceDiscovery:
+    def __init__(self, max_index=3):
+        self.max_index = max_index
+        self.devices = None
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.done.clear()
+                self.thread = threading.Thread(target=self.probe, name="device-discovery", daemon=True)
+                self.thread.start()
+        return self
+
+    def probe(self):
+        devices = []
+        for index in range(self.max_index):
+            cap = cv.VideoCapture(index)
+            if cap.isOpened():
+                devices.append(index)
+            cap.release()
+        self.devices = devices
+        self.done.set()
+
+    def wait(self, timeout=None):
+        self.start()
+        self.done.wait(timeout)
+        return self.devices
+
+    def refresh(self):
+        with self.lock:
+            if self.thread is not None and not self.done.is_set():
+                return self
+            self.thread = None
+        return self.start()
+
+
+# --- Video Source ---
+# What the app captures from: a device index, a file path or a stream URL,
+# or None to use the first discovered camera. Files are paced to real time
+# unless `paced` is off.
+class VideoSource:
+    def __init__(self, source=None, discovery=None, settings=None, paced=True, loop=False):
+        self.source = parse_source(source)
+        self.discovery = discovery or DeviceDiscovery()
+        self.settings = dict(CAPTURE_SETTINGS, **(settings or {}))
+        self.paced = paced
+        self.loop = loop
+        self.opened_source = None
+
+    def candidates(self):
+        if self.source is not None:
+            return [self.source]
+        return self.discovery.wait() or []
+
+    def open(self):
+        for source in self.candidates():
+            cap = open_capture(source, **self.settings)
+            if cap is None:
+                continue
+            self.opened_source = source
+            if self.paced and not is_device(source) and os.path.exists(str(source)):
+                return PacedCapture(cap, loop=self.loop)
+            return cap
+        # Cameras come and go; look again before the next attempt
+        if self.source is None:
+            self.discovery.refresh()
+        return None
+
+    def describe(self, cap):
+        width, height = int(cap.get(cv.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv.CAP_PROP_FRAME_HEIGHT))
+        kind = "camera" if is_device(self.opened_source) else "video"
+        return f"{kind} {self.opened_source} at {width}x{height}, {cap.get(cv.CAP_PROP_FPS):.0f} fps"
@@ -0,0 +1,176 @@
+import math
+
+import customtkinter as ctk
+
+# Logical pixels per mouse wheel notch
+WHEEL_STEP = 60
+
+
+# --- Virtualized List ---
+# A scrolling list of same-sized cards that only has widgets for the rows in
+# view plus `overscan` rows above and below. Cards are made by
+# make_card(parent) and recycled as the list scrolls: fill_card(card, item)
+# points an existing card at another item by configuring its widgets, so
+# opening or scrolling a list of thousands of items costs about the same as
+# one screenful. Items are laid out `columns` to a row, `row_height` apart.
+# Slots form a ring (item i always lands in slot i % slots), so a card that
+# stays in view keeps its item and isn't refilled while scrolling.
+# filter(text) keeps the items whose search text (search_text(item),
+# lowercased once in set_items) contains every word typed. Typing more of
+# the same query only re-checks the items that matched before.
+class VirtualList(ctk.CTkFrame):
+    def __init__(self, master, make_card, fill_card, row_height, columns=1, search_text=str, overscan=2, gap=10,
+                 empty_text="Nothing to show", **kwargs):
+        ctk.CTkFrame.__init__(self, master, **kwargs)
+        self.make_card = make_card
+        self.fill_card = fill_card
+        self.row_height = row_height
+        self.columns = columns
+        self.search_text = search_text
+        self.overscan = overscan
+        self.gap = gap
+        self.items = []
+        self.search = []
+        # Positions in `items` of the rows that pass the filter
+        self.matches = []
+        self.query = ""
+        self.offset = 0.0
+        # Ring of (holder, card) slots and the item each one shows
+        self.slots = []
+        self.slot_items = []
+        self.render_job = None
+        self.cards_created = 0
+        self.fills = 0
+
+        # The list's size comes from its own height/width and its grid cell,
+        # never from the cards inside it
+        self.grid_propagate(False)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent")
+        self.viewport.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.empty_label = ctk.CTkLabel(self.viewport, text=empty_text)
+        self.viewport.bind("<Configure>", lambda event: self.schedule_render())
+        self.bind_wheel(self.viewport)
+
+    def bind_wheel(self, widget):
+        # Windows and macOS send <MouseWheel>, X11 sends buttons 4 and 5
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            widget.bind(sequence, self.on_wheel)
+        for child in widget.winfo_children():
+            self.bind_wheel(child)
+
+    # --- Items and filtering ---
+    def set_items(self, items):
+        self.items = list(items)
+        self.search = [self.search_text(item).lower() for item in self.items]
+        self.slot_items = [None] * len(self.slots)
+        query, self.query = self.query, None
+        self.filter(query)
+
+    def filter(self, text):
+        query = " ".join(text.lower().split())
+        if query == self.query:
+            return
+        # Every match for "squat be" also matched "squat b"
+        if self.query is not None and query.startswith(self.query):
+            candidates = self.matches
+        else:
+            candidates = range(len(self.items))
+        words, search = query.split(), self.search
+        self.matches = [i for i in candidates if all(word in search[i] for word in words)]
+        self.query = query
+        self.offset = 0.0
+        self.render()
+
+    # --- Scrolling ---
+    def content_height(self):
+        return math.ceil(len(self.matches) / self.columns) * self.row_height
+
+    def view_height(self):
+        # winfo sizes are real pixels; everything else here is unscaled
+        return self.viewport.winfo_height() / ctk.ScalingTracker.get_widget_scaling(self)
+
+    def scroll_to(self, offset):
+        self.offset = offset
+        self.schedule_render()
+
+    def yview(self, *args):
+        # The scrollbar's side of the Tk scrolling protocol
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * self.content_height())
+        elif args[0] == "scroll":
+            step = self.view_height() if args[2] == "pages" else WHEEL_STEP
+            self.scroll_to(self.offset + int(args[1]) * step)
+
+    def on_wheel(self, event):
+        if event.num == 4 or event.num == 5:
+            notches = 1 if event.num == 5 else -1
+        else:
+            # Windows reports 120 per notch, macOS small deltas; only the sign matters
+            notches = -1 if event.delta > 0 else 1
+        self.scroll_to(self.offset + notches * WHEEL_STEP)
+
+    def schedule_render(self):
+        # Wheel and resize events can arrive faster than frames are drawn;
+        # they only move the offset, and one render catches up with all of them
+        if self.render_job is None:
+            self.render_job = self.after_idle(self.render)
+
+    # --- Rendering ---
+    def render(self):
+        if self.render_job is not None:
+            self.after_cancel(self.render_job)
+            self.render_job = None
+        height = self.view_height()
+        total = self.content_height()
+        self.offset = max(0.0, min(self.offset, total - height))
+        rows_in_view = math.ceil(height / self.row_height) + 1
+        first_row = max(0, int(self.offset // self.row_height) - self.overscan)
+        first = first_row * self.columns
+        last = min(len(self.matches), (first_row + rows_in_view + 2 * self.overscan) * self.columns)
+
+        # Enough slots for a full window, but no more than there are matches
+        slot_count = min((rows_in_view + 2 * self.overscan) * self.columns, len(self.matches))
+        if len(self.slots) < slot_count:
+            self.add_slots(slot_count - len(self.slots))
+        slot_count = len(self.slots)
+
+        shown = set()
+        for position in range(first, last):
+            slot = position % slot_count
+            holder, card = self.slots[slot]
+            item = self.matches[position]
+            if self.slot_items[slot] != item:
+                self.fill_card(card, self.items[item])
+                self.slot_items[slot] = item
+                self.fills += 1
+            row, column = divmod(position, self.columns)
+            holder.place(relx=column / self.columns, y=row * self.row_height - self.offset, relwidth=1 / self.columns)
+            shown.add(slot)
+        for slot, (holder, _) in enumerate(self.slots):
+            if slot not in shown:
+                holder.place_forget()
+
+        if self.matches:
+            self.empty_label.place_forget()
+        else:
+            self.empty_label.place(relx=0.5, y=self.row_height / 2, anchor="center")
+        self.scrollbar.set(self.offset / total if total else 0.0, min(1.0, (self.offset + height) / total) if total else 1.0)
+
+    def add_slots(self, count):
+        for _ in range(count):
+            # The holder is the fixed-size cell; the card is padded inside it
+            holder = ctk.CTkFrame(self.viewport, fg_color="transparent", height=self.row_height)
+            holder.pack_propagate(False)
+            card = self.make_card(holder)
+            card.pack(fill="both", expand=True, padx=self.gap / 2, pady=self.gap / 2)
+            self.bind_wheel(holder)
+            self.slots.append((holder, card))
+            self.slot_items.append(None)
+            self.cards_created += 1
+
+    def stats(self):
+        return {"items": len(self.items), "matches": len(self.matches), "cards": self.cards_created, "fills": self.fills}
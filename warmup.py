@@ -0,0 +1,109 @@
+import importlib
+import threading
+import time
+
+
+# --- Lazy Module Imports ---
+# Stands in for a module until one of its attributes is first used, then
+# imports it. cv2 and mediapipe take most of a second to import between them
+# and the app only needs them once a workout starts, so the main menu comes
+# up without them. Attributes are cached on first use, so after that a
+# lookup costs the same as on the module itself.
+class LazyModule:
+    def __init__(self, name):
+        self._module_name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            # import_module is thread-safe; a second caller waits for the first
+            self._module = importlib.import_module(self._module_name)
+        return self._module
+
+    def _is_loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        value = getattr(self._load(), attr)
+        setattr(self, attr, value)
+        return value
+
+
+# --- Background Warm-up ---
+# Gets the slow parts of starting a workout out of the way while the user is
+# still picking a goal and program: imports the vision modules, builds the
+# pose session (the factory is expected to warm it) and opens the camera.
+# The app collects both with take() when the workout starts; whatever is
+# never collected is released by close(). `marks` holds seconds from start()
+# to each step, for the startup benchmark.
+class BackgroundWarmup:
+    def __init__(self, modules=(), pose_factory=None, open_camera=None):
+        self.modules = modules
+        self.pose_factory = pose_factory
+        self.open_camera = open_camera
+        self.pose_session = None
+        self.cap = None
+        self.error = None
+        self.marks = {}
+        self.started_at = None
+        self.closed = False
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self.thread = threading.Thread(target=self.run, name="warm-up", daemon=True)
+        self.thread.start()
+        return self
+
+    def mark(self, step):
+        self.marks[step] = time.perf_counter() - self.started_at
+
+    def run(self):
+        try:
+            for module in self.modules:
+                module._load()
+            self.mark("imports")
+            if self.pose_factory is not None:
+                self.pose_session = self.pose_factory()
+                self.mark("pose_ready")
+            if self.open_camera is not None:
+                self.cap = self.open_camera()
+                self.mark("camera_ready")
+        except Exception as e:
+            # Handed to the UI thread by take()
+            self.error = e
+        finally:
+            with self.lock:
+                self.done.set()
+                if self.closed:
+                    self.release()
+
+    def ready(self):
+        return self.done.is_set()
+
+    def take(self):
+        # -> (pose_session, cap) once ready(); the caller owns both from here
+        with self.lock:
+            if self.error is not None:
+                self.release()
+                raise self.error
+            pose_session, cap = self.pose_session, self.cap
+            self.pose_session = self.cap = None
+        return pose_session, cap
+
+    def close(self):
+        # Safe at any point; a warm-up still running cleans up when it ends
+        with self.lock:
+            self.closed = True
+            if self.done.is_set():
+                self.release()
+
+    def release(self):
+        if self.pose_session is not None:
+            self.pose_session.close()
+            self.pose_session = None
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
@@ -0,0 +1,238 @@
+import argparse
+import json
+import time
+
+from fitness_data import CATALOG, EXERCISES
+from workout_history import WorkoutHistory, open_database
+
+DAY = 86400.0
+
+ANALYTICS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS weekly_volume (
+    user TEXT NOT NULL,
+    week TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    reps INTEGER NOT NULL,
+    sets INTEGER NOT NULL,
+    sessions INTEGER NOT NULL,
+    PRIMARY KEY (user, week, exercise)
+);
+CREATE TABLE IF NOT EXISTS daily_tempo (
+    user TEXT NOT NULL,
+    day TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    reps INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    PRIMARY KEY (user, day, exercise)
+);
+CREATE TABLE IF NOT EXISTS session_adherence (
+    session_id TEXT PRIMARY KEY,
+    user TEXT NOT NULL,
+    week TEXT NOT NULL,
+    goal TEXT,
+    program TEXT,
+    target_reps INTEGER,
+    done_reps INTEGER NOT NULL,
+    target_sets INTEGER,
+    done_sets INTEGER NOT NULL,
+    completed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS session_adherence_user_week ON session_adherence (user, week);
+CREATE TABLE IF NOT EXISTS personal_bests (
+    user TEXT NOT NULL,
+    exercise TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL,
+    time REAL NOT NULL,
+    session_id TEXT,
+    PRIMARY KEY (user, exercise, metric)
+);
+"""
+
+ROLLUP_TABLES = ("weekly_volume", "daily_tempo", "session_adherence", "personal_bests")
+
+ADD_VOLUME = """
+INSERT INTO weekly_volume (user, week, exercise, reps, sets, sessions) VALUES (?, ?, ?, ?, ?, 1)
+ON CONFLICT (user, week, exercise) DO UPDATE SET
+    reps = reps + excluded.reps, sets = sets + excluded.sets, sessions = sessions + 1"""
+ADD_TEMPO = """
+INSERT INTO daily_tempo (user, day, exercise, reps, seconds) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (user, day, exercise) DO UPDATE SET
+    reps = reps + excluded.reps, seconds = seconds + excluded.seconds"""
+# Only replaces the stored best when the new value beats it
+OFFER_BEST = """
+INSERT INTO personal_bests (user, exercise, metric, value, time, session_id) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (user, exercise, metric) DO UPDATE SET
+    value = excluded.value, time = excluded.time, session_id = excluded.session_id
+WHERE excluded.value > personal_bests.value"""
+
+
+def day_of(timestamp):
+    return time.strftime("%Y-%m-%d", time.gmtime(timestamp))
+
+
+def week_of(timestamp):
+    # Weeks are keyed by their Monday (UTC)
+    return day_of(timestamp - time.gmtime(timestamp).tm_wday * DAY)
+
+
+# --- Training Analytics ---
+# Dashboards (weekly volume, rep tempo, program adherence, personal bests)
+# read small rollup tables instead of the raw event history, so they cost
+# the same after a week or after years. The rollups are updated one session
+# at a time inside the history writer's transaction, right after the
+# session's end is committed; rebuild() recomputes them from scratch.
+# Tempo is the time between consecutive reps, so the first rep of each set
+# (which includes getting into position) is left out.
+class WorkoutAnalytics:
+    def __init__(self, history):
+        self.history = history
+        history.schemas.append(ANALYTICS_SCHEMA)
+        history.session_hooks.append(self.apply_session)
+
+    def apply_session(self, conn, session_id):
+        session = conn.execute("SELECT user, goal, program, started_at, completed FROM sessions WHERE id = ?",
+                               (session_id,)).fetchone()
+        # Each session is counted once, however often it's offered
+        if session is None or conn.execute("SELECT 1 FROM session_adherence WHERE session_id = ?",
+                                           (session_id,)).fetchone():
+            return False
+        user, goal, program_name, started_at, completed = session
+        week, day = week_of(started_at), day_of(started_at)
+        program = CATALOG.find_program(goal, program_name) if goal and program_name else None
+
+        sets = conn.execute("""
+            SELECT exercise, set_number, COUNT(*),
+                   SUM(CASE WHEN rep > 1 THEN seconds END), COUNT(CASE WHEN rep > 1 THEN seconds END)
+            FROM events WHERE session_id = ? AND type = 'rep'
+            GROUP BY exercise, set_number""", (session_id,)).fetchall()
+        completed_sets = dict(conn.execute("""
+            SELECT exercise, COUNT(*) FROM events WHERE session_id = ? AND type = 'set_complete'
+            GROUP BY exercise""", (session_id,)).fetchall())
+
+        totals = {exercise: [0, 0, 0.0, 0] for exercise in completed_sets}
+        done_reps = 0
+        for exercise, _, reps, seconds, timed in sets:
+            # [reps, most reps in one set, tempo seconds, timed reps]
+            total = totals.setdefault(exercise, [0, 0, 0.0, 0])
+            total[0] += reps
+            total[1] = max(total[1], reps)
+            total[2] += seconds or 0.0
+            total[3] += timed
+            # Reps beyond the program's target don't make up for a missed set
+            done_reps += min(reps, program["reps"]) if program else reps
+
+        for exercise, (reps, best_set, seconds, timed) in totals.items():
+            conn.execute(ADD_VOLUME, (user, week, exercise, reps, completed_sets.get(exercise, 0)))
+            if timed:
+                conn.execute(ADD_TEMPO, (user, day, exercise, timed, seconds))
+            week_reps = conn.execute("SELECT reps FROM weekly_volume WHERE user = ? AND week = ? AND exercise = ?",
+                                     (user, week, exercise)).fetchone()[0]
+            for metric, value in (("set_reps", best_set), ("session_reps", reps), ("week_reps", week_reps)):
+                if value:
+                    conn.execute(OFFER_BEST, (user, exercise, metric, value, started_at, session_id))
+
+        target_reps = target_sets = None
+        if program:
+            target_sets = program["sets"] * len(program["exercises"])
+            target_reps = target_sets * program["reps"]
+        conn.execute("INSERT INTO session_adherence VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     (session_id, user, week, goal, program_name, target_reps, done_reps, target_sets,
+                      sum(completed_sets.values()), completed))
+        return True
+
+    def rebuild(self):
+        # Full recompute from the raw history, e.g. after changing the rollup
+        # rules or if they're suspect. Holds the write lock throughout, so the
+        # writer thread waits rather than interleaving sessions.
+        conn = open_database(self.history.path)
+        conn.executescript(ANALYTICS_SCHEMA)
+        with conn:
+            for table in ROLLUP_TABLES:
+                conn.execute(f"DELETE FROM {table}")
+            sessions = conn.execute("SELECT id FROM sessions WHERE ended_at IS NOT NULL ORDER BY started_at").fetchall()
+            for (session_id,) in sessions:
+                self.apply_session(conn, session_id)
+        conn.close()
+        return len(sessions)
+
+    # --- Dashboard queries (rollup tables only) ---
+    def weekly_volume(self, user, weeks=12, now=None):
+        since = week_of((now or time.time()) - (weeks - 1) * 7 * DAY)
+        rows = self.history.query("SELECT week, exercise, reps, sets, sessions FROM weekly_volume "
+                                  "WHERE user = ? AND week >= ? ORDER BY week, exercise", (user, since))
+        for row in rows:
+            row["name"] = EXERCISES.get(row["exercise"], {}).get("name", row["exercise"])
+        return rows
+
+    def tempo_trend(self, user, exercise=None, days=90, now=None):
+        # Mean seconds per rep by day
+        since = day_of((now or time.time()) - (days - 1) * DAY)
+        query = "SELECT day, exercise, reps, seconds / reps AS seconds_per_rep FROM daily_tempo WHERE user = ? AND day >= ?"
+        params = (user, since)
+        if exercise is not None:
+            query += " AND exercise = ?"
+            params += (exercise,)
+        return self.history.query(query + " ORDER BY day, exercise", params)
+
+    def adherence(self, user, weeks=12, now=None):
+        since = week_of((now or time.time()) - (weeks - 1) * 7 * DAY)
+        rows = self.history.query("""
+            SELECT week, COUNT(*) AS sessions, SUM(completed) AS completed,
+                   SUM(done_reps) AS done_reps, SUM(target_reps) AS target_reps,
+                   SUM(done_sets) AS done_sets, SUM(target_sets) AS target_sets
+            FROM session_adherence WHERE user = ? AND week >= ?
+            GROUP BY week ORDER BY week""", (user, since))
+        for row in rows:
+            row["adherence"] = row["done_reps"] / row["target_reps"] if row["target_reps"] else None
+        return rows
+
+    def personal_bests(self, user):
+        return self.history.query("SELECT exercise, metric, value, time, session_id FROM personal_bests "
+                                  "WHERE user = ? ORDER BY exercise, metric", (user,))
+
+    def dashboard(self, user, weeks=12, now=None):
+        return {
+            "weekly_volume": self.weekly_volume(user, weeks, now),
+            "tempo": self.tempo_trend(user, None, weeks * 7, now),
+            "adherence": self.adherence(user, weeks, now),
+            "personal_bests": self.personal_bests(user)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Training dashboards from the workout history.")
+    parser.add_argument("--db", default="workout_history.db")
+    parser.add_argument("--user", default="local")
+    parser.add_argument("--weeks", type=int, default=12)
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the rollups from the raw history first")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    history = WorkoutHistory(args.db)
+    analytics = WorkoutAnalytics(history)
+    history.start()
+    if args.rebuild:
+        start = time.perf_counter()
+        count = analytics.rebuild()
+        print(f"Rebuilt rollups from {count} sessions in {time.perf_counter() - start:.2f} s")
+    dashboard = analytics.dashboard(args.user, args.weeks)
+    history.close()
+
+    if args.json:
+        print(json.dumps(dashboard, indent=2))
+        return
+    print(f"\nWeekly volume ({args.user}, last {args.weeks} weeks)")
+    for row in dashboard["weekly_volume"]:
+        print(f"  {row['week']}  {row['name']:<16}{row['reps']:>6} reps {row['sets']:>4} sets")
+    print("\nAdherence")
+    for row in dashboard["adherence"]:
+        share = f"{row['adherence'] * 100:.0f}%" if row["adherence"] is not None else "-"
+        print(f"  {row['week']}  {row['sessions']} sessions, {row['completed']} completed, {share} of target reps")
+    print("\nPersonal bests")
+    for row in dashboard["personal_bests"]:
+        print(f"  {row['exercise']:<16}{row['metric']:<14}{row['value']:>6.0f}  ({day_of(row['time'])})")
+
+
+if __name__ == "__main__":
+    main()
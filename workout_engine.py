@@ -0,0 +1,113 @@
+import time
+from collections import deque
+
+from exercise_tracker import ExerciseTracker
+from joint_angles import joint_angles, landmarks_to_array
+
+
+# --- Workout Engine ---
+# Program progression and rep counting as a stream of events, with no UI:
+# the CTk app, headless sessions and the coaching server all drive this.
+# Feed it one frame of landmarks at a time with handle_landmarks(); it
+# returns (and passes to `on_event`) what happened on that frame:
+#   exercise      a new exercise/set started
+#   rep           one rep counted (with the joint angle)
+#   set_complete  the rep target for the current exercise was reached
+#   quote         a motivational quote after a long rest
+#   workout_done  the last set finished
+# With auto_advance the engine moves on as soon as a set is complete;
+# otherwise the caller decides when with advance().
+class WorkoutEngine(ExerciseTracker):
+    def __init__(self, program=None, clock=time.time, auto_advance=True, on_event=None, history=1000):
+        self.auto_advance = auto_advance
+        self.on_event = on_event
+        self.events = deque(maxlen=history)
+        self.pending = []
+        self.finished = False
+        self.frames = 0
+        self.frames_with_pose = 0
+        self.last_angle = None
+        self.quote_visible = False
+        ExerciseTracker.__init__(self, program, clock=clock)
+
+    def start_program(self, program):
+        ExerciseTracker.start_program(self, program)
+        self.finished = False
+        # Nothing from a previous workout carries over into this one
+        self.pending = []
+        self.emit("exercise")
+        return self.flush()
+
+    def handle_landmarks(self, points):
+        # points: (33, 4) landmark array, or None when no pose was found
+        self.frames += 1
+        self.last_angle = None
+        if self.finished or self.selected_program is None:
+            return []
+
+        if points is not None:
+            self.frames_with_pose += 1
+            rep_detected, angle = self.count_rep(joint_angles(points))
+            self.last_angle = float(angle)
+            if rep_detected:
+                self.emit("rep", rep=self.counter, angle=self.last_angle)
+                # Only the rep that reaches the target completes the set; without
+                # auto_advance, reps past it count but don't complete it again
+                if self.counter == self.selected_program['reps']:
+                    self.emit("set_complete", quote=self.current_quote)
+                    if self.auto_advance:
+                        self.advance()
+
+        motivation_played = self.motivation_played
+        self.quote_visible = self.check_rest()
+        if self.motivation_played and not motivation_played:
+            self.emit("quote", quote=self.current_quote)
+        return self.flush()
+
+    def handle_pose_results(self, results):
+        # MediaPipe results straight from PoseSession.process()
+        points = landmarks_to_array(results.pose_landmarks.landmark) if results.pose_landmarks else None
+        return self.handle_landmarks(points)
+
+    def advance(self):
+        # Next exercise (or next set); returns False once the workout is done
+        if self.advance_exercise():
+            self.emit("exercise")
+            return True
+        self.finished = True
+        self.emit("workout_done")
+        return False
+
+    def emit(self, kind, **fields):
+        event = {
+            "type": kind,
+            "time": self.clock(),
+            "exercise": self.current_exercise,
+            "set": self.current_set,
+            **fields
+        }
+        self.events.append(event)
+        self.pending.append(event)
+
+    def flush(self):
+        # Hand this frame's events to the listener and the caller
+        events, self.pending = self.pending, []
+        if self.on_event is not None:
+            for event in events:
+                self.on_event(event)
+        return events
+
+    def status(self):
+        program = self.selected_program or {}
+        return {
+            "program": program.get("name"),
+            "exercise": self.current_exercise,
+            "set": self.current_set,
+            "sets": program.get("sets"),
+            "reps": self.counter,
+            "target_reps": program.get("reps"),
+            "stage": self.stage,
+            "frames": self.frames,
+            "frames_with_pose": self.frames_with_pose,
+            "finished": self.finished
+        }
@@ -0,0 +1,243 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    user TEXT NOT NULL,
+    goal TEXT,
+    program TEXT,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    user TEXT NOT NULL,
+    time REAL NOT NULL,
+    type TEXT NOT NULL,
+    exercise TEXT,
+    set_number INTEGER,
+    rep INTEGER,
+    angle REAL,
+    seconds REAL,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_user_time ON sessions (user, started_at);
+CREATE INDEX IF NOT EXISTS events_user_exercise_time ON events (user, exercise, time);
+CREATE INDEX IF NOT EXISTS events_user_time ON events (user, time);
+CREATE INDEX IF NOT EXISTS events_session ON events (session_id, time);
+"""
+
+INSERT_SESSION = "INSERT INTO sessions (id, user, goal, program, started_at) VALUES (?, ?, ?, ?, ?)"
+END_SESSION = "UPDATE sessions SET ended_at = ?, completed = ? WHERE id = ?"
+INSERT_EVENT = ("INSERT INTO events (session_id, user, time, type, exercise, set_number, rep, angle, seconds, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+# Event fields with their own columns; anything else goes into `data` as JSON
+EVENT_COLUMNS = {"type", "time", "exercise", "set", "rep", "angle"}
+
+
+def open_database(path):
+    # Waits out a long write (e.g. an analytics rebuild) instead of failing
+    conn = sqlite3.connect(path, timeout=30.0)
+    conn.row_factory = sqlite3.Row
+    # WAL lets the query side read while the writer thread commits;
+    # NORMAL sync is safe with WAL and skips an fsync per transaction
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+# --- Workout History Store ---
+# Persists sessions and workout events (reps with their angle and duration,
+# set completions, exercise changes) to SQLite. Recording only puts a tuple
+# on an in-memory queue, so it is safe to call from the frame loop: a writer
+# thread drains the queue and commits whatever has arrived in one transaction
+# at most every `flush_interval` seconds (or per `batch_size` rows). If the
+# disk can't keep up, more than `max_pending` queued rows are dropped and
+# counted instead of growing without bound.
+# Other layers can add tables (`schemas`, created on start) and run inside
+# the writer's transaction once a session has ended and all of its events
+# are in (`session_hooks`, called as hook(conn, session_id)).
+class WorkoutHistory:
+    def __init__(self, path="workout_history.db", batch_size=500, flush_interval=0.5, max_pending=100000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.reader = None
+        # session -> time of its last rep or exercise start, for rep durations
+        self.last_mark = {}
+        self.events_written = 0
+        self.batches_written = 0
+        self.dropped = 0
+        self.schemas = []
+        self.session_hooks = []
+
+    def start(self):
+        if self.thread is None:
+            # Create the schema before anyone queries
+            conn = open_database(self.path)
+            for script in self.schemas:
+                conn.executescript(script)
+            conn.close()
+            self.thread = threading.Thread(target=self.run, name="history-writer", daemon=True)
+            self.thread.start()
+        return self
+
+    # --- Recording (any thread, never blocks on disk) ---
+    def begin_session(self, user, goal=None, program=None, started_at=None):
+        session_id = uuid.uuid4().hex
+        started_at = time.time() if started_at is None else started_at
+        self.last_mark[session_id] = started_at
+        self.queue.put(("session", (session_id, user, goal, program, started_at)))
+        return session_id
+
+    def end_session(self, session_id, completed=False, ended_at=None):
+        self.last_mark.pop(session_id, None)
+        self.queue.put(("end", (time.time() if ended_at is None else ended_at, int(completed), session_id)))
+
+    def record(self, session_id, user, event):
+        # event: a WorkoutEngine event dict
+        if self.queue.qsize() >= self.max_pending:
+            self.dropped += 1
+            return
+        kind, when = event["type"], event["time"]
+        seconds = None
+        if kind == "rep":
+            # How long this rep took: since the previous rep or the exercise start
+            last = self.last_mark.get(session_id)
+            seconds = when - last if last is not None else None
+            self.last_mark[session_id] = when
+        elif kind == "exercise":
+            self.last_mark[session_id] = when
+        extra = {key: value for key, value in event.items() if key not in EVENT_COLUMNS}
+        self.queue.put(("event", (session_id, user, when, kind, event.get("exercise"), event.get("set"),
+                                  event.get("rep"), event.get("angle"), seconds, json.dumps(extra) if extra else None)))
+
+    # --- Writer thread ---
+    def run(self):
+        conn = open_database(self.path)
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            # Keep collecting until the batch is full, the interval is up or
+            # a flush or stop request arrives
+            while len(batch) < self.batch_size and batch[-1][0] not in ("flush", "stop"):
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            running = self.write(conn, batch)
+        conn.close()
+
+    def write(self, conn, batch):
+        events, waiters, running = [], [], True
+        with conn:
+            for kind, payload in batch:
+                if kind == "event":
+                    events.append(payload)
+                    continue
+                if events:
+                    # In order: a session's events go in before its end
+                    conn.executemany(INSERT_EVENT, events)
+                    self.events_written += len(events)
+                    events = []
+                if kind == "session":
+                    conn.execute(INSERT_SESSION, payload)
+                elif kind == "end":
+                    conn.execute(END_SESSION, payload)
+                    for hook in self.session_hooks:
+                        self.run_hook(conn, hook, payload[2])
+                elif kind == "flush":
+                    waiters.append(payload)
+                elif kind == "stop":
+                    running = False
+            if events:
+                conn.executemany(INSERT_EVENT, events)
+                self.events_written += len(events)
+        self.batches_written += 1
+        for waiter in waiters:
+            waiter.set()
+        return running
+
+    def run_hook(self, conn, hook, session_id):
+        # A failing hook only rolls back its own changes; the history is kept
+        conn.execute("SAVEPOINT session_hook")
+        try:
+            hook(conn, session_id)
+        except Exception as e:
+            conn.execute("ROLLBACK TO session_hook")
+            print(f"History hook {hook.__name__} failed for session {session_id}: {e}")
+        conn.execute("RELEASE session_hook")
+
+    def flush(self, timeout=None):
+        # Wait until everything recorded so far is committed
+        if self.thread is None:
+            return True
+        done = threading.Event()
+        self.queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(("stop", None))
+            self.thread.join()
+            self.thread = None
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+    # --- Queries (caller's thread, own connection) ---
+    def query(self, sql, params=()):
+        if self.reader is None:
+            self.reader = open_database(self.path)
+        return [dict(row) for row in self.reader.execute(sql, params)]
+
+    def sessions(self, user, start=None, end=None):
+        return self.query("SELECT * FROM sessions WHERE user = ? AND started_at >= ? AND started_at < ? ORDER BY started_at",
+                          (user, start or 0.0, end or float("inf")))
+
+    def session_events(self, session_id):
+        return self.query("SELECT * FROM events WHERE session_id = ? ORDER BY time", (session_id,))
+
+    def reps(self, user, exercise=None, start=None, end=None):
+        if exercise is None:
+            return self.query("SELECT * FROM events WHERE user = ? AND time >= ? AND time < ? AND type = 'rep' ORDER BY time",
+                              (user, start or 0.0, end or float("inf")))
+        return self.query("SELECT * FROM events WHERE user = ? AND exercise = ? AND time >= ? AND time < ? AND type = 'rep' "
+                          "ORDER BY time", (user, exercise, start or 0.0, end or float("inf")))
+
+    def exercise_summary(self, user, start=None, end=None):
+        # Per exercise: reps, sets completed, mean rep time and joint angle range
+        return self.query("""
+            SELECT exercise,
+                   SUM(type = 'rep') AS reps,
+                   SUM(type = 'set_complete') AS sets,
+                   AVG(CASE WHEN type = 'rep' THEN seconds END) AS mean_rep_seconds,
+                   MIN(angle) AS min_angle,
+                   MAX(angle) AS max_angle
+            FROM events
+            WHERE user = ? AND time >= ? AND time < ? AND type IN ('rep', 'set_complete')
+            GROUP BY exercise ORDER BY exercise""", (user, start or 0.0, end or float("inf")))
+
+    def stats(self):
+        return {
+            "history_pending": self.queue.qsize(),
+            "history_events_written": self.events_written,
+            "history_batches": self.batches_written,
+            "history_dropped": self.dropped
+        }